@@ -1,104 +1,784 @@
 import os
+import asyncio
 import json
-from typing import Optional, List, Dict
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Callable, Any, AsyncIterator, Type
+import httpx
+from backend.services import ai_cache, ai_telemetry, local_analyzer, structured_output
+from backend.services.ai_router import Provider, ProviderRouter
+from backend.services.single_flight import llm_calls
+from backend.services.social_prompt import build_social_digest
+from backend.services.structured_output import (
+    AnalysisOutput, CompetitiveOutput, InsightsOutput, SocialOutput, StructuredOutputError
+)
+
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+OPENAI_MODEL = "gpt-4o-mini"
+
+# Bump a version whenever its prompt template changes so stale cached responses are not reused
+PROMPT_VERSIONS = {
+    "analysis": "analysis-v1",
+    "summary": "summary-v1",
+    "insights": "insights-v2",
+    "competitive": "competitive-v1",
+    "social": "social-v2",
+    "chunk": "chunk-v1",
+    "reduce": "reduce-v1",
+}
+
+# Stored on analyzed rows; rows with any other value are picked up by batch re-analysis
+ANALYSIS_PROMPT_VERSION = "+".join(PROMPT_VERSIONS[k] for k in ("analysis", "chunk", "reduce"))
+
+# Map-reduce analysis of long documents
+SINGLE_CALL_CHARS = 3000  # Content up to this size is analyzed in one call
+AI_CHUNK_TOKENS = int(os.getenv("AI_CHUNK_TOKENS", "1500"))
+AI_MAX_CHUNKS = int(os.getenv("AI_MAX_CHUNKS", "40"))
+AI_MAP_CONCURRENCY = max(1, int(os.getenv("AI_MAP_CONCURRENCY", "4")))
+
+LOCAL_SOCIAL_RECORDS = 500  # Records fed to the local analyzer when no LLM answer is available
+
+# Shared across all map-reduce runs so concurrent jobs cannot multiply provider load
+_map_slots = threading.BoundedSemaphore(AI_MAP_CONCURRENCY)
+
+# In-flight LLM calls per provider (sync and async callers share the same cap)
+AI_MAX_CONCURRENCY_ANTHROPIC = max(1, int(os.getenv("AI_MAX_CONCURRENCY_ANTHROPIC", "4")))
+AI_MAX_CONCURRENCY_OPENAI = max(1, int(os.getenv("AI_MAX_CONCURRENCY_OPENAI", "4")))
+
+# Keep-alive connection pool for the SDK HTTP clients
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+AI_HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("AI_HTTP_KEEPALIVE_CONNECTIONS", "10"))
+AI_HTTP_TIMEOUT_SECONDS = float(os.getenv("AI_HTTP_TIMEOUT_SECONDS", "120"))
+
+
+class ProviderLimiter:
+    """Caps in-flight calls to one provider across threads and the event loop.
+    
+    Backed by a thread semaphore so job-queue workers and async endpoints draw
+    from the same slots. Async callers poll for a slot instead of blocking the
+    loop, so a cancelled request can never leak one.
+    """
+    
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+    
+    def _acquired(self):
+        with self._lock:
+            self.in_flight += 1
+    
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+    
+    def __enter__(self):
+        self._slots.acquire()
+        self._acquired()
+        return self
+    
+    def __exit__(self, *exc):
+        self._release()
+    
+    async def __aenter__(self):
+        delay = 0.01
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+        self._acquired()
+        return self
+    
+    async def __aexit__(self, *exc):
+        self._release()
+    
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.limit
+
+
+provider_limits = {
+    "anthropic": ProviderLimiter("anthropic", AI_MAX_CONCURRENCY_ANTHROPIC),
+    "openai": ProviderLimiter("openai", AI_MAX_CONCURRENCY_OPENAI),
+}
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=AI_HTTP_KEEPALIVE_CONNECTIONS,
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English prose)"""
+    return len(text) // 4 + 1
+
+
+def split_into_chunks(content: str, max_tokens: int = AI_CHUNK_TOKENS) -> List[str]:
+    """Split content into chunks of at most ``max_tokens``, preferring paragraph boundaries"""
+    max_chars = max_tokens * 4
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    
+    for paragraph in content.split("\n"):
+        # Hard-split paragraphs that are larger than a whole chunk
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)] or [""]
+        for piece in pieces:
+            if current and current_len + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece) + 1
+    
+    if current:
+        chunks.append("\n".join(current))
+    
+    return [c for c in chunks if c.strip()]
 
 class AIProcessor:
-    """Hybrid AI processor: tries Claude first, falls back to OpenAI"""
+    """Hybrid AI processor: tries Claude first, falls back to OpenAI
+    
+    Use ``get_ai_processor()`` rather than constructing one per module - the
+    shared instance owns the pooled HTTP clients for both providers.
+    """
     
     def __init__(self):
         self.anthropic_key = os.getenv("ANTHROPIC_API_KEY")
         self.openai_key = os.getenv("OPENAI_API_KEY")
         
-        self.anthropic_client = None
-        self.openai_client = None
+        # SDK clients (and the anthropic/openai imports) are built on first use, not at startup
+        self._anthropic_client = None
+        self._openai_client = None
+        self._client_errors: Dict[str, str] = {}
+        self._client_lock = threading.Lock()
         
-        # Initialize Claude (Anthropic)
-        if self.anthropic_key:
-            try:
-                from anthropic import Anthropic
-                self.anthropic_client = Anthropic(api_key=self.anthropic_key)
-                print("[AIProcessor] ✅ Claude (Anthropic) client initialized")
-            except Exception as e:
-                print(f"[AIProcessor] ⚠️ Failed to initialize Claude: {e}")
-        
-        # Initialize OpenAI (fallback)
-        if self.openai_key:
-            try:
-                from openai import OpenAI
-                self.openai_client = OpenAI(api_key=self.openai_key)
-                print("[AIProcessor] ✅ OpenAI client initialized (fallback)")
-            except Exception as e:
-                print(f"[AIProcessor] ⚠️ Failed to initialize OpenAI: {e}")
+        # Async clients are created on first use, inside the running event loop
+        self._async_anthropic_client = None
+        self._async_openai_client = None
+        self._async_lock = threading.Lock()
         
-        if not self.anthropic_client and not self.openai_client:
+        if not self.anthropic_key and not self.openai_key:
             print("[AIProcessor] ❌ No AI clients available")
+        
+        # Claude first, OpenAI as fallback - reordered/hedged by observed health and latency
+        providers = []
+        if self.anthropic_key:
+            providers.append(Provider(
+                f"anthropic/{CLAUDE_MODEL}", self._call_claude, self._acall_claude,
+                has_capacity=provider_limits["anthropic"].has_capacity
+            ))
+        if self.openai_key:
+            providers.append(Provider(
+                f"openai/{OPENAI_MODEL}", self._call_openai, self.acall_openai,
+                has_capacity=provider_limits["openai"].has_capacity
+            ))
+        self.router = ProviderRouter(providers)
+    
+    @property
+    def anthropic_client(self):
+        if self._anthropic_client is None and self.anthropic_key and "anthropic" not in self._client_errors:
+            with self._client_lock:
+                if self._anthropic_client is None and "anthropic" not in self._client_errors:
+                    try:
+                        from anthropic import Anthropic
+                        self._anthropic_client = Anthropic(
+                            api_key=self.anthropic_key,
+                            http_client=httpx.Client(limits=_http_limits(), timeout=AI_HTTP_TIMEOUT_SECONDS)
+                        )
+                        print("[AIProcessor] ✅ Claude (Anthropic) client initialized")
+                    except Exception as e:
+                        self._client_errors["anthropic"] = str(e)
+                        print(f"[AIProcessor] ⚠️ Failed to initialize Claude: {e}")
+        return self._anthropic_client
+    
+    @property
+    def openai_client(self):
+        if self._openai_client is None and self.openai_key and "openai" not in self._client_errors:
+            with self._client_lock:
+                if self._openai_client is None and "openai" not in self._client_errors:
+                    try:
+                        from openai import OpenAI
+                        self._openai_client = OpenAI(
+                            api_key=self.openai_key,
+                            http_client=httpx.Client(limits=_http_limits(), timeout=AI_HTTP_TIMEOUT_SECONDS)
+                        )
+                        print("[AIProcessor] ✅ OpenAI client initialized (fallback)")
+                    except Exception as e:
+                        self._client_errors["openai"] = str(e)
+                        print(f"[AIProcessor] ⚠️ Failed to initialize OpenAI: {e}")
+        return self._openai_client
+    
+    @property
+    def available(self) -> bool:
+        return bool(self.anthropic_client or self.openai_client)
+    
+    @property
+    def async_anthropic_client(self):
+        if self._async_anthropic_client is None and self.anthropic_client:
+            with self._async_lock:
+                if self._async_anthropic_client is None:
+                    from anthropic import AsyncAnthropic
+                    self._async_anthropic_client = AsyncAnthropic(
+                        api_key=self.anthropic_key,
+                        http_client=httpx.AsyncClient(limits=_http_limits(), timeout=AI_HTTP_TIMEOUT_SECONDS)
+                    )
+        return self._async_anthropic_client
+    
+    @property
+    def async_openai_client(self):
+        if self._async_openai_client is None and self.openai_client:
+            with self._async_lock:
+                if self._async_openai_client is None:
+                    from openai import AsyncOpenAI
+                    self._async_openai_client = AsyncOpenAI(
+                        api_key=self.openai_key,
+                        http_client=httpx.AsyncClient(limits=_http_limits(), timeout=AI_HTTP_TIMEOUT_SECONDS)
+                    )
+        return self._async_openai_client
     
-    def _call_claude(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000) -> str:
-        """Call Claude API"""
+    @staticmethod
+    def _claude_schema_options(schema: Optional[Type[Any]]) -> Dict:
+        """Force a single tool call whose input is the schema"""
+        if schema is None:
+            return {}
+        return {
+            "tools": [structured_output.tool_spec(schema)],
+            "tool_choice": {"type": "tool", "name": schema.__name__}
+        }
+    
+    @staticmethod
+    def _openai_schema_options(schema: Optional[Type[Any]]) -> Dict:
+        """JSON mode - the prompt describes the fields, validation checks them"""
+        return {"response_format": {"type": "json_object"}} if schema is not None else {}
+    
+    def _call_claude(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
+        """Call Claude API (forced tool use returning ``schema`` when given)"""
         if not self.anthropic_client:
             raise Exception("Claude client not available")
         
-        response = self.anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ]
-        )
+        with provider_limits["anthropic"], ai_telemetry.provider_call("anthropic", CLAUDE_MODEL) as call:
+            response = self.anthropic_client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ],
+                **self._claude_schema_options(schema)
+            )
+            call.usage(response.usage.input_tokens, response.usage.output_tokens)
         
-        return response.content[0].text
+        return structured_output.anthropic_message_text(response)
     
-    def _call_openai(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000) -> str:
+    def _call_openai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        model: str = OPENAI_MODEL,
+        temperature: float = 0.7,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
         """Call OpenAI API"""
         if not self.openai_client:
             raise Exception("OpenAI client not available")
         
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=max_tokens
-        )
+        with provider_limits["openai"], ai_telemetry.provider_call("openai", model) as call:
+            response = self.openai_client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **self._openai_schema_options(schema)
+            )
+            if response.usage:
+                call.usage(response.usage.prompt_tokens, response.usage.completion_tokens)
         
         return response.choices[0].message.content.strip()
     
-    def _call_ai(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000) -> str:
-        """Hybrid AI call: tries Claude first, falls back to OpenAI"""
+    async def _acall_claude(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
+        """Call Claude API without blocking the event loop"""
+        client = self.async_anthropic_client
+        if not client:
+            raise Exception("Claude client not available")
         
-        # Try Claude first
+        async with provider_limits["anthropic"]:
+            with ai_telemetry.provider_call("anthropic", CLAUDE_MODEL) as call:
+                response = await client.messages.create(
+                    model=CLAUDE_MODEL,
+                    max_tokens=max_tokens,
+                    system=system_prompt,
+                    messages=[
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    **self._claude_schema_options(schema)
+                )
+                call.usage(response.usage.input_tokens, response.usage.output_tokens)
+        
+        return structured_output.anthropic_message_text(response)
+    
+    async def acall_openai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        model: str = OPENAI_MODEL,
+        temperature: float = 0.7,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
+        """Call OpenAI API without blocking the event loop"""
+        client = self.async_openai_client
+        if not client:
+            raise Exception("OpenAI client not available")
+        
+        async with provider_limits["openai"]:
+            with ai_telemetry.provider_call("openai", model) as call:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **self._openai_schema_options(schema)
+                )
+                if response.usage:
+                    call.usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        
+        return response.choices[0].message.content.strip()
+    
+    async def astream_openai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        model: str = OPENAI_MODEL,
+        temperature: float = 0.7
+    ) -> AsyncIterator[str]:
+        """Stream an OpenAI completion, yielding text deltas as they arrive"""
+        client = self.async_openai_client
+        if not client:
+            raise Exception("OpenAI client not available")
+        
+        async with provider_limits["openai"]:
+            with ai_telemetry.provider_call("openai", model) as call:
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                try:
+                    async for chunk in stream:
+                        if chunk.usage:  # Final chunk carries usage and no choices
+                            call.usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()  # Client went away mid-stream - stop paying for tokens
+    
+    def _call_ai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
+        """Hybrid AI call: tries Claude first, falls back to OpenAI (see services/ai_router.py)"""
+        if not self.router.providers:
+            raise Exception("No AI services available")
+        options = {"schema": schema} if schema is not None else {}
+        return self.router.call(system_prompt, user_prompt, max_tokens, **options)
+    
+    async def _acall_ai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int = 1000,
+        schema: Optional[Type[Any]] = None
+    ) -> str:
+        """Async hybrid AI call: tries Claude first, falls back to OpenAI"""
+        if not self.router.providers:
+            raise Exception("No AI services available")
+        options = {"schema": schema} if schema is not None else {}
+        return await self.router.acall(system_prompt, user_prompt, max_tokens, **options)
+    
+    def _model_signature(self) -> str:
+        """Provider/model chain a call would use - part of the cache key"""
+        models = []
         if self.anthropic_client:
-            try:
-                result = self._call_claude(system_prompt, user_prompt, max_tokens)
-                print("[AIProcessor] ✅ Used Claude")
+            models.append(CLAUDE_MODEL)
+        if self.openai_client:
+            models.append(OPENAI_MODEL)
+        return "|".join(models)
+    
+    def _cached_call(
+        self,
+        prompt_version: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        parse: Optional[Callable[[str], Any]] = None,
+        schema: Optional[Type[Any]] = None
+    ) -> Any:
+        """Call the AI through the persistent response cache.
+        
+        On a miss, concurrent callers with the same key share one provider
+        call (single-flight). ``parse`` runs before a fresh response is
+        stored, so responses that fail to parse are never cached.
+        
+        With a ``schema`` the provider is asked for structured output, the
+        response is validated (repairing truncation, with at most one repair
+        retry), the canonical JSON is cached and a dict is returned.
+        """
+        if schema is not None:
+            parse = lambda text: structured_output.parse(text, schema)
+        model = self._model_signature()
+        key = ai_cache.make_key(prompt_version, model, system_prompt, user_prompt, max_tokens)
+        
+        with ai_telemetry.request(prompt_version) as trace:
+            cached = ai_cache.get(key)
+            if cached is not None:
+                try:
+                    value = parse(cached) if parse else cached
+                    trace.source = "cache"
+                    print(f"[AIProcessor] ⚡ Cache hit ({prompt_version})")
+                    return value
+                except (ValueError, TypeError):
+                    pass  # Unparseable cached entry - fall through and refresh it
+            
+            def fetch() -> str:
+                trace.source = "provider"  # Followers that join this call stay "coalesced"
+                result = self._call_ai(system_prompt, user_prompt, max_tokens, schema)
+                if schema is not None:
+                    canonical, error = self._accept_structured(result, schema)
+                    if canonical is None:
+                        retry = self._call_ai(
+                            system_prompt, structured_output.repair_prompt(user_prompt, result, error),
+                            max_tokens, schema
+                        )
+                        canonical = self._accept_retry(retry, schema)
+                    result = canonical
+                elif parse:
+                    parse(result)
+                ai_cache.put(key, prompt_version, model, result)
                 return result
-            except Exception as e:
-                print(f"[AIProcessor] ⚠️ Claude failed: {e}, trying OpenAI...")
+            
+            result = llm_calls.do(key, fetch)
+            return parse(result) if parse else result
+    
+    async def _acached_call(
+        self,
+        prompt_version: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        parse: Optional[Callable[[str], Any]] = None,
+        schema: Optional[Type[Any]] = None
+    ) -> Any:
+        """Async ``_cached_call`` - cache reads/writes run in a worker thread"""
+        if schema is not None:
+            parse = lambda text: structured_output.parse(text, schema)
+        model = self._model_signature()
+        key = ai_cache.make_key(prompt_version, model, system_prompt, user_prompt, max_tokens)
         
-        # Fallback to OpenAI
-        if self.openai_client:
-            try:
-                result = self._call_openai(system_prompt, user_prompt, max_tokens)
-                print("[AIProcessor] ✅ Used OpenAI (fallback)")
+        with ai_telemetry.request(prompt_version) as trace:
+            cached = await asyncio.to_thread(ai_cache.get, key)
+            if cached is not None:
+                try:
+                    value = parse(cached) if parse else cached
+                    trace.source = "cache"
+                    print(f"[AIProcessor] ⚡ Cache hit ({prompt_version})")
+                    return value
+                except (ValueError, TypeError):
+                    pass
+            
+            async def fetch() -> str:
+                trace.source = "provider"
+                result = await self._acall_ai(system_prompt, user_prompt, max_tokens, schema)
+                if schema is not None:
+                    canonical, error = self._accept_structured(result, schema)
+                    if canonical is None:
+                        retry = await self._acall_ai(
+                            system_prompt, structured_output.repair_prompt(user_prompt, result, error),
+                            max_tokens, schema
+                        )
+                        canonical = self._accept_retry(retry, schema)
+                    result = canonical
+                elif parse:
+                    parse(result)
+                await asyncio.to_thread(ai_cache.put, key, prompt_version, model, result)
                 return result
-            except Exception as e:
-                print(f"[AIProcessor] ❌ OpenAI also failed: {e}")
-                raise Exception(f"Both AI services failed. Claude: {e if self.anthropic_client else 'N/A'}, OpenAI: {e}")
+            
+            result = await llm_calls.ado(key, fetch)
+            return parse(result) if parse else result
+    
+    @staticmethod
+    def _accept_structured(result: str, schema: Type[Any]) -> tuple:
+        """(canonical JSON, None) when the response validates, else (None, error)"""
+        try:
+            validated, repaired = structured_output.validate(result, schema)
+        except StructuredOutputError as e:
+            print(f"[AIProcessor] ⚠️ {schema.__name__} response invalid ({e}) - retrying once")
+            return None, e
+        structured_output.record(schema, "repaired" if repaired else "valid")
+        return validated.model_dump_json(), None
+    
+    @staticmethod
+    def _accept_retry(result: str, schema: Type[Any]) -> str:
+        """Canonical JSON of the repair retry; raises StructuredOutputError if it is still invalid"""
+        try:
+            validated, _ = structured_output.validate(result, schema)
+        except StructuredOutputError:
+            structured_output.record(schema, "failed")
+            raise
+        structured_output.record(schema, "retried")
+        return validated.model_dump_json()
+    
+    def _analysis_precheck(self, content: str) -> Optional[Dict]:
+        """Result to return without calling the AI (no content / no clients), else None"""
+        if not content or len(content.strip()) == 0:
+            return {
+                "summary": "No content to summarize",
+                "insights": ["No content to analyze"],
+                "sentiment": None,
+                "priority": "medium"
+            }
         
-        raise Exception("No AI services available")
+        if not self.available:
+            # Offline: deterministic in-process analysis instead of a placeholder
+            return local_analyzer.analyze(content)
+        
+        return None
     
-    def generate_summary(self, content: str, max_length: int = 500) -> str:
-        """Generate a summary of the content"""
+    @staticmethod
+    def _analysis_prompts(content: str, max_chars: int) -> tuple:
+        # Truncate very long content
+        content_preview = content[:max_chars] if len(content) > max_chars else content
+        
+        system_prompt = "You are a marketing analyst for Crooks & Castles streetwear brand. Provide concise, actionable analysis."
+        user_prompt = f"""Analyze this content. Return ONLY valid JSON with this structure:
+{{
+  "summary": "2-3 sentences focusing on key takeaways",
+  "insights": ["insight 1", "insight 2", "insight 3"],
+  "sentiment": "positive | negative | neutral | mixed",
+  "priority": "high | medium | low"
+}}
+
+Include 3-5 actionable insights. Priority reflects how urgently the brand should act on this.
+
+Content:
+{content_preview}"""
+        
+        return system_prompt, user_prompt
+    
+    def _finish_analysis(self, analysis: Any) -> Dict:
+        if not isinstance(analysis, dict):
+            raise ValueError("Invalid analysis format returned")
+        
+        result = self._normalize_analysis(analysis)
+        result["prompt_version"] = ANALYSIS_PROMPT_VERSION
+        print(f"[AIProcessor] Analyzed content ({len(result['insights'])} insights, {result['sentiment']} sentiment)")
+        return result
+    
+    @staticmethod
+    def _analysis_error(e: Exception, content: str) -> Dict:
+        if isinstance(e, StructuredOutputError):
+            print(f"[AIProcessor] Invalid analysis JSON after retry: {e} - using local analysis")
+        else:
+            print(f"[AIProcessor] Error analyzing content: {e} - using local analysis")
+        return local_analyzer.analyze(content)
+    
+    def analyze(self, content: str, max_chars: int = 3000, fallback: bool = True) -> Dict:
+        """Summary, insights, sentiment and priority from a single AI call.
+        
+        When the call fails the local analyzer answers instead; with
+        ``fallback=False`` the error is raised (background jobs retry it).
+        """
+        
+        precheck = self._analysis_precheck(content)
+        if precheck:
+            return precheck
+        
+        try:
+            system_prompt, user_prompt = self._analysis_prompts(content, max_chars)
+            analysis = self._cached_call(
+                PROMPT_VERSIONS["analysis"], system_prompt, user_prompt,
+                max_tokens=600, schema=AnalysisOutput
+            )
+            return self._finish_analysis(analysis)
+        except Exception as e:
+            if not fallback:
+                raise
+            return self._analysis_error(e, content)
+    
+    async def aanalyze(self, content: str, max_chars: int = 3000, fallback: bool = True) -> Dict:
+        """Async ``analyze`` for use inside async endpoints"""
+        
+        precheck = self._analysis_precheck(content)
+        if precheck:
+            return precheck
+        
+        try:
+            system_prompt, user_prompt = self._analysis_prompts(content, max_chars)
+            analysis = await self._acached_call(
+                PROMPT_VERSIONS["analysis"], system_prompt, user_prompt,
+                max_tokens=600, schema=AnalysisOutput
+            )
+            return self._finish_analysis(analysis)
+        except Exception as e:
+            if not fallback:
+                raise
+            return self._analysis_error(e, content)
+    
+    def analyze_long(self, content: str, fallback: bool = True) -> Dict:
+        """Map-reduce analysis covering the whole document.
+        
+        Content is split into token-budgeted chunks that are summarized
+        concurrently, then the partial summaries are reduced into the final
+        summary, insights, sentiment and priority. Chunk summaries go through
+        the response cache, so re-running over an edited document only pays
+        for the chunks that changed. ``fallback`` as in ``analyze``.
+        """
+        
+        if not content or len(content) <= SINGLE_CALL_CHARS:
+            return self.analyze(content, fallback=fallback)
         
         if not self.anthropic_client and not self.openai_client:
-            return "AI analysis unavailable - No API keys configured"
+            return self.analyze(content)
+        
+        # Grow chunks rather than exceed the chunk cap on very long documents
+        chunk_tokens = max(AI_CHUNK_TOKENS, estimate_tokens(content) // AI_MAX_CHUNKS + 1)
+        chunks = split_into_chunks(content, chunk_tokens)
+        
+        if len(chunks) <= 1:
+            return self.analyze(content, max_chars=chunk_tokens * 4, fallback=fallback)
+        
+        print(f"[AIProcessor] Map-reduce over {len(chunks)} chunks (~{chunk_tokens} tokens each)")
+        
+        def summarize(index: int) -> Optional[str]:
+            with _map_slots:
+                return self._summarize_chunk(chunks[index], index, len(chunks))
+        
+        # Each worker runs in a copy of this context so chunk calls keep the caller's telemetry labels
+        contexts = [contextvars.copy_context() for _ in chunks]
+        with ThreadPoolExecutor(max_workers=min(AI_MAP_CONCURRENCY, len(chunks))) as pool:
+            partials = list(pool.map(lambda i: contexts[i].run(summarize, i), range(len(chunks))))
+        
+        sections = [
+            f"Section {i + 1}/{len(chunks)}: {summary}"
+            for i, summary in enumerate(partials)
+            if summary
+        ]
+        
+        if not sections:
+            return self.analyze(content, fallback=fallback)
+        
+        try:
+            system_prompt = "You are a marketing analyst for Crooks & Castles streetwear brand. Provide concise, actionable analysis."
+            user_prompt = f"""Below are summaries of consecutive sections of one document. Analyze the document as a whole. Return ONLY valid JSON with this structure:
+{{
+  "summary": "2-3 sentences focusing on key takeaways",
+  "insights": ["insight 1", "insight 2", "insight 3"],
+  "sentiment": "positive | negative | neutral | mixed",
+  "priority": "high | medium | low"
+}}
+
+Include 3-5 actionable insights. Priority reflects how urgently the brand should act on this.
+
+Section summaries:
+{chr(10).join(sections)}"""
+            
+            analysis = self._cached_call(
+                PROMPT_VERSIONS["reduce"], system_prompt, user_prompt,
+                max_tokens=600, schema=AnalysisOutput
+            )
+            
+            if not isinstance(analysis, dict):
+                raise ValueError("Invalid analysis format returned")
+            
+            result = self._normalize_analysis(analysis)
+            result["prompt_version"] = ANALYSIS_PROMPT_VERSION
+            result["chunks"] = len(chunks)
+            result["chunks_summarized"] = len(sections)
+            print(f"[AIProcessor] Reduced {len(sections)}/{len(chunks)} chunk summaries")
+            return result
+            
+        except Exception as e:
+            print(f"[AIProcessor] Error reducing chunk summaries: {e}")
+            return self.analyze(content, fallback=fallback)
+    
+    def _summarize_chunk(self, chunk: str, index: int, total: int) -> Optional[str]:
+        """Map step: summarize one section of a long document (None on failure)"""
+        
+        system_prompt = "You are a marketing analyst for Crooks & Castles streetwear brand. Provide concise, factual summaries."
+        user_prompt = f"""This is one section of a longer document. Summarize its key facts, figures and takeaways in 2-4 sentences.
+
+Section:
+{chunk}"""
+        
+        try:
+            return self._cached_call(PROMPT_VERSIONS["chunk"], system_prompt, user_prompt, max_tokens=250).strip()
+        except Exception as e:
+            print(f"[AIProcessor] ⚠️ Chunk {index + 1}/{total} failed: {e}")
+            return None
+    
+    @staticmethod
+    def _normalize_analysis(analysis: Dict) -> Dict:
+        """Coerce an analysis dict to the shape the routers store"""
+        insights = analysis.get("insights") or []
+        if not isinstance(insights, list):
+            insights = [str(insights)]
+        
+        sentiment = str(analysis.get("sentiment") or "").strip().lower()
+        if sentiment not in ("positive", "negative", "neutral", "mixed"):
+            sentiment = "neutral"
+        
+        priority = str(analysis.get("priority") or "").strip().lower()
+        if priority not in ("high", "medium", "low"):
+            priority = "medium"
+        
+        return {
+            "summary": str(analysis.get("summary") or "").strip(),
+            "insights": [str(i) for i in insights][:5],  # Max 5 insights
+            "sentiment": sentiment,
+            "priority": priority
+        }
+    
+    def generate_summary(self, content: str, max_length: int = 500) -> str:
+        """Generate a summary of the content"""
         
         if not content or len(content.strip()) == 0:
             return "No content to summarize"
         
+        if not self.anthropic_client and not self.openai_client:
+            return local_analyzer.analyze(content)["summary"]
+        
         try:
             # Truncate very long content
             content_preview = content[:3000] if len(content) > 3000 else content
@@ -106,7 +786,7 @@ class AIProcessor:
             system_prompt = "You are a marketing analyst for Crooks & Castles streetwear brand. Provide concise, actionable summaries."
             user_prompt = f"Summarize this content in 2-3 sentences focusing on key takeaways:\n\n{content_preview}"
             
-            summary = self._call_ai(system_prompt, user_prompt, max_tokens=200)
+            summary = self._cached_call(PROMPT_VERSIONS["summary"], system_prompt, user_prompt, max_tokens=200)
             print(f"[AIProcessor] Generated summary ({len(summary)} chars)")
             return summary
             
@@ -117,59 +797,53 @@ class AIProcessor:
     def extract_insights(self, content: str) -> List[str]:
         """Extract key insights from content"""
         
-        if not self.anthropic_client and not self.openai_client:
-            return ["AI analysis unavailable - No API keys configured"]
-        
         if not content or len(content.strip()) == 0:
             return ["No content to analyze"]
         
+        if not self.anthropic_client and not self.openai_client:
+            return local_analyzer.analyze(content)["insights"]
+        
         try:
             # Truncate very long content
             content_preview = content[:3000] if len(content) > 3000 else content
             
             system_prompt = "You are a marketing analyst for Crooks & Castles streetwear brand. Extract actionable insights."
-            user_prompt = f"""Extract 3-5 key insights from this content. Return ONLY a JSON array of strings.
+            user_prompt = f"""Extract 3-5 key insights from this content.
 
 Content:
 {content_preview}
 
-Respond with ONLY valid JSON array format: ["insight 1", "insight 2", "insight 3"]"""
-            
-            result = self._call_ai(system_prompt, user_prompt, max_tokens=300)
-            
-            # Clean markdown code blocks if present
-            if result.startswith("```"):
-                if "```json" in result:
-                    result = result.split("```json")[1]
-                else:
-                    result = result.split("```")[1]
-                result = result.rsplit("```")[0].strip()
+Respond with ONLY a valid JSON object: {{"insights": ["insight 1", "insight 2", "insight 3"]}}"""
             
-            insights = json.loads(result)
+            insights = self._cached_call(
+                PROMPT_VERSIONS["insights"], system_prompt, user_prompt,
+                max_tokens=300, schema=InsightsOutput
+            )["insights"]
             
-            if isinstance(insights, list):
-                print(f"[AIProcessor] Extracted {len(insights)} insights")
-                return insights[:5]  # Max 5 insights
-            else:
-                return ["Invalid insights format returned"]
+            print(f"[AIProcessor] Extracted {len(insights)} insights")
+            return insights[:5]  # Max 5 insights
                 
-        except json.JSONDecodeError as e:
-            print(f"[AIProcessor] JSON parse error in extract_insights: {e}")
-            return ["Failed to parse AI insights"]
         except Exception as e:
-            print(f"[AIProcessor] Error extracting insights: {e}")
-            return [f"Insight extraction failed: {str(e)}"]
+            print(f"[AIProcessor] Error extracting insights: {e} - using local analysis")
+            return local_analyzer.analyze(content)["insights"]
+    
+    @staticmethod
+    def _local_competitive_analysis(content: str) -> Dict:
+        """``CompetitiveOutput``-shaped result from the local analyzer (it finds no strengths/opportunities)"""
+        local = local_analyzer.analyze(content)
+        return {
+            "summary": local["summary"],
+            "insights": local["insights"],
+            "strengths": [],
+            "opportunities": [],
+            "engine": local["engine"]
+        }
     
     def analyze_competitive_intel(self, content: str, competitor_name: str) -> Dict:
         """Analyze competitive intelligence"""
         
         if not self.anthropic_client and not self.openai_client:
-            return {
-                "summary": "AI analysis unavailable",
-                "insights": ["No API keys configured"],
-                "strengths": [],
-                "opportunities": []
-            }
+            return self._local_competitive_analysis(content)
         
         try:
             content_preview = content[:3000] if len(content) > 3000 else content
@@ -186,50 +860,47 @@ Respond with ONLY valid JSON array format: ["insight 1", "insight 2", "insight 3
 Data:
 {content_preview}"""
             
-            result = self._call_ai(system_prompt, user_prompt, max_tokens=500)
-            
-            # Clean markdown code blocks
-            if result.startswith("```"):
-                if "```json" in result:
-                    result = result.split("```json")[1]
-                else:
-                    result = result.split("```")[1]
-                result = result.rsplit("```")[0].strip()
-            
-            analysis = json.loads(result)
+            analysis = self._cached_call(
+                PROMPT_VERSIONS["competitive"], system_prompt, user_prompt,
+                max_tokens=500, schema=CompetitiveOutput
+            )
             print(f"[AIProcessor] Analyzed competitive intel for {competitor_name}")
             return analysis
             
         except Exception as e:
-            print(f"[AIProcessor] Error analyzing competitive intel: {e}")
-            return {
-                "summary": "Analysis failed",
-                "insights": [str(e)],
-                "strengths": [],
-                "opportunities": []
-            }
+            print(f"[AIProcessor] Error analyzing competitive intel: {e} - using local analysis")
+            return self._local_competitive_analysis(content)
+    
+    @staticmethod
+    def _local_social_analysis(data: list) -> dict:
+        """Social analysis without an LLM - themes, hashtags and tone from the post text"""
+        records = [r for r in data if isinstance(r, dict)][:LOCAL_SOCIAL_RECORDS]
+        local = local_analyzer.analyze(json.dumps(records, ensure_ascii=False, default=str))
+        return {
+            "insights": local["insights"],
+            "trending_topics": [],
+            "recommendations": [],
+            "hashtag_strategy": "",
+            "posting_recommendations": "",
+            "engine": local["engine"]
+        }
     
     def analyze_social_data(self, data: list, source_type: str = "social_media") -> dict:
         """Analyze social media data (legacy method for backwards compatibility)"""
         
         if not self.anthropic_client and not self.openai_client:
-            return {
-                "insights": ["AI services unavailable"],
-                "trending_topics": [],
-                "recommendations": ["Configure API keys"],
-                "hashtag_strategy": "N/A"
-            }
+            return self._local_social_analysis(data)
         
         try:
-            sample_data = data[:100] if len(data) > 100 else data
+            # Statistics over every record + a token-budgeted stratified sample
+            digest = build_social_digest(data)
             
             system_prompt = "You are a streetwear marketing analyst for Crooks & Castles. Always respond with valid JSON only."
-            user_prompt = f"""Analyze this {source_type} data and provide insights as JSON:
+            user_prompt = f"""Analyze this {source_type} data and provide insights as JSON.
 
-Data sample (first 10 records):
-{json.dumps(sample_data[:10], indent=2)}
+The statistics cover all {digest.total_records} records; the sample lines are compact JSON, one record per line.
 
-Total records analyzed: {len(sample_data)}
+{digest.text}
 
 Respond ONLY with valid JSON containing:
 - insights: array of 3-5 key findings
@@ -238,42 +909,34 @@ Respond ONLY with valid JSON containing:
 - hashtag_strategy: string with hashtag recommendations
 - posting_recommendations: string with best posting times/strategies"""
             
-            result = self._call_ai(system_prompt, user_prompt, max_tokens=2000)
-            
-            # Clean markdown code blocks if present
-            if result.startswith("```"):
-                if "```json" in result:
-                    result = result.split("```json")[1]
-                else:
-                    result = result.split("```")[1]
-                result = result.rsplit("```")[0].strip()
-            
-            parsed = json.loads(result)
-            print(f"[AIProcessor] Successfully analyzed {len(sample_data)} records")
+            parsed = self._cached_call(
+                PROMPT_VERSIONS["social"], system_prompt, user_prompt,
+                max_tokens=2000, schema=SocialOutput
+            )
+            print(f"[AIProcessor] Successfully analyzed {digest.total_records} records "
+                  f"({digest.sampled_records} sampled, ~{digest.estimated_tokens} prompt tokens)")
             return parsed
                 
-        except json.JSONDecodeError as e:
-            print(f"[AIProcessor] JSON parse error: {e}")
-            return {
-                "insights": ["AI returned invalid JSON format"],
-                "trending_topics": [],
-                "recommendations": ["Try uploading data again"],
-                "hashtag_strategy": "N/A"
-            }
         except Exception as e:
-            print(f"[AIProcessor] Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "insights": [f"AI analysis failed: {str(e)}"],
-                "trending_topics": [],
-                "recommendations": ["Check API configuration"],
-                "hashtag_strategy": "N/A"
-            }
+            print(f"[AIProcessor] Error analyzing social data: {e} - using local analysis")
+            return self._local_social_analysis(data)
+
+
+_shared_processor: Optional[AIProcessor] = None
+_shared_lock = threading.Lock()
+
+
+def get_ai_processor() -> AIProcessor:
+    """Process-wide AIProcessor (one set of pooled clients per worker process)"""
+    global _shared_processor
+    if _shared_processor is None:
+        with _shared_lock:
+            if _shared_processor is None:
+                _shared_processor = AIProcessor()
+    return _shared_processor
 
 
 # Legacy standalone function for backwards compatibility
 def analyze_social_data(data: list, source_type: str = "social_media") -> dict:
-    """Legacy function - creates processor instance and calls method"""
-    processor = AIProcessor()
-    return processor.analyze_social_data(data, source_type)
+    """Legacy function - uses the shared processor instance"""
+    return get_ai_processor().analyze_social_data(data, source_type)
@@ -1,7 +1,13 @@
 # backend/file_parser.py
-import pandas as pd
+from __future__ import annotations
+
 from pathlib import Path
 import json
+from typing import TYPE_CHECKING
+from backend.services.upload_classifier import source_type_from_keys
+
+if TYPE_CHECKING:
+    import pandas as pd  # Imported on first CSV/Excel parse - keeps it off the startup path
 
 def parse_uploaded_file(file_path: str) -> tuple[list, str]:
     """
@@ -13,6 +19,7 @@ def parse_uploaded_file(file_path: str) -> tuple[list, str]:
     
     try:
         if ext == '.csv':
+            import pandas as pd
             df = pd.read_csv(file_path)
             return df.to_dict('records'), detect_source_type(df)
         
@@ -55,6 +62,7 @@ def parse_uploaded_file(file_path: str) -> tuple[list, str]:
                     return [data], "unknown"
         
         elif ext in ['.xlsx', '.xls']:
+            import pandas as pd
             df = pd.read_excel(file_path)
             return df.to_dict('records'), detect_source_type(df)
         
@@ -89,16 +97,8 @@ def detect_source_type_from_json(data: list) -> str:
         return "unknown"
     
     first_item = data[0]
-    keys = [k.lower() for k in first_item.keys()]
-    
-    # Check for common Apify/social media fields
-    if any('instagram' in k for k in keys):
-        return "instagram"
-    elif any('tiktok' in k for k in keys):
-        return "tiktok"
-    elif any('hashtag' in k or 'tag' in k for k in keys):
-        return "hashtag"
-    elif any(k in ['likes', 'comments', 'shares', 'engagement'] for k in keys):
-        return "social_media"
-    else:
+    if not isinstance(first_item, dict):
         return "social_media"
+    
+    # Keys of the first record go through the shared keyword matcher
+    return source_type_from_keys(first_item.keys())
@@ -1,18 +1,41 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from .services import startup_timing  # First, so the boot clock covers every import below
+
+with startup_timing.timed("fastapi"):
+    from fastapi import FastAPI, Depends
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, PlainTextResponse
 import os
 from dotenv import load_dotenv
-from .routers import intelligence, campaigns, deliverables, executive, shopify, competitive, summary, migrations
-from .database import engine, get_db
-from .models import Base
+with startup_timing.timed("database + models"):
+    from .database import engine, get_db
+    from .models import Base, AIJob, AICacheEntry, IntelligenceLSHBand, AICallRollup
+
+# Timed one by one; shared dependencies are charged to the first router that imports them
+with startup_timing.timed("routers.intelligence"):
+    from .routers import intelligence
+with startup_timing.timed("routers.campaigns"):
+    from .routers import campaigns
+with startup_timing.timed("routers.deliverables"):
+    from .routers import deliverables
+with startup_timing.timed("routers.executive"):
+    from .routers import executive
+with startup_timing.timed("routers.shopify"):
+    from .routers import shopify
+with startup_timing.timed("routers.competitive"):
+    from .routers import competitive
+with startup_timing.timed("routers.summary"):
+    from .routers import summary
+with startup_timing.timed("routers.migrations"):
+    from .routers import migrations
+from .services import ai_jobs, ai_telemetry, content_store
 
 load_dotenv()
 
 app = FastAPI(
     title="Crooks Command Center API",
     description="Intelligence-driven brand management system",
-    version="2.0.0"
+    version="2.0.0",
+    dependencies=[Depends(ai_telemetry.tag_caller)]  # Attribute AI calls to the route that made them
 )
 
 # CORS Configuration
@@ -56,6 +79,26 @@ async def startup_event():
     except Exception as e:
         print(f"[Database] ❌ Connection failed: {e}")
         raise
+    
+    # Tables added after the initial migration (no-op when they already exist)
+    Base.metadata.create_all(bind=engine, tables=[
+        AIJob.__table__,
+        AICacheEntry.__table__,
+        IntelligenceLSHBand.__table__,
+        AICallRollup.__table__,
+    ])
+    ai_jobs.ensure_schema()
+    content_store.check_persistence()
+    
+    ai_telemetry.start_rollup_writer()
+    
+    # Pick up AI analysis jobs interrupted by the last restart
+    try:
+        ai_jobs.resume_pending_jobs()
+    except Exception as e:
+        print(f"[AIJobs] ⚠️ Could not resume pending jobs: {e}")
+    
+    startup_timing.report()
 
 @app.get("/")
 def root():
@@ -75,6 +118,11 @@ def health_check():
         "database": "connected"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """LLM call telemetry in the Prometheus text format"""
+    return PlainTextResponse(ai_telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api")
 def api_root():
     """API root with available endpoints"""
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -56,7 +56,9 @@ class Intelligence(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
-    content = Column(Text, nullable=False)
+    content = Column(Text, nullable=False)  # Preview snippet when content_ref is set
+    content_ref = Column(String(64), index=True)  # sha256 of the compressed blob in the content store
+    content_length = Column(BigInteger)  # Full content size in bytes
     source_type = Column(String)  # pdf, txt, csv, url, manual
     category = Column(String, index=True)  # market_research, competitor_analysis, customer_feedback, etc.
     tags = Column(JSON)  # ['streetwear', 'pricing', 'competitor']
@@ -66,9 +68,31 @@ class Intelligence(Base):
     priority = Column(String, default="medium")  # high, medium, low
     status = Column(String, default="new")  # new, reviewed, archived
     file_url = Column(String)  # For uploaded files
+    file_size_bytes = Column(BigInteger)  # Recorded at upload so listings never stat the disk
+    minhash = Column(JSON)  # MinHash signature (near-duplicate detection)
+    duplicate_of_id = Column(Integer, index=True)  # Entry whose analysis was reused
+    ai_prompt_version = Column(String)  # Prompt version behind ai_summary/ai_insights
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        Index("ix_intelligence_created_at_id", "created_at", "id"),  # Keyset pagination
+    )
+
+
+class IntelligenceLSHBand(Base):
+    """LSH band buckets of Intelligence MinHash signatures"""
+    __tablename__ = "intelligence_lsh"
+
+    id = Column(Integer, primary_key=True, index=True)
+    intelligence_id = Column(Integer, nullable=False, index=True)
+    band = Column(Integer, nullable=False)
+    bucket = Column(String(16), nullable=False)
+
+    __table_args__ = (
+        Index("ix_intelligence_lsh_band_bucket", "band", "bucket"),
+    )
+
 
 class ShopifyMetric(Base):
     """Shopify analytics metrics"""
@@ -157,12 +181,16 @@ class CompetitorIntel(Base):
     competitor_name = Column(String, nullable=False, index=True)
     category = Column(String)  # pricing, product, marketing, social
     data_type = Column(String)  # price_point, campaign, product_launch, social_post
-    content = Column(Text)
+    content = Column(Text)  # Preview snippet when content_ref is set
+    content_ref = Column(String(64), index=True)  # sha256 of the compressed blob in the content store
+    content_length = Column(BigInteger)  # Full content size in bytes
+    record_count = Column(Integer)  # Parsed records (posts) in the upload
     source_url = Column(String)
     sentiment = Column(String)  # threat, opportunity, neutral
     ai_analysis = Column(Text)  # Claude analysis
     priority = Column(String, default="medium")
     tags = Column(JSON)
+    ai_prompt_version = Column(String)  # Prompt version behind ai_analysis
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -196,3 +224,56 @@ class Alert(Base):
     is_dismissed = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     read_at = Column(DateTime(timezone=True))
+
+
+class AIJob(Base):
+    """Background AI analysis jobs (persisted so they survive restarts)"""
+    __tablename__ = "ai_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String, nullable=False, index=True)  # intelligence_analysis, ...
+    entity_type = Column(String)  # intelligence, competitor_intel
+    entity_id = Column(Integer, index=True)
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    payload = Column(JSON)  # Extra arguments for the job handler
+    result = Column(JSON)  # Handler output (summary, insights, ...)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    not_before = Column(DateTime(timezone=True))  # Retry backoff: not claimed before this time
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+
+class AICacheEntry(Base):
+    """Cached LLM responses keyed by sha256(prompt version + model + prompt)"""
+    __tablename__ = "ai_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    prompt_version = Column(String, index=True)  # e.g. summary-v1
+    model = Column(String)  # Provider/model chain the response was produced with
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_accessed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    expires_at = Column(DateTime(timezone=True), index=True)
+
+
+class AICallRollup(Base):
+    """Periodic totals of LLM provider calls (written when AI_TELEMETRY_ROLLUP_SECONDS > 0)"""
+    __tablename__ = "ai_call_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    period_seconds = Column(Integer, nullable=False)
+    provider = Column(String, index=True)  # anthropic, openai
+    model = Column(String)
+    caller = Column(String, index=True)  # "POST /api/intelligence/upload", "job:intelligence_analysis", ...
+    operation = Column(String)  # analysis, summary, chunk, ...
+    calls = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    input_tokens = Column(BigInteger, default=0)
+    output_tokens = Column(BigInteger, default=0)
+    cost_usd = Column(Float, default=0.0)
+    total_seconds = Column(Float, default=0.0)
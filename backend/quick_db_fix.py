@@ -79,4 +79,62 @@ try:
 except Exception as e:
     print(f"❌ Database fix failed: {e}")
     
+# Columns/indexes added to the intelligence tables after the initial migration
+print("🔧 Checking intelligence tables...")
+
+try:
+    with engine.connect() as conn:
+        intelligence_columns = [
+            ("file_size_bytes", "BIGINT"),
+            ("content_ref", "VARCHAR(64)"),
+            ("content_length", "BIGINT"),
+            ("minhash", "JSONB"),
+            ("duplicate_of_id", "INTEGER"),
+            ("ai_prompt_version", "VARCHAR"),
+        ]
+        competitor_columns = [
+            ("content_ref", "VARCHAR(64)"),
+            ("content_length", "BIGINT"),
+            ("record_count", "INTEGER"),
+            ("ai_prompt_version", "VARCHAR"),
+        ]
+        
+        for col_name, col_def in intelligence_columns:
+            conn.execute(text(f"ALTER TABLE intelligence ADD COLUMN IF NOT EXISTS {col_name} {col_def}"))
+        
+        for col_name, col_def in competitor_columns:
+            conn.execute(text(f"ALTER TABLE competitor_intel ADD COLUMN IF NOT EXISTS {col_name} {col_def}"))
+        
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_intelligence_created_at_id ON intelligence(created_at, id)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_intelligence_content_ref ON intelligence(content_ref)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_intelligence_duplicate_of_id ON intelligence(duplicate_of_id)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_competitor_intel_content_ref ON competitor_intel(content_ref)"
+        ))
+        conn.commit()
+        
+        # Backfill file sizes for rows uploaded before file_size_bytes existed
+        rows = conn.execute(text(
+            "SELECT id, file_url FROM intelligence WHERE file_size_bytes IS NULL AND file_url IS NOT NULL"
+        )).fetchall()
+        
+        for row_id, file_url in rows:
+            size = os.path.getsize(file_url) if os.path.exists(file_url) else 0
+            conn.execute(
+                text("UPDATE intelligence SET file_size_bytes = :size WHERE id = :id"),
+                {"size": size, "id": row_id}
+            )
+        conn.commit()
+        
+        print(f"✅ Intelligence table up to date ({len(rows)} file sizes backfilled)")
+        
+except Exception as e:
+    print(f"❌ Intelligence table fix failed: {e}")
+    
 print("🔧 Quick database fix completed")
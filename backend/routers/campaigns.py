@@ -1,23 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-import os
-from openai import OpenAI
+from typing import Optional, AsyncIterator
+import asyncio
+import json
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models import Campaign
+from ..ai_processor import get_ai_processor
+from ..services import ai_cache
+from ..services.single_flight import llm_calls
 
 router = APIRouter()
 
-# Initialize OpenAI client
-try:
-    openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared AI processor - suggestions use its pooled async OpenAI client
+ai_processor = get_ai_processor()
+SUGGESTIONS_MODEL = "gpt-4"
+
+if ai_processor.openai_key:  # Key check only - the client itself is built on first use
     print("[Campaigns] ✅ OpenAI available for content suggestions")
-except Exception as e:
-    openai_client = None
-    print(f"[Campaigns] ⚠️ OpenAI not available: {e}")
+else:
+    print("[Campaigns] ⚠️ OpenAI not available: OPENAI_API_KEY not configured")
 
 
 @router.get("/")
@@ -80,7 +85,7 @@ async def create_campaign(
     
     # Generate AI suggestions
     ai_suggestions = None
-    if openai_client:
+    if ai_processor.openai_client:
         try:
             ai_suggestions = await generate_campaign_suggestions(
                 name, description, target_audience, channels
@@ -420,7 +425,7 @@ async def regenerate_suggestions(
 ):
     """Regenerate AI suggestions for a campaign"""
     
-    if not openai_client:
+    if not ai_processor.openai_client:
         raise HTTPException(503, "AI service not available")
     
     campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
@@ -451,13 +456,102 @@ async def regenerate_suggestions(
         raise HTTPException(500, f"Failed to generate suggestions: {str(e)}")
 
 
-async def generate_campaign_suggestions(
+@router.post("/{campaign_id}/generate-suggestions/stream")
+async def stream_suggestions(
+    campaign_id: int,
+    db: Session = Depends(get_db)
+):
+    """Regenerate AI suggestions, streamed as Server-Sent Events.
+    
+    Events: ``start``, then one ``token`` per text delta, then ``done`` with
+    the saved ``ai_suggestions`` (or ``error``). The text is persisted to the
+    campaign once the stream completes.
+    """
+    
+    if not ai_processor.openai_client:
+        raise HTTPException(503, "AI service not available")
+    
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+    
+    system_prompt, prompt = _suggestion_prompts(
+        campaign.name,
+        campaign.description,
+        campaign.target_audience,
+        campaign.channels
+    )
+    
+    return StreamingResponse(
+        _suggestion_events(campaign_id, system_prompt, prompt),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Keep proxies from buffering the stream
+        }
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _suggestion_events(campaign_id: int, system_prompt: str, prompt: str) -> AsyncIterator[str]:
+    yield _sse("start", {"campaign_id": campaign_id, "model": SUGGESTIONS_MODEL})
+    
+    parts = []
+    try:
+        async for token in ai_processor.astream_openai(
+            system_prompt,
+            prompt,
+            max_tokens=1500,
+            model=SUGGESTIONS_MODEL,
+            temperature=0.75
+        ):
+            parts.append(token)
+            yield _sse("token", {"text": token})
+    except Exception as e:
+        print(f"[Campaigns] ❌ Suggestion stream failed: {e}")
+        yield _sse("error", {"detail": f"Failed to generate suggestions: {str(e)}"})
+        return
+    
+    ai_suggestions = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "suggestions": "".join(parts).strip(),
+        "model": SUGGESTIONS_MODEL
+    }
+    
+    try:
+        await asyncio.to_thread(_save_suggestions, campaign_id, ai_suggestions)
+    except Exception as e:
+        print(f"[Campaigns] ❌ Failed to save streamed suggestions: {e}")
+        yield _sse("error", {"detail": f"Failed to save suggestions: {str(e)}"})
+        return
+    
+    yield _sse("done", {"success": True, "ai_suggestions": ai_suggestions})
+
+
+def _save_suggestions(campaign_id: int, ai_suggestions: dict):
+    # Own session: the request's session is closed before a streamed body finishes
+    db = SessionLocal()
+    try:
+        campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+        if campaign:
+            campaign.ai_suggestions = ai_suggestions
+            campaign.updated_at = datetime.now(timezone.utc)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _suggestion_prompts(
     name: str,
     description: str,
     target_audience: Optional[str],
     channels: Optional[list]
-):
-    """Generate AI-powered campaign suggestions using OpenAI"""
+) -> tuple:
+    """System and user prompts for campaign suggestions"""
     
     prompt = f"""You are a streetwear and hip-hop culture marketing expert for Crooks & Castles, a heritage streetwear brand born in 2002.
 
@@ -516,20 +610,33 @@ Generate campaign strategy that CONVERTS these customers:
 
 Keep it 100. Real street talk. No corporate BS. This is for ONE person (the founder) to execute with their team. Make it ACTIONABLE and INSPIRED."""
 
-    response = openai_client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a streetwear marketing expert who deeply understands hip-hop culture, sneaker culture, and authentic street codes. You speak the language of the streets while driving business results. You inspire solo founders and small teams to create legendary campaigns."},
-            {"role": "user", "content": prompt}
-        ],
+    system_prompt = "You are a streetwear marketing expert who deeply understands hip-hop culture, sneaker culture, and authentic street codes. You speak the language of the streets while driving business results. You inspire solo founders and small teams to create legendary campaigns."
+    
+    return system_prompt, prompt
+
+
+async def generate_campaign_suggestions(
+    name: str,
+    description: str,
+    target_audience: Optional[str],
+    channels: Optional[list]
+):
+    """Generate AI-powered campaign suggestions using OpenAI"""
+    
+    system_prompt, prompt = _suggestion_prompts(name, description, target_audience, channels)
+    
+    # Several people opening the same campaign share one in-flight generation
+    flight_key = ai_cache.make_key("campaign-suggestions", SUGGESTIONS_MODEL, system_prompt, prompt)
+    suggestions_text = await llm_calls.ado(flight_key, lambda: ai_processor.acall_openai(
+        system_prompt,
+        prompt,
         max_tokens=1500,
+        model=SUGGESTIONS_MODEL,
         temperature=0.75
-    )
-    
-    suggestions_text = response.choices[0].message.content
+    ))
     
     return {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "suggestions": suggestions_text,
-        "model": "gpt-4"
+        "model": SUGGESTIONS_MODEL
     }
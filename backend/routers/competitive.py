@@ -1,40 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 import json
 import csv
-from io import StringIO
 import os
 import re
 from backend.database import get_db
 from backend.models import CompetitorIntel
-from backend.ai_processor import AIProcessor
+from backend.ai_processor import get_ai_processor
+from backend.services.uploads import spool_upload
+from backend.services import content_store
 
 router = APIRouter()
-ai_processor = AIProcessor()
+ai_processor = get_ai_processor()
 
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads", "competitive")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def parse_jsonl(content: str) -> list:
-    """Parse JSONL format (one JSON object per line)"""
-    lines = content.strip().split('\n')
-    data = []
-    for line in lines:
-        if line.strip():
-            try:
-                data.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-    return data
-
-def parse_csv(content: str) -> list:
-    """Parse CSV format"""
-    reader = csv.DictReader(StringIO(content))
-    return list(reader)
-
 def extract_brand_from_url(url: str) -> str:
     """Extract brand name from Instagram URL"""
     if not url:
@@ -142,34 +127,25 @@ async def upload_competitive_intel(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
     
-    # Read file content
-    content = await file.read()
-    raw_content = content.decode('utf-8')
+    if not file.filename.endswith(('.jsonl', '.json', '.csv')):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use .jsonl, .json, or .csv")
     
-    # Save file
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Stream file to disk (hashes and size-checks on the way)
+    upload = await spool_upload(file, UPLOAD_DIR)
+    file_path = upload.path
     
-    # Parse based on file type
-    parsed_data = None
-    if file.filename.endswith('.jsonl'):
-        parsed_data = parse_jsonl(raw_content)
-    elif file.filename.endswith('.json'):
-        try:
-            parsed_data = json.loads(raw_content)
-            if not isinstance(parsed_data, list):
-                parsed_data = [parsed_data]
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=400, detail="Invalid JSON format")
-    elif file.filename.endswith('.csv'):
-        parsed_data = parse_csv(raw_content)
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file format. Use .jsonl, .json, or .csv")
+    # Stream through the records once: the first few name the competitor, the rest are only counted
+    try:
+        first_records, post_count = await run_in_threadpool(upload.sample_records, 5)
+        raw_content = upload.read_prefix()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except (json.JSONDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="Invalid JSON format" if upload.extension == '.json' else "Invalid CSV format")
     
     # Determine competitor name
     if not competitor_name:
-        competitor_name = extract_competitor_name_from_data(parsed_data, file.filename)
+        competitor_name = extract_competitor_name_from_data(first_records, file.filename)
     
     # Validate that it's not our own brand
     if is_own_brand(competitor_name):
@@ -202,25 +178,30 @@ async def upload_competitive_intel(
         CompetitorIntel.data_type == source
     ).first()
     
-    # Count posts for summary
-    post_count = len(parsed_data) if parsed_data else 0
-    
-    # Generate AI summary and insights
-    summary = ai_processor.generate_summary(raw_content[:5000])  # Limit to first 5000 chars for AI
-    insights = ai_processor.extract_insights(raw_content[:5000])
+    # Generate AI summary and insights in one call
+    analysis = await ai_processor.aanalyze(raw_content, max_chars=5000)  # Limit to first 5000 chars for AI
+    summary = analysis["summary"]
+    insights = analysis["insights"]
     
     # Add post count to summary
     summary_with_count = f"{post_count} posts analyzed. {summary}"
     
     if existing:
         # Update existing entry
-        existing.content = raw_content
+        previous_ref = existing.content_ref
+        await run_in_threadpool(content_store.store_file, existing, upload.path, raw_content, upload.sha256)
+        existing.record_count = post_count
         existing.ai_analysis = summary_with_count
         existing.tags = insights
+        existing.priority = analysis["priority"]
+        existing.ai_prompt_version = analysis.get("prompt_version")
         existing.updated_at = datetime.now(timezone.utc)
         db.commit()
         db.refresh(existing)
         
+        if previous_ref != existing.content_ref:
+            content_store.delete_if_unreferenced(db, previous_ref)
+        
         return {
             "success": True,
             "message": f"Updated competitive intelligence for {competitor_name}",
@@ -237,13 +218,15 @@ async def upload_competitive_intel(
             competitor_name=competitor_name,
             category=category,
             data_type=source,
-            content=raw_content,
             ai_analysis=summary_with_count,
             tags=insights,
             source_url=file_path,
-            priority='medium',
+            record_count=post_count,
+            priority=analysis["priority"],
+            ai_prompt_version=analysis.get("prompt_version"),
             sentiment='neutral'
         )
+        await run_in_threadpool(content_store.store_file, intel_entry, upload.path, raw_content, upload.sha256)
         
         db.add(intel_entry)
         db.commit()
@@ -293,19 +276,21 @@ def add_competitive_intel(
             detail=f"Cannot add '{competitor_name}' as a competitor - this is your own brand."
         )
     
-    summary = ai_processor.generate_summary(content)
-    insights = ai_processor.extract_insights(content)
+    analysis = ai_processor.analyze(content)
+    summary = analysis["summary"]
+    insights = analysis["insights"]
     
     intel = CompetitorIntel(
         competitor_name=competitor_name,
         category=category,
         data_type=source,
-        content=content,
         ai_analysis=summary,
         tags=insights,
-        priority='medium',
+        priority=analysis["priority"],
+        ai_prompt_version=analysis.get("prompt_version"),
         sentiment='neutral'
     )
+    content_store.store_content(intel, content)
     
     db.add(intel)
     db.commit()
@@ -373,10 +358,12 @@ def get_competitive_data(
     
     intel = query.order_by(desc(CompetitorIntel.created_at)).limit(limit).all()
     
-    # Parse post count from content
-    def get_post_count(content_str):
+    # Parse post count from content (rows stored before record_count existed)
+    def get_post_count(entry):
+        if entry.record_count is not None:
+            return entry.record_count
         try:
-            data = json.loads(content_str)
+            data = json.loads(entry.content)
             if isinstance(data, list):
                 return len(data)
             return 1
@@ -390,7 +377,7 @@ def get_competitive_data(
                 "competitor": i.competitor_name,
                 "category": i.category,
                 "source": i.data_type,
-                "post_count": get_post_count(i.content),
+                "post_count": get_post_count(i),
                 "content": i.content[:500] if i.content else "",
                 "summary": i.ai_analysis,
                 "insights": i.tags if isinstance(i.tags, (list, dict)) else (json.loads(i.tags) if i.tags else []),
@@ -463,12 +450,15 @@ def get_competitive_dashboard(
     total_posts = 0
     
     for entry in intel_entries:
-        # Parse post count from content
-        try:
-            data = json.loads(entry.content)
-            post_count = len(data) if isinstance(data, list) else 1
-        except:
-            post_count = 1
+        # Parse post count from content (rows stored before record_count existed)
+        if entry.record_count is not None:
+            post_count = entry.record_count
+        else:
+            try:
+                data = json.loads(entry.content)
+                post_count = len(data) if isinstance(data, list) else 1
+            except:
+                post_count = 1
         
         if entry.competitor_name not in competitor_posts:
             competitor_posts[entry.competitor_name] = {
@@ -522,7 +512,7 @@ def get_intel_detail(intel_id: int, db: Session = Depends(get_db)):
         "competitor_name": intel.competitor_name,
         "category": intel.category,
         "source": intel.data_type,
-        "content": intel.content,
+        "content": content_store.load_content(intel),
         "summary": intel.ai_analysis,
         "key_insights": intel.tags if isinstance(intel.tags, (list, dict)) else (json.loads(intel.tags) if intel.tags else []),
         "priority": intel.priority,
@@ -543,8 +533,10 @@ def delete_competitive_intel(intel_id: int, db: Session = Depends(get_db)):
     if intel.source_url and os.path.exists(intel.source_url):
         os.remove(intel.source_url)
     
+    content_ref = intel.content_ref
     db.delete(intel)
     db.commit()
+    content_store.delete_if_unreferenced(db, content_ref)
     
     return {"success": True, "message": "Competitive intel entry deleted"}
 
@@ -617,6 +609,7 @@ def cleanup_bad_competitor_entries(db: Session = Depends(get_db)):
         all_entries = db.query(CompetitorIntel).all()
         
         deleted_entries = []
+        deleted_refs = set()
         deleted_count = 0
         
         # Check each entry for bad patterns
@@ -656,11 +649,17 @@ def cleanup_bad_competitor_entries(db: Session = Depends(get_db)):
                     except:
                         pass
                 
+                if entry.content_ref:
+                    deleted_refs.add(entry.content_ref)
+                
                 db.delete(entry)
                 deleted_count += 1
         
         db.commit()
         
+        for content_ref in deleted_refs:
+            content_store.delete_if_unreferenced(db, content_ref)
+        
         # Get remaining competitors
         remaining = db.query(CompetitorIntel.competitor_name).distinct().all()
         remaining_names = [r.competitor_name for r in remaining]
@@ -1,82 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, or_, and_
 from datetime import datetime, timezone
 from typing import Optional
 import os
 import json
-import PyPDF2
+import base64
 from backend.database import get_db
-from backend.models import Intelligence, CompetitorIntel
-from backend.ai_processor import AIProcessor
+from backend.models import Intelligence, CompetitorIntel, AIJob
+from backend.ai_processor import get_ai_processor
+from backend.services import (
+    ai_jobs, ai_cache, ai_telemetry, content_store, local_analyzer, near_duplicates, structured_output
+)
+from backend.services.uploads import spool_upload
+from backend.services.pdf_extract import extract_pdf_text, PDF_PREVIEW_CHARS
+from backend.services.upload_classifier import classify_upload
+from backend.services.single_flight import llm_calls
 
 router = APIRouter()
-ai_processor = AIProcessor()
+ai_processor = get_ai_processor()
+
+ANALYSIS_JOB = "intelligence_analysis"
+PDF_EXTRACT_JOB = "intelligence_pdf_extract"
 
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads", "intelligence")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def detect_competitor_data(content: str, filename: str) -> Optional[dict]:
-    """Detect if content contains competitor intelligence data"""
-    content_lower = content.lower()
-    
-    # Check for Instagram scrape patterns
-    if any(term in content_lower for term in ['instagram', 'followers', 'engagement_rate', 'post_content']):
-        return {
-            'source': 'instagram',
-            'category': 'social_media'
-        }
-    
-    # Check for product/pricing data
-    if any(term in content_lower for term in ['product', 'price', 'sku', 'inventory']):
-        return {
-            'source': 'product_data',
-            'category': 'product'
-        }
-    
-    # Check for marketing data
-    if any(term in content_lower for term in ['campaign', 'ad_spend', 'cpc', 'ctr']):
-        return {
-            'source': 'marketing',
-            'category': 'marketing'
-        }
-    
-    return None
-
-def extract_competitor_name(content: str, filename: str) -> str:
-    """Extract competitor name from content or filename"""
-    # Try to parse as JSON first
-    try:
-        data = json.loads(content)
-        if isinstance(data, dict):
-            # Look for common competitor name fields
-            for field in ['competitor', 'brand', 'account_name', 'username', 'company']:
-                if field in data and data[field]:
-                    return str(data[field])
-            
-            # For Instagram scrapes, check profile info
-            if 'profile' in data and isinstance(data['profile'], dict):
-                if 'username' in data['profile']:
-                    return data['profile']['username']
-        
-        # If it's a list, check first item
-        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-            for field in ['competitor', 'brand', 'account_name', 'username']:
-                if field in data[0] and data[0][field]:
-                    return str(data[0][field])
-    except json.JSONDecodeError:
-        pass
-    
-    # Extract from filename as fallback
-    name = filename.replace('.jsonl', '').replace('.json', '').replace('.txt', '')
-    name = name.replace('_', ' ').replace('-', ' ')
-    
-    # Remove common prefixes
-    for prefix in ['instagram', 'scrape', 'data', 'competitor', 'intel']:
-        name = name.replace(prefix, '').strip()
-    
-    return name.title() if name else 'Unknown Competitor'
-
 @router.post("/upload")
 async def upload_intelligence(
     file: UploadFile = File(...),
@@ -106,102 +56,352 @@ async def upload_intelligence(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
     
-    # Save file
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Stream file to disk (hashes and size-checks on the way)
+    upload = await spool_upload(file, UPLOAD_DIR)
+    file_path = upload.path
     
-    # Read content for processing
+    # Read content for processing - PDFs only read enough pages for analysis here,
+    # the full text is extracted by a background job; text files only their prefix,
+    # the content store compresses the full file from disk
+    pdf_complete = True
+    text_on_disk = False
     try:
-        if file.filename.endswith('.pdf'):
-            with open(file_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                raw_content = ""
-                for page in pdf_reader.pages:
-                    raw_content += page.extract_text()
+        if upload.extension == '.pdf':
+            pdf = await run_in_threadpool(extract_pdf_text, upload.path, max_chars=PDF_PREVIEW_CHARS)
+            raw_content = pdf.text
+            pdf_complete = pdf.complete
         else:
-            raw_content = content.decode('utf-8')
+            raw_content = upload.read_prefix()
+            text_on_disk = True
     except Exception as e:
         raw_content = ""
     
-    # Generate AI summary
-    summary = ai_processor.generate_summary(raw_content)
-    insights = ai_processor.extract_insights(raw_content)
+    signature = await run_in_threadpool(near_duplicates.minhash_signature, raw_content)
     
-    # Create Intelligence entry
+    # Create Intelligence entry - AI analysis runs in the background job queue
     intel_entry = Intelligence(
-        title=file.filename,
+        title=upload.filename,
         source_type=source,
         category=category,
-        content=raw_content,
-        ai_summary=summary,
-        ai_insights=insights,  # PostgreSQL JSONB handles this automatically
         file_url=file_path,
+        file_size_bytes=upload.size,
+        minhash=signature,
         tags=[description] if description else [],
-        status='new'
+        status='analyzing'
     )
     
-    db.add(intel_entry)
-    db.flush()  # Get the ID without committing yet
+    await run_in_threadpool(_store_upload_content, intel_entry, upload, raw_content, text_on_disk)
     
     db.add(intel_entry)
     db.flush()  # Get the ID without committing yet
-    
-    # Auto-populate Competitive Intelligence if detected
-    competitor_info = detect_competitor_data(raw_content, file.filename)
-    if competitor_info:
-        competitor_name = extract_competitor_name(raw_content, file.filename)
-        
+    near_duplicates.index_document(db, intel_entry.id, signature)
+    
+    # Auto-populate Competitive Intelligence if detected (analysis filled in by the job)
+    competitor_entry = None
+    classification = classify_upload(raw_content, upload.filename)
+    if classification.is_competitor_data:
+        # Counted from the file on disk; the stored content may be just a preview
+        record_count = await run_in_threadpool(upload.count_records)
         competitor_entry = CompetitorIntel(
-            competitor_name=competitor_name,
-            category=competitor_info['category'],
-            data_type=competitor_info['source'],
-            content=raw_content,
-            ai_analysis=summary,
-            tags=insights,  # PostgreSQL JSONB handles this automatically
+            competitor_name=classification.competitor_name,
+            category=classification.category,
+            data_type=classification.source,
             source_url=file_path,
+            record_count=record_count if record_count is not None else 1,
             priority='medium',
             sentiment='neutral'
         )
+        await run_in_threadpool(_store_upload_content, competitor_entry, upload, raw_content, text_on_disk)
         
         db.add(competitor_entry)
+        db.flush()
+    
+    competitor_id = competitor_entry.id if competitor_entry else None
+    
+    # Re-uploads of an already analyzed report reuse its analysis instead of calling the LLM
+    duplicate_of = _reuse_duplicate_analysis(db, intel_entry, competitor_id) if pdf_complete else None
+    
+    job = None
+    if duplicate_of is None:
+        # Instant local draft; the LLM job replaces it (status stays 'analyzing' until then)
+        draft = await run_in_threadpool(local_analyzer.analyze, raw_content)
+        _apply_analysis(db, intel_entry, draft, competitor_id, status='analyzing')
+        
+        # Partially extracted PDFs finish extraction first; that job queues the analysis
+        job = ai_jobs.enqueue(
+            db,
+            ANALYSIS_JOB if pdf_complete else PDF_EXTRACT_JOB,
+            entity_type="intelligence",
+            entity_id=intel_entry.id,
+            payload={"competitor_intel_id": competitor_id}
+        )
     
     db.commit()
     db.refresh(intel_entry)
-    
-    # Get file size
-    file_size_bytes = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-    file_size_mb = round(file_size_bytes / (1024 * 1024), 2)
+    if job:
+        ai_jobs.dispatch()
     
     return {
         "success": True,
-        "message": "Intelligence uploaded successfully",
+        "message": (
+            "Intelligence uploaded successfully - AI analysis queued" if job
+            else f"Intelligence uploaded successfully - reused analysis of near-duplicate #{duplicate_of}"
+        ),
         "id": intel_entry.id,
-        "filename": file.filename,
-        "size_mb": file_size_mb,
+        "filename": upload.filename,
+        "size_mb": upload.size_mb,
+        "sha256": upload.sha256,
         "source": source,
         "status": intel_entry.status,
-        "summary": summary,
-        "insights": insights,
-        "ai_analysis_complete": bool(summary and insights),
-        "competitor_auto_populated": competitor_info is not None
+        "job_id": job.id if job else None,
+        "job_status_url": f"/api/intelligence/jobs/{job.id}" if job else None,
+        "duplicate_of": duplicate_of,
+        "summary": intel_entry.ai_summary,
+        "insights": intel_entry.ai_insights or [],
+        "ai_analysis_complete": job is None,
+        "competitor_auto_populated": classification.is_competitor_data
+    }
+
+def _store_upload_content(row, upload, raw_content: str, from_file: bool):
+    """Store the upload on ``row``: text files compressed from disk, PDFs their extracted text"""
+    if from_file:
+        try:
+            return content_store.store_file(row, upload.path, raw_content, upload.sha256)
+        except UnicodeDecodeError:
+            raw_content = ""  # Not UTF-8 past the prefix - stored like an unreadable file
+    return content_store.store_content(row, raw_content)
+
+def _apply_analysis(
+    db: Session,
+    entry: Intelligence,
+    analysis: dict,
+    competitor_id: Optional[int],
+    status: str = 'new'
+):
+    """Write an analysis result onto the entry and its auto-populated competitor row"""
+    entry.ai_summary = analysis["summary"]
+    entry.ai_insights = analysis["insights"]
+    entry.sentiment = analysis["sentiment"]
+    entry.priority = analysis["priority"]
+    entry.ai_prompt_version = analysis.get("prompt_version")
+    entry.status = status
+    
+    if competitor_id:
+        competitor = db.query(CompetitorIntel).filter(CompetitorIntel.id == competitor_id).first()
+        if competitor:
+            competitor.ai_analysis = analysis["summary"]
+            competitor.tags = analysis["insights"]
+            competitor.priority = analysis["priority"]
+            competitor.ai_prompt_version = analysis.get("prompt_version")
+
+def _reuse_duplicate_analysis(db: Session, entry: Intelligence, competitor_id: Optional[int]) -> Optional[int]:
+    """Copy the analysis of an analyzed near-duplicate onto ``entry``; returns its id"""
+    
+    matches = near_duplicates.find_similar(
+        db,
+        entry.minhash,
+        threshold=near_duplicates.DUPLICATE_THRESHOLD,
+        limit=1,
+        exclude_id=entry.id,
+        analyzed_only=True
+    )
+    if not matches:
+        return None
+    
+    original = db.query(Intelligence).filter(Intelligence.id == matches[0][0]).first()
+    _apply_analysis(db, entry, {
+        "summary": original.ai_summary,
+        "insights": original.ai_insights or [],
+        "sentiment": original.sentiment,
+        "priority": original.priority,
+        "prompt_version": original.ai_prompt_version
+    }, competitor_id)
+    entry.duplicate_of_id = original.duplicate_of_id or original.id
+    
+    print(f"[Intelligence] ✅ Entry {entry.id} is a near-duplicate of {entry.duplicate_of_id} "
+          f"(similarity {matches[0][1]:.2f}) - analysis reused")
+    return entry.duplicate_of_id
+
+def _mark_analysis_failed(db: Session, job: AIJob, error: Exception):
+    """Flag the entry once its analysis job has exhausted its retries"""
+    entry = db.query(Intelligence).filter(Intelligence.id == job.entity_id).first()
+    if entry:
+        entry.status = 'analysis_failed'
+
+@ai_jobs.job_handler(PDF_EXTRACT_JOB, on_failure=_mark_analysis_failed)
+def run_pdf_full_extraction(db: Session, job: AIJob) -> dict:
+    """Background job: extract every page of an uploaded PDF, then queue analysis"""
+    
+    entry = db.query(Intelligence).filter(Intelligence.id == job.entity_id).first()
+    if not entry:
+        return {"skipped": "Intelligence entry no longer exists"}
+    
+    pdf = extract_pdf_text(entry.file_url)
+    preview_ref = entry.content_ref
+    content_store.store_content(entry, pdf.text)
+    
+    competitor_id = (job.payload or {}).get("competitor_intel_id")
+    if competitor_id:
+        competitor = db.query(CompetitorIntel).filter(CompetitorIntel.id == competitor_id).first()
+        if competitor:
+            content_store.store_content(competitor, pdf.text)
+    
+    # The upload only signed the preview pages; re-index on the full text
+    entry.minhash = near_duplicates.minhash_signature(pdf.text)
+    near_duplicates.index_document(db, entry.id, entry.minhash)
+    
+    # Only once committed - a rollback would point content_ref back at the preview blob
+    ai_jobs.after_commit(db, lambda: content_store.delete_if_unreferenced(db, preview_ref))
+    
+    duplicate_of = _reuse_duplicate_analysis(db, entry, competitor_id)
+    if duplicate_of is not None:
+        return {
+            "pages": pdf.page_count,
+            "characters": len(pdf.text),
+            "duplicate_of": duplicate_of
+        }
+    
+    # Picked up by this worker's drain loop once the job commits
+    analysis_job = ai_jobs.enqueue(
+        db,
+        ANALYSIS_JOB,
+        entity_type="intelligence",
+        entity_id=entry.id,
+        payload=job.payload
+    )
+    
+    return {
+        "pages": pdf.page_count,
+        "characters": len(pdf.text),
+        "analysis_job_id": analysis_job.id
     }
 
+@ai_jobs.job_handler(ANALYSIS_JOB, on_failure=_mark_analysis_failed)
+def run_intelligence_analysis(db: Session, job: AIJob) -> dict:
+    """Background job: generate AI summary and insights for an uploaded entry"""
+    
+    entry = db.query(Intelligence).filter(Intelligence.id == job.entity_id).first()
+    if not entry:
+        return {"skipped": "Intelligence entry no longer exists"}
+    
+    # Long reports are analyzed map-reduce so the whole document is covered.
+    # Provider errors propagate so the queue retries; the upload already stored the local draft.
+    analysis = ai_processor.analyze_long(content_store.load_content(entry), fallback=False)
+    _apply_analysis(db, entry, analysis, (job.payload or {}).get("competitor_intel_id"))
+    
+    return analysis
+
+@router.get("/jobs/{job_id}")
+def get_analysis_job(job_id: int, db: Session = Depends(get_db)):
+    """Poll the status of a background AI analysis job"""
+    
+    job = db.query(AIJob).filter(AIJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    
+    response = ai_jobs.job_to_dict(job)
+    
+    if job.entity_type == "intelligence" and job.entity_id:
+        entry = db.query(
+            Intelligence.status,
+            Intelligence.ai_summary,
+            Intelligence.ai_insights,
+            Intelligence.sentiment,
+            Intelligence.priority
+        ).filter(Intelligence.id == job.entity_id).first()
+        
+        if entry:
+            response["intelligence"] = {
+                "id": job.entity_id,
+                "status": entry.status,
+                "summary": entry.ai_summary,
+                "insights": entry.ai_insights or [],
+                "sentiment": entry.sentiment,
+                "priority": entry.priority,
+                "ai_analysis_complete": entry.status not in ("analyzing", "analysis_failed")
+            }
+    
+    return response
+
+@router.get("/ai-cache/stats")
+def get_ai_cache_stats():
+    """AI response cache hit/miss counters and size, plus in-flight request coalescing"""
+    return {**ai_cache.stats(), "single_flight": llm_calls.stats()}
+
+@router.get("/ai-router/stats")
+def get_ai_router_stats():
+    """Per-provider latency, error rate, circuit state and hedging counters"""
+    return ai_processor.router.snapshot()
+
+@router.get("/ai-telemetry")
+def get_ai_telemetry():
+    """LLM latency quantiles, token usage and estimated spend per calling endpoint (slowest p99 first),
+    plus structured-output parse-failure rates per schema"""
+    return {**ai_telemetry.summary(), "structured_output": structured_output.stats()}
+
+# Columns needed to render the files list - never the content column
+LIST_COLUMNS = (
+    Intelligence.id,
+    Intelligence.title,
+    Intelligence.source_type,
+    Intelligence.tags,
+    Intelligence.category,
+    Intelligence.ai_summary,
+    Intelligence.ai_insights,
+    Intelligence.status,
+    Intelligence.file_size_bytes,
+    Intelligence.created_at,
+)
+
+def _encode_cursor(created_at: datetime, entry_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{entry_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, entry_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _size_mb(size_bytes: Optional[int]) -> float:
+    return round((size_bytes or 0) / (1024 * 1024), 2)
+
 @router.get("/files")
 def list_intelligence_files(
     limit: int = 50,
     category: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """List all intelligence entries"""
+    """List intelligence entries, newest first, with keyset pagination on (created_at, id)"""
     
-    query = db.query(Intelligence)
+    limit = max(1, min(limit, 200))
+    
+    query = db.query(*LIST_COLUMNS)
+    count_query = db.query(func.count(Intelligence.id))
     
     if category:
         query = query.filter(Intelligence.category == category)
+        count_query = count_query.filter(Intelligence.category == category)
+    
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Intelligence.created_at < cursor_created_at,
+            and_(Intelligence.created_at == cursor_created_at, Intelligence.id < cursor_id)
+        ))
     
-    entries = query.order_by(desc(Intelligence.created_at)).limit(limit).all()
+    entries = query.order_by(
+        desc(Intelligence.created_at),
+        desc(Intelligence.id)
+    ).limit(limit + 1).all()
+    
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_cursor = _encode_cursor(entries[-1].created_at, entries[-1].id) if has_more else None
     
     return {
         "files": [
@@ -218,11 +418,14 @@ def list_intelligence_files(
                 "uploaded_at": e.created_at.isoformat(),  # Frontend expects 'uploaded_at'
                 "status": e.status,
                 "has_analysis": bool(e.ai_summary or e.ai_insights),  # Flag if analysis exists
-                "size_mb": round(os.path.getsize(e.file_url) / (1024 * 1024), 2) if e.file_url and os.path.exists(e.file_url) else 0
+                "size_mb": _size_mb(e.file_size_bytes)
             }
             for e in entries
         ],
-        "total": len(entries)
+        "total": count_query.scalar(),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": has_more
     }
 
 @router.get("/files/{file_id}")
@@ -234,10 +437,11 @@ def get_intelligence_file(file_id: int, db: Session = Depends(get_db)):
     if not entry:
         raise HTTPException(status_code=404, detail="Intelligence file not found")
     
-    # Get file size
-    size_mb = 0
-    if entry.file_url and os.path.exists(entry.file_url):
-        size_mb = round(os.path.getsize(entry.file_url) / (1024 * 1024), 2)
+    # Get file size (rows uploaded before file_size_bytes existed fall back to the disk)
+    size_bytes = entry.file_size_bytes
+    if size_bytes is None and entry.file_url and os.path.exists(entry.file_url):
+        size_bytes = os.path.getsize(entry.file_url)
+    size_mb = _size_mb(size_bytes)
     
     return {
         "id": entry.id,
@@ -250,6 +454,8 @@ def get_intelligence_file(file_id: int, db: Session = Depends(get_db)):
         "uploaded_at": entry.created_at.isoformat(),
         "created_at": entry.created_at.isoformat(),
         "status": entry.status,
+        "sentiment": entry.sentiment,
+        "priority": entry.priority,
         "has_analysis": bool(entry.ai_summary or entry.ai_insights),
         "analysis": {
             "summary": entry.ai_summary,
@@ -265,8 +471,6 @@ def get_intelligence_file(file_id: int, db: Session = Depends(get_db)):
 def get_intelligence_summary(db: Session = Depends(get_db)):
     """Get intelligence summary statistics"""
     
-    from sqlalchemy import func
-    
     total = db.query(func.count(Intelligence.id)).scalar()
     
     by_category = db.query(
@@ -279,7 +483,13 @@ def get_intelligence_summary(db: Session = Depends(get_db)):
         func.count(Intelligence.id)
     ).group_by(Intelligence.source_type).all()
     
-    recent = db.query(Intelligence).order_by(
+    recent = db.query(
+        Intelligence.id,
+        Intelligence.title,
+        Intelligence.source_type,
+        Intelligence.category,
+        Intelligence.created_at
+    ).order_by(
         desc(Intelligence.created_at)
     ).limit(5).all()
     
@@ -299,6 +509,70 @@ def get_intelligence_summary(db: Session = Depends(get_db)):
         ]
     }
 
+@router.get("/{intel_id}/similar")
+def get_similar_intelligence(
+    intel_id: int,
+    threshold: float = 0.5,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """Related intelligence entries, found through the MinHash/LSH index"""
+    
+    entry = db.query(Intelligence.id, Intelligence.minhash, Intelligence.content_ref, Intelligence.content).filter(
+        Intelligence.id == intel_id
+    ).first()
+    
+    if not entry:
+        raise HTTPException(status_code=404, detail="Intelligence entry not found")
+    
+    signature = entry.minhash
+    if signature is None:
+        # Uploaded before signatures existed - index it now
+        signature = near_duplicates.minhash_signature(content_store.load_content(entry))
+        db.query(Intelligence).filter(Intelligence.id == intel_id).update(
+            {Intelligence.minhash: signature}, synchronize_session=False
+        )
+        near_duplicates.index_document(db, intel_id, signature)
+        db.commit()
+    
+    matches = near_duplicates.find_similar(
+        db,
+        signature,
+        threshold=max(0.0, min(threshold, 1.0)),
+        limit=max(1, min(limit, 50)),
+        exclude_id=intel_id
+    )
+    
+    similarity = dict(matches)
+    rows = db.query(
+        Intelligence.id,
+        Intelligence.title,
+        Intelligence.category,
+        Intelligence.status,
+        Intelligence.duplicate_of_id,
+        Intelligence.created_at
+    ).filter(Intelligence.id.in_(list(similarity))).all() if similarity else []
+    
+    return {
+        "id": intel_id,
+        "similar": sorted(
+            [
+                {
+                    "id": r.id,
+                    "title": r.title,
+                    "category": r.category,
+                    "status": r.status,
+                    "similarity": round(similarity[r.id], 3),
+                    "duplicate_of": r.duplicate_of_id,
+                    "created_at": r.created_at.isoformat() if r.created_at else None
+                }
+                for r in rows
+            ],
+            key=lambda item: item["similarity"],
+            reverse=True
+        )
+    }
+
 @router.delete("/{entry_id}")
 def delete_intelligence(entry_id: int, db: Session = Depends(get_db)):
     """Delete intelligence entry"""
@@ -312,7 +586,13 @@ def delete_intelligence(entry_id: int, db: Session = Depends(get_db)):
     if entry.file_url and os.path.exists(entry.file_url):
         os.remove(entry.file_url)
     
+    content_ref = entry.content_ref
+    near_duplicates.remove_document(db, entry.id)
+    db.query(Intelligence).filter(Intelligence.duplicate_of_id == entry.id).update(
+        {Intelligence.duplicate_of_id: None}, synchronize_session=False
+    )
     db.delete(entry)
     db.commit()
+    content_store.delete_if_unreferenced(db, content_ref)
     
     return {"success": True, "message": "Intelligence entry deleted"}
@@ -6,12 +6,12 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pathlib import Path
 from typing import List, Optional
-import shutil
 import uuid
 from datetime import datetime
 
 from database import get_db
 from models import MediaFile
+from services.uploads import spool_upload
 
 # --- New ---
 from fastapi.staticfiles import StaticFiles
@@ -47,11 +47,10 @@ async def upload_media(
         unique_id = uuid.uuid4()
         file_extension = Path(upload_file.filename).suffix
         unique_filename = f"{unique_id}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
         
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        # Stream the file to disk
+        upload = await spool_upload(upload_file, str(UPLOAD_DIR), filename=unique_filename)
+        file_path = Path(upload.path)
         
         # --- New: Generate a public URL for the file ---
         public_url = f"/api/media/uploads/{unique_filename}"
@@ -61,7 +60,7 @@ async def upload_media(
             original_filename=upload_file.filename,
             file_path=str(file_path),
             public_url=public_url,  # Save the public URL
-            file_size=file_path.stat().st_size,
+            file_size=upload.size,
             mime_type=upload_file.content_type,
             uploaded_at=datetime.utcnow()
         )
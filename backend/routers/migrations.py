@@ -22,7 +22,11 @@ def migrate_all_tables(db: Session = Depends(get_db)):
             "shopify_metrics",
             "competitor_intel",
             "executive_metrics",
-            "alerts"
+            "alerts",
+            "ai_jobs",
+            "ai_cache",
+            "intelligence_lsh",
+            "ai_call_rollups"
         ]
         
         for table in tables_to_drop:
@@ -88,6 +92,8 @@ def migrate_all_tables(db: Session = Depends(get_db)):
                 id SERIAL PRIMARY KEY,
                 title VARCHAR NOT NULL,
                 content TEXT NOT NULL,
+                content_ref VARCHAR(64),
+                content_length BIGINT,
                 source_type VARCHAR,
                 category VARCHAR,
                 tags JSONB,
@@ -97,6 +103,10 @@ def migrate_all_tables(db: Session = Depends(get_db)):
                 priority VARCHAR DEFAULT 'medium',
                 status VARCHAR DEFAULT 'new',
                 file_url VARCHAR,
+                file_size_bytes BIGINT,
+                minhash JSONB,
+                duplicate_of_id INTEGER,
+                ai_prompt_version VARCHAR,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
             )
@@ -105,6 +115,9 @@ def migrate_all_tables(db: Session = Depends(get_db)):
         db.execute(text("CREATE INDEX ix_intelligence_title ON intelligence(title)"))
         db.execute(text("CREATE INDEX ix_intelligence_category ON intelligence(category)"))
         db.execute(text("CREATE INDEX ix_intelligence_created_at ON intelligence(created_at)"))
+        db.execute(text("CREATE INDEX ix_intelligence_created_at_id ON intelligence(created_at, id)"))
+        db.execute(text("CREATE INDEX ix_intelligence_content_ref ON intelligence(content_ref)"))
+        db.execute(text("CREATE INDEX ix_intelligence_duplicate_of_id ON intelligence(duplicate_of_id)"))
         print("[Migration] ✅ intelligence table created")
         
         # Create shopify_metrics table
@@ -136,11 +149,15 @@ def migrate_all_tables(db: Session = Depends(get_db)):
                 category VARCHAR,
                 data_type VARCHAR,
                 content TEXT,
+                content_ref VARCHAR(64),
+                content_length BIGINT,
+                record_count INTEGER,
                 source_url VARCHAR,
                 sentiment VARCHAR,
                 ai_analysis TEXT,
                 priority VARCHAR DEFAULT 'medium',
                 tags JSONB,
+                ai_prompt_version VARCHAR,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
             )
@@ -148,6 +165,7 @@ def migrate_all_tables(db: Session = Depends(get_db)):
         db.execute(text("CREATE INDEX ix_competitor_intel_id ON competitor_intel(id)"))
         db.execute(text("CREATE INDEX ix_competitor_intel_competitor_name ON competitor_intel(competitor_name)"))
         db.execute(text("CREATE INDEX ix_competitor_intel_created_at ON competitor_intel(created_at)"))
+        db.execute(text("CREATE INDEX ix_competitor_intel_content_ref ON competitor_intel(content_ref)"))
         print("[Migration] ✅ competitor_intel table created")
         
         # Create executive_metrics table
@@ -188,6 +206,89 @@ def migrate_all_tables(db: Session = Depends(get_db)):
         db.execute(text("CREATE INDEX ix_alerts_created_at ON alerts(created_at)"))
         print("[Migration] ✅ alerts table created")
         
+        # Create ai_jobs table
+        db.execute(text("""
+            CREATE TABLE ai_jobs (
+                id SERIAL PRIMARY KEY,
+                job_type VARCHAR NOT NULL,
+                entity_type VARCHAR,
+                entity_id INTEGER,
+                status VARCHAR DEFAULT 'queued',
+                payload JSONB,
+                result JSONB,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                not_before TIMESTAMP WITH TIME ZONE,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE
+            )
+        """))
+        db.execute(text("CREATE INDEX ix_ai_jobs_id ON ai_jobs(id)"))
+        db.execute(text("CREATE INDEX ix_ai_jobs_job_type ON ai_jobs(job_type)"))
+        db.execute(text("CREATE INDEX ix_ai_jobs_entity_id ON ai_jobs(entity_id)"))
+        db.execute(text("CREATE INDEX ix_ai_jobs_status ON ai_jobs(status)"))
+        db.execute(text("CREATE INDEX ix_ai_jobs_created_at ON ai_jobs(created_at)"))
+        print("[Migration] ✅ ai_jobs table created")
+        
+        # Create ai_cache table
+        db.execute(text("""
+            CREATE TABLE ai_cache (
+                id SERIAL PRIMARY KEY,
+                cache_key VARCHAR(64) UNIQUE NOT NULL,
+                prompt_version VARCHAR,
+                model VARCHAR,
+                response TEXT NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                last_accessed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP WITH TIME ZONE
+            )
+        """))
+        db.execute(text("CREATE INDEX ix_ai_cache_id ON ai_cache(id)"))
+        db.execute(text("CREATE INDEX ix_ai_cache_prompt_version ON ai_cache(prompt_version)"))
+        db.execute(text("CREATE INDEX ix_ai_cache_last_accessed_at ON ai_cache(last_accessed_at)"))
+        db.execute(text("CREATE INDEX ix_ai_cache_expires_at ON ai_cache(expires_at)"))
+        print("[Migration] ✅ ai_cache table created")
+        
+        # Create intelligence_lsh table
+        db.execute(text("""
+            CREATE TABLE intelligence_lsh (
+                id SERIAL PRIMARY KEY,
+                intelligence_id INTEGER NOT NULL,
+                band INTEGER NOT NULL,
+                bucket VARCHAR(16) NOT NULL
+            )
+        """))
+        db.execute(text("CREATE INDEX ix_intelligence_lsh_id ON intelligence_lsh(id)"))
+        db.execute(text("CREATE INDEX ix_intelligence_lsh_intelligence_id ON intelligence_lsh(intelligence_id)"))
+        db.execute(text("CREATE INDEX ix_intelligence_lsh_band_bucket ON intelligence_lsh(band, bucket)"))
+        print("[Migration] ✅ intelligence_lsh table created")
+        
+        # Create ai_call_rollups table
+        db.execute(text("""
+            CREATE TABLE ai_call_rollups (
+                id SERIAL PRIMARY KEY,
+                period_start TIMESTAMP WITH TIME ZONE NOT NULL,
+                period_seconds INTEGER NOT NULL,
+                provider VARCHAR,
+                model VARCHAR,
+                caller VARCHAR,
+                operation VARCHAR,
+                calls INTEGER DEFAULT 0,
+                errors INTEGER DEFAULT 0,
+                input_tokens BIGINT DEFAULT 0,
+                output_tokens BIGINT DEFAULT 0,
+                cost_usd FLOAT DEFAULT 0,
+                total_seconds FLOAT DEFAULT 0
+            )
+        """))
+        db.execute(text("CREATE INDEX ix_ai_call_rollups_id ON ai_call_rollups(id)"))
+        db.execute(text("CREATE INDEX ix_ai_call_rollups_period_start ON ai_call_rollups(period_start)"))
+        db.execute(text("CREATE INDEX ix_ai_call_rollups_provider ON ai_call_rollups(provider)"))
+        db.execute(text("CREATE INDEX ix_ai_call_rollups_caller ON ai_call_rollups(caller)"))
+        print("[Migration] ✅ ai_call_rollups table created")
+        
         db.commit()
         print("[Migration] All tables committed successfully!")
         
@@ -201,7 +302,11 @@ def migrate_all_tables(db: Session = Depends(get_db)):
                 "shopify_metrics",
                 "competitor_intel",
                 "executive_metrics",
-                "alerts"
+                "alerts",
+                "ai_jobs",
+                "ai_cache",
+                "intelligence_lsh",
+                "ai_call_rollups"
             ]
         }
         
@@ -232,7 +337,11 @@ def check_tables(db: Session = Depends(get_db)):
             "shopify_metrics",
             "competitor_intel",
             "executive_metrics",
-            "alerts"
+            "alerts",
+            "ai_jobs",
+            "ai_cache",
+            "intelligence_lsh",
+            "ai_call_rollups"
         ]
         
         missing_tables = [t for t in expected_tables if t not in tables]
@@ -3,28 +3,17 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_, text
 from datetime import datetime, timezone, timedelta
 from typing import Optional
-import csv
 import re
-from io import StringIO
+import time
 
 from ..database import get_db
 from ..models import ShopifyMetric, ShopifyProduct, ShopifyOrder, ShopifyCustomer
+from ..services import bulk_upsert, csv_import, shopify_metrics
+from ..services.date_parsing import DateColumnParser, infer_columns
 
 router = APIRouter()
 
 
-def try_decode(contents: bytes) -> str:
-    """Try to decode bytes with multiple encodings"""
-    for encoding in ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-        try:
-            decoded = contents.decode(encoding)
-            print(f"[Shopify] Successfully decoded with {encoding}")
-            return decoded
-        except:
-            continue
-    raise ValueError("Could not decode file with any supported encoding")
-
-
 @router.get("/dashboard")
 def get_shopify_dashboard(
     period: str = "30d",
@@ -180,138 +169,46 @@ async def import_shopify_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Import Shopify metrics from CSV (sales/conversion data)"""
+    """Import Shopify metrics from CSV (sales/conversion data).
+    
+    Columnar path (see services/shopify_metrics.py): one pandas read,
+    vectorized cleaning and derived metrics, one query for the existing
+    days and a single bulk update + insert.
+    """
     
     try:
-        contents = await file.read()
-        decoded = try_decode(contents)
+        upload = csv_import.open_upload(file)
         
-        print(f"[Shopify Import] File received: {file.filename}, Size: {len(contents)} bytes")
+        print(f"[Shopify Import] File received: {file.filename}, Size: {upload.size} bytes, Encoding: {upload.encoding}")
         
-        csv_file = StringIO(decoded)
-        reader = csv.DictReader(csv_file)
-        headers = reader.fieldnames
-        print(f"[Shopify Import] CSV Headers: {headers}")
+        frame = upload.read_frame()
+        print(f"[Shopify Import] CSV Headers: {list(frame.columns)}")
         
-        is_sales_export = 'Net sales' in headers or 'Total sales' in headers
-        is_conversion_export = 'Conversion rate' in headers and 'Sessions' in headers
-        is_orders_export = 'Average order value' in headers and 'Orders' in headers
+        result = shopify_metrics.import_frame(db, frame)
+        exports = result.exports
+        print(f"[Shopify Import] Detected - Sales: {exports['sales']}, Conversion: {exports['conversion']}, Orders: {exports['orders']}")
         
-        print(f"[Shopify Import] Detected - Sales: {is_sales_export}, Conversion: {is_conversion_export}, Orders: {is_orders_export}")
-        
-        created = 0
-        updated = 0
-        errors = []
-        
-        for idx, row in enumerate(reader, start=2):
-            try:
-                date_str = row.get('Day') or row.get('Date')
-                
-                if not date_str or not date_str.strip() or 'previous_period' in str(date_str).lower():
-                    continue
-                
-                period_start = None
-                date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%b %d, %Y', '%B %d, %Y']
-                
-                for fmt in date_formats:
-                    try:
-                        period_start = datetime.strptime(date_str.strip(), fmt)
-                        break
-                    except:
-                        continue
-                
-                if not period_start:
-                    errors.append(f"Row {idx}: Could not parse date '{date_str}'")
-                    continue
-                
-                period_end = period_start + timedelta(days=1)
-                
-                existing = db.query(ShopifyMetric).filter(
-                    ShopifyMetric.period_start == period_start
-                ).first()
-                
-                if existing:
-                    metric = existing
-                else:
-                    metric = ShopifyMetric(
-                        period_type="daily",
-                        period_start=period_start,
-                        period_end=period_end,
-                        total_orders=0,
-                        total_revenue=0.0,
-                        avg_order_value=0.0,
-                        total_sessions=0,
-                        conversion_rate=0.0
-                    )
-                
-                if is_sales_export:
-                    orders_str = row.get('Orders', '0')
-                    net_sales_str = row.get('Net sales', '0')
-                    
-                    orders = int(float(orders_str.replace(',', '').strip()) if orders_str else 0)
-                    revenue = float(net_sales_str.replace('$', '').replace(',', '').strip() if net_sales_str else 0)
-                    
-                    metric.total_orders = orders
-                    metric.total_revenue = revenue
-                    metric.avg_order_value = revenue / orders if orders > 0 else 0
-                
-                if is_conversion_export:
-                    sessions_str = row.get('Sessions', '0')
-                    conversion_str = row.get('Conversion rate', '0')
-                    
-                    sessions = int(float(sessions_str.replace(',', '').strip()) if sessions_str else 0)
-                    conversion = float(conversion_str.replace('%', '').strip() if conversion_str else 0)
-                    
-                    metric.total_sessions = sessions
-                    metric.conversion_rate = conversion
-                
-                if is_orders_export:
-                    orders_str = row.get('Orders', '0')
-                    aov_str = row.get('Average order value', '0')
-                    
-                    orders = int(float(orders_str.replace(',', '').strip()) if orders_str else 0)
-                    aov = float(aov_str.replace('$', '').replace(',', '').strip() if aov_str else 0)
-                    
-                    metric.total_orders = orders
-                    metric.avg_order_value = aov
-                    
-                    if metric.total_revenue == 0:
-                        metric.total_revenue = orders * aov
-                
-                metric.total_orders = metric.total_orders or 0
-                metric.total_revenue = metric.total_revenue or 0.0
-                metric.total_sessions = metric.total_sessions or 0
-                metric.conversion_rate = metric.conversion_rate or 0.0
-                metric.avg_order_value = metric.avg_order_value or 0.0
-                
-                if metric.total_orders > 0 and metric.total_revenue > 0:
-                    metric.avg_order_value = metric.total_revenue / metric.total_orders
-                
-                if metric.total_orders > 0 and metric.total_sessions > 0:
-                    metric.conversion_rate = (metric.total_orders / metric.total_sessions) * 100
-                
-                if existing:
-                    updated += 1
-                else:
-                    db.add(metric)
-                    created += 1
-                
-            except Exception as e:
-                error_msg = f"Row {idx}: {str(e)}"
-                errors.append(error_msg)
-                if len(errors) <= 5:
-                    print(f"[Shopify Import] ❌ {error_msg}")
+        for error_msg in result.errors[:5]:
+            print(f"[Shopify Import] ❌ {error_msg}")
         
         db.commit()
-        print(f"[Shopify Import] ✅ Success - Created: {created}, Updated: {updated}")
+        if upload.decode_fallbacks:
+            print(f"[Shopify Import] ⚠️ {upload.decode_fallbacks} byte sequence(s) were not valid {upload.encoding} - decoded as Windows-1252")
+        print(f"[Shopify Import] ✅ Success - Created: {result.created}, Updated: {result.updated} "
+              f"({result.rows} rows, {result.days} days in {result.seconds:.3f}s, {result.rows_per_second:,.0f} rows/s)")
         
         return {
             "success": True,
-            "message": f"✅ Imported metrics - Created {created}, Updated {updated}",
-            "created": created,
-            "updated": updated,
-            "errors": errors[:5] if errors else [],
-            "total_errors": len(errors)
+            "message": f"✅ Imported metrics - Created {result.created}, Updated {result.updated}",
+            "created": result.created,
+            "updated": result.updated,
+            "rows": result.rows,
+            "seconds": round(result.seconds, 3),
+            "rows_per_second": round(result.rows_per_second, 1),
+            "bytes_processed": upload.size,
+            "decode_fallbacks": upload.decode_fallbacks,
+            "errors": result.errors[:5] if result.errors else [],
+            "total_errors": len(result.errors)
         }
         
     except Exception as e:
@@ -329,13 +226,11 @@ async def import_products_csv(
     """Import Shopify products from CSV export"""
     
     try:
-        contents = await file.read()
-        decoded = try_decode(contents)
+        upload = csv_import.open_upload(file)
         
-        print(f"[Products Import] File received: {file.filename}, Size: {len(contents)} bytes")
+        print(f"[Products Import] File received: {file.filename}, Size: {upload.size} bytes, Encoding: {upload.encoding}")
         
-        csv_file = StringIO(decoded)
-        reader = csv.DictReader(csv_file)
+        reader = upload.reader
         headers = reader.fieldnames
         print(f"[Products Import] CSV Headers: {headers}")
         
@@ -412,6 +307,8 @@ async def import_products_csv(
             db.commit()
         
         db.commit()
+        if upload.decode_fallbacks:
+            print(f"[Products Import] ⚠️ {upload.decode_fallbacks} byte sequence(s) were not valid {upload.encoding} - decoded as Windows-1252")
         print(f"[Products Import] ✅ Success - Created: {created}, Updated: {updated}")
         
         return {
@@ -419,6 +316,8 @@ async def import_products_csv(
             "message": f"✅ Imported products - Created {created}, Updated {updated}",
             "created": created,
             "updated": updated,
+            "bytes_processed": upload.bytes_read,
+            "decode_fallbacks": upload.decode_fallbacks,
             "errors": errors[:5] if errors else [],
             "total_errors": len(errors)
         }
@@ -430,113 +329,91 @@ async def import_products_csv(
         raise HTTPException(500, error_msg)
 
 
+# Shopify exports "2025-01-31 14:05:09 -0500"
+ORDER_DATE_FORMATS = ['%Y-%m-%d %H:%M:%S %z', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M', '%Y-%m-%d']
+
+ORDER_MONEY_COLUMNS = {
+    "total": "Total",
+    "subtotal": "Subtotal",
+    "shipping": "Shipping",
+    "taxes": "Taxes",
+    "discount_amount": "Discount Amount",
+}
+
+
+def _order_from_row(row: dict, parse_created_at: DateColumnParser) -> dict:
+    """Order-level fields from the first line-item row of an order"""
+    order_date = parse_created_at(row.get('Created at'))
+    
+    customer_name = f"{row.get('Billing Name', '')} {row.get('Shipping Name', '')}".strip()
+    if not customer_name:
+        customer_name = row.get('Customer', 'Guest')
+    
+    order = {
+        "order_date": order_date or datetime.now(timezone.utc),
+        "customer_name": customer_name,
+        "customer_email": row.get('Email', ''),
+        "financial_status": row.get('Financial Status', 'unknown'),
+        "fulfillment_status": row.get('Fulfillment Status', 'unfulfilled'),
+        "line_items_count": 0,
+    }
+    for column, header in ORDER_MONEY_COLUMNS.items():
+        value = row.get(header) or '0'
+        order[column] = float(value.replace('$', '').replace(',', '').strip() or 0)
+    return order
+
+
 @router.post("/import-orders-csv")
 async def import_orders_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Import Shopify orders from CSV export"""
+    """Import Shopify orders from CSV export.
+    
+    The export has one row per line item. Rows are aggregated per order in
+    memory (line item quantities summed, product titles de-duplicated), then
+    written with batched INSERT ... ON CONFLICT (order_name) DO UPDATE, so
+    re-importing an export updates orders instead of duplicating them.
+    """
     
     try:
-        contents = await file.read()
-        decoded = try_decode(contents)
+        start = time.perf_counter()
+        upload = csv_import.open_upload(file)
         
-        print(f"[Orders Import] File received: {file.filename}, Size: {len(contents)} bytes")
+        print(f"[Orders Import] File received: {file.filename}, Size: {upload.size} bytes, Encoding: {upload.encoding}")
         
-        csv_file = StringIO(decoded)
-        reader = csv.DictReader(csv_file)
+        reader = upload.reader
         headers = reader.fieldnames
         print(f"[Orders Import] CSV Headers: {headers}")
         
-        created = 0
-        updated = 0
+        parse_created_at = DateColumnParser(ORDER_DATE_FORMATS)
+        rows_in = infer_columns(reader, {'Created at': parse_created_at})
+        orders = {}  # order_name -> column values, in file order
+        titles = {}  # order_name -> product titles (dict keys keep first-seen order)
+        rows_read = 0
         skipped = 0
         errors = []
-        batch_size = 500
-        batch = []
         
-        for idx, row in enumerate(reader, start=2):
+        for idx, row in enumerate(rows_in, start=2):
+            rows_read += 1
             try:
-                order_name = row.get('Name')
+                order_name = (row.get('Name') or '').strip()
                 
                 if not order_name:
                     skipped += 1
                     continue
                 
-                order_date_str = row.get('Created at')
-                order_date = None
-                
-                if order_date_str:
-                    date_formats = ['%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M', '%Y-%m-%d']
-                    for fmt in date_formats:
-                        try:
-                            order_date = datetime.strptime(order_date_str.strip(), fmt)
-                            break
-                        except:
-                            continue
-                
-                if not order_date:
-                    order_date = datetime.now(timezone.utc)
-                
-                customer_name = f"{row.get('Billing Name', '')} {row.get('Shipping Name', '')}".strip()
-                if not customer_name:
-                    customer_name = row.get('Customer', 'Guest')
-                
-                customer_email = row.get('Email', '')
-                financial_status = row.get('Financial Status', 'unknown')
-                fulfillment_status = row.get('Fulfillment Status', 'unfulfilled')
+                quantity = int(row.get('Lineitem quantity') or 1)
+                product_title = (row.get('Lineitem name') or '').strip()
                 
-                total_str = row.get('Total', '0')
-                subtotal_str = row.get('Subtotal', '0')
-                shipping_str = row.get('Shipping', '0')
-                taxes_str = row.get('Taxes', '0')
-                discount_str = row.get('Discount Amount', '0')
+                order = orders.get(order_name)
+                if order is None:
+                    order = orders[order_name] = _order_from_row(row, parse_created_at)
+                    titles[order_name] = {}
                 
-                total = float(total_str.replace('$', '').replace(',', '').strip() if total_str else 0)
-                subtotal = float(subtotal_str.replace('$', '').replace(',', '').strip() if subtotal_str else 0)
-                shipping = float(shipping_str.replace('$', '').replace(',', '').strip() if shipping_str else 0)
-                taxes = float(taxes_str.replace('$', '').replace(',', '').strip() if taxes_str else 0)
-                discount = float(discount_str.replace('$', '').replace(',', '').strip() if discount_str else 0)
-                
-                line_items = int(row.get('Lineitem quantity', 1))
-                product_title = row.get('Lineitem name', '')
-                
-                existing = db.query(ShopifyOrder).filter(
-                    ShopifyOrder.order_name == order_name
-                ).first()
-                
-                if existing:
-                    if product_title and product_title not in existing.product_titles:
-                        existing.product_titles += f", {product_title}"
-                        existing.line_items_count += line_items
-                    skipped += 1
-                else:
-                    order = ShopifyOrder(
-                        order_name=order_name,
-                        order_date=order_date,
-                        customer_name=customer_name,
-                        customer_email=customer_email,
-                        financial_status=financial_status,
-                        fulfillment_status=fulfillment_status,
-                        total=total,
-                        subtotal=subtotal,
-                        shipping=shipping,
-                        taxes=taxes,
-                        discount_amount=discount,
-                        line_items_count=line_items,
-                        product_titles=product_title
-                    )
-                    batch.append(order)
-                    created += 1
-                
-                if len(batch) >= batch_size:
-                    db.add_all(batch)
-                    db.commit()
-                    print(f"[Orders] Committed batch - Total created: {created}")
-                    batch = []
-                
-                if idx % 1000 == 0:
-                    print(f"[Orders] Processed {idx} rows...")
+                order["line_items_count"] += quantity
+                if product_title:
+                    titles[order_name][product_title] = None
                 
             except Exception as e:
                 error_msg = f"Row {idx}: {str(e)}"
@@ -544,18 +421,34 @@ async def import_orders_csv(
                 if len(errors) <= 5:
                     print(f"[Orders Import] ❌ {error_msg}")
         
-        if batch:
-            db.add_all(batch)
-            db.commit()
-        
+        parsed_at = time.perf_counter()
+        rows = [
+            {"order_name": name, **order, "product_titles": ", ".join(titles[name])}
+            for name, order in orders.items()
+        ]
+        result = bulk_upsert.upsert(db, ShopifyOrder, rows, key="order_name")
         db.commit()
-        print(f"[Orders Import] ✅ Success - Created: {created}, Skipped: {skipped}")
+        
+        elapsed = time.perf_counter() - start
+        rows_per_second = rows_read / elapsed if elapsed > 0 else 0.0
+        if upload.decode_fallbacks:
+            print(f"[Orders Import] ⚠️ {upload.decode_fallbacks} byte sequence(s) were not valid {upload.encoding} - decoded as Windows-1252")
+        print(f"[Orders Import] ✅ Success - {rows_read} rows -> {len(rows)} orders "
+              f"(Created: {result.inserted}, Updated: {result.updated}, Skipped: {skipped}) in {elapsed:.2f}s "
+              f"[parse {parsed_at - start:.2f}s, write {result.seconds:.2f}s, {rows_per_second:,.0f} rows/s]")
         
         return {
             "success": True,
-            "message": f"✅ Imported orders - Created {created}, Skipped {skipped} duplicates",
-            "created": created,
-            "updated": updated,
+            "message": f"✅ Imported {len(rows)} orders - Created {result.inserted}, Updated {result.updated}, Skipped {skipped} rows",
+            "created": result.inserted,
+            "updated": result.updated,
+            "skipped": skipped,
+            "rows": rows_read,
+            "orders": len(rows),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_per_second, 1),
+            "bytes_processed": upload.bytes_read,
+            "decode_fallbacks": upload.decode_fallbacks,
             "errors": errors[:5] if errors else [],
             "total_errors": len(errors)
         }
@@ -567,130 +460,108 @@ async def import_orders_csv(
         raise HTTPException(500, error_msg)
 
 
+CUSTOMER_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
+CUSTOMER_DATE_HEADERS = {"first_order_date": "First Order Date", "last_order_date": "Last Order Date"}
+
+CUSTOMER_COLUMNS = [
+    "email", "first_name", "last_name", "orders_count", "total_spent",
+    "first_order_date", "last_order_date", "is_returning", "accepts_marketing",
+]
+# Existing customers keep their name and marketing consent; order dates only move when the file has one
+CUSTOMER_UPDATE_COLUMNS = ["orders_count", "total_spent", "is_returning", "first_order_date", "last_order_date"]
+CUSTOMER_COALESCE_COLUMNS = ("first_order_date", "last_order_date")
+
+
+def _customer_from_row(row: dict, date_parsers: dict) -> dict:
+    orders_count = int(row.get('Orders Count') or 0)
+    total_spent_str = row.get('Total Spent', '0')
+    total_spent = float(total_spent_str.replace('$', '').replace(',', '').strip() if total_spent_str else 0)
+    
+    dates = {
+        column: date_parsers[header](row.get(header))
+        for column, header in CUSTOMER_DATE_HEADERS.items()
+    }
+    
+    return {
+        "email": row.get('Email'),
+        "first_name": row.get('First Name', ''),
+        "last_name": row.get('Last Name', ''),
+        "orders_count": orders_count,
+        "total_spent": total_spent,
+        **dates,
+        "is_returning": orders_count > 1,
+        "accepts_marketing": (row.get('Accepts Marketing') or 'no').lower() == 'yes',
+    }
+
+
 @router.post("/import-customers-csv")
 async def import_customers_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Import Shopify customers from CSV export - handles large files"""
+    """Import Shopify customers from CSV export - handles large files.
+    
+    On PostgreSQL (psycopg 3) parsed rows are streamed with COPY into a temp
+    staging table and merged with one INSERT ... SELECT ... ON CONFLICT
+    (email) DO UPDATE; elsewhere they are upserted with executemany. When an
+    email appears more than once, the last row wins.
+    """
     
     try:
-        contents = await file.read()
-        decoded = try_decode(contents)
+        start = time.perf_counter()
+        upload = csv_import.open_upload(file)
         
-        print(f"[Customers Import] File received: {file.filename}, Size: {len(contents)} bytes")
+        print(f"[Customers Import] File received: {file.filename}, Size: {upload.size} bytes, Encoding: {upload.encoding}")
         
-        csv_file = StringIO(decoded)
-        reader = csv.DictReader(csv_file)
+        reader = upload.reader
         headers = reader.fieldnames
         print(f"[Customers Import] CSV Headers: {headers}")
         
-        created = 0
-        updated = 0
         errors = []
-        batch_size = 1000
-        batch = []
-        
-        for idx, row in enumerate(reader, start=2):
-            try:
-                email = row.get('Email')
-                
-                if not email:
-                    continue
-                
-                first_name = row.get('First Name', '')
-                last_name = row.get('Last Name', '')
-                orders_count = int(row.get('Orders Count', 0))
-                total_spent_str = row.get('Total Spent', '0')
-                total_spent = float(total_spent_str.replace('$', '').replace(',', '').strip() if total_spent_str else 0)
-                
-                accepts_marketing = row.get('Accepts Marketing', 'no').lower() == 'yes'
-                
-                first_order_str = row.get('First Order Date')
-                last_order_str = row.get('Last Order Date')
-                
-                first_order_date = None
-                last_order_date = None
-                
-                date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
-                
-                if first_order_str:
-                    for fmt in date_formats:
-                        try:
-                            first_order_date = datetime.strptime(first_order_str.strip(), fmt)
-                            break
-                        except:
-                            continue
-                
-                if last_order_str:
-                    for fmt in date_formats:
-                        try:
-                            last_order_date = datetime.strptime(last_order_str.strip(), fmt)
-                            break
-                        except:
-                            continue
-                
-                is_returning = orders_count > 1
-                
-                existing = db.query(ShopifyCustomer).filter(
-                    ShopifyCustomer.email == email
-                ).first()
-                
-                if existing:
-                    existing.orders_count = orders_count
-                    existing.total_spent = total_spent
-                    existing.is_returning = is_returning
-                    if first_order_date:
-                        existing.first_order_date = first_order_date
-                    if last_order_date:
-                        existing.last_order_date = last_order_date
-                    updated += 1
-                else:
-                    customer = ShopifyCustomer(
-                        email=email,
-                        first_name=first_name,
-                        last_name=last_name,
-                        orders_count=orders_count,
-                        total_spent=total_spent,
-                        first_order_date=first_order_date,
-                        last_order_date=last_order_date,
-                        is_returning=is_returning,
-                        accepts_marketing=accepts_marketing
-                    )
-                    batch.append(customer)
-                    created += 1
-                
-                # Commit in batches
-                if len(batch) >= batch_size:
-                    db.add_all(batch)
-                    db.commit()
-                    print(f"[Customers] Committed batch of {len(batch)} - Total created: {created}")
-                    batch = []
-                
-                # Progress logging every 5000 rows
-                if idx % 5000 == 0:
-                    print(f"[Customers] Processed {idx} rows...")
-                
-            except Exception as e:
-                error_msg = f"Row {idx}: {str(e)}"
-                errors.append(error_msg)
-                if len(errors) <= 5:
-                    print(f"[Customers Import] ❌ {error_msg}")
-        
-        # Commit remaining batch
-        if batch:
-            db.add_all(batch)
-            db.commit()
-            print(f"[Customers] Committed final batch of {len(batch)}")
-        
+        counts = {"rows": 0, "skipped": 0}
+        date_parsers = {header: DateColumnParser(CUSTOMER_DATE_FORMATS) for header in CUSTOMER_DATE_HEADERS.values()}
+        
+        def customer_rows():
+            for idx, row in enumerate(infer_columns(reader, date_parsers), start=2):
+                counts["rows"] += 1
+                try:
+                    if not row.get('Email'):
+                        counts["skipped"] += 1
+                        continue
+                    yield _customer_from_row(row, date_parsers)
+                except Exception as e:
+                    error_msg = f"Row {idx}: {str(e)}"
+                    errors.append(error_msg)
+                    if len(errors) <= 5:
+                        print(f"[Customers Import] ❌ {error_msg}")
+        
+        result = bulk_upsert.copy_upsert(
+            db, ShopifyCustomer, customer_rows(), key="email",
+            columns=CUSTOMER_COLUMNS,
+            update_columns=CUSTOMER_UPDATE_COLUMNS,
+            coalesce_columns=CUSTOMER_COALESCE_COLUMNS
+        )
         db.commit()
-        print(f"[Customers Import] ✅ Success - Created: {created}, Updated: {updated}")
+        
+        elapsed = time.perf_counter() - start
+        rows_per_second = counts["rows"] / elapsed if elapsed > 0 else 0.0
+        if upload.decode_fallbacks:
+            print(f"[Customers Import] ⚠️ {upload.decode_fallbacks} byte sequence(s) were not valid {upload.encoding} - decoded as Windows-1252")
+        print(f"[Customers Import] ✅ Success - Created: {result.inserted}, Updated: {result.updated} "
+              f"({counts['rows']} rows via {result.method} in {elapsed:.2f}s, {rows_per_second:,.0f} rows/s)")
         
         return {
             "success": True,
-            "message": f"✅ Imported customers - Created {created}, Updated {updated}",
-            "created": created,
-            "updated": updated,
+            "message": f"✅ Imported customers - Created {result.inserted}, Updated {result.updated}",
+            "created": result.inserted,
+            "updated": result.updated,
+            "skipped": counts["skipped"],
+            "rows": counts["rows"],
+            "method": result.method,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows_per_second, 1),
+            "bytes_processed": upload.bytes_read,
+            "decode_fallbacks": upload.decode_fallbacks,
             "errors": errors[:5] if errors else [],
             "total_errors": len(errors)
         }
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import argparse
+import json
+
+from backend.database import SessionLocal
+from backend.services import batch_reanalysis
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-analyze intelligence rows with stale or missing prompt versions through provider batch APIs"
+    )
+    parser.add_argument("--provider", choices=sorted(batch_reanalysis.PROVIDERS), default="anthropic")
+    parser.add_argument("--tables", nargs="+", choices=sorted(batch_reanalysis.TABLES),
+                        default=list(batch_reanalysis.TABLES))
+    parser.add_argument("--limit", type=int, default=None, help="Maximum rows to submit in this run")
+    parser.add_argument("--batch-size", type=int, default=batch_reanalysis.BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=60, help="Seconds between status polls")
+    parser.add_argument("--checkpoint", default=batch_reanalysis.DEFAULT_CHECKPOINT)
+    parser.add_argument("--no-wait", action="store_true", help="Submit and exit; re-run later to collect results")
+    args = parser.parse_args()
+
+    checkpoint = batch_reanalysis.Checkpoint.load(args.checkpoint)
+    if checkpoint.pending():
+        print(f"[BatchReanalysis] Resuming {len(checkpoint.pending())} pending batch(es) from {args.checkpoint}")
+
+    provider = batch_reanalysis.PROVIDERS[args.provider]()
+    db = SessionLocal()
+    try:
+        summary = batch_reanalysis.run(
+            db,
+            provider,
+            checkpoint,
+            tables=args.tables,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            poll_interval=args.poll_interval,
+            wait=not args.no_wait,
+        )
+    finally:
+        db.close()
+
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["pending_batches"] == 0 or args.no_wait else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Short timings so the scenarios run in a few seconds
+os.environ.setdefault("AI_HEDGE_MIN_SAMPLES", "10")
+os.environ.setdefault("AI_HEDGE_MIN_SECONDS", "0.05")
+os.environ.setdefault("AI_CIRCUIT_FAILURES", "3")
+os.environ.setdefault("AI_CIRCUIT_COOLDOWN_SECONDS", "0.5")
+
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.services.ai_router import Provider, ProviderRouter, AllProvidersFailed
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        server.hits += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(server.latency)
+
+        if server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = json.dumps({"text": f"{server.name} ok"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_provider(name: str, latency: float = 0.01) -> ThreadingHTTPServer:
+    """Local stand-in for an LLM API with injectable latency and failures"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeProviderHandler)
+    server.daemon_threads = True
+    server.name = name
+    server.latency = latency
+    server.fail = False
+    server.hits = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def provider_for(server: ThreadingHTTPServer) -> Provider:
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/messages"
+
+    def call(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+        payload = json.dumps({"system": system_prompt, "prompt": user_prompt, "max_tokens": max_tokens}).encode("utf-8")
+        request = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())["text"]
+
+    async def acall(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+        return await asyncio.to_thread(call, system_prompt, user_prompt, max_tokens)
+
+    return Provider(server.name, call, acall)
+
+
+def check(label: str, condition: bool, detail: str = "") -> bool:
+    print(f"{'✅' if condition else '❌'} {label}{' - ' + detail if detail else ''}")
+    return condition
+
+
+def run_checks() -> bool:
+    primary = start_fake_provider("primary")
+    fallback = start_fake_provider("fallback")
+    results = []
+
+    # Healthy primary serves every call
+    router = ProviderRouter([provider_for(primary), provider_for(fallback)])
+    answers = [router.call("system", f"prompt {i}", 10) for i in range(12)]
+    results.append(check("healthy primary preferred", set(answers) == {"primary ok"} and fallback.hits == 0))
+
+    # Primary slows past its p90 -> hedge fires and the fallback answer wins
+    primary.latency = 1.0
+    start = time.perf_counter()
+    answer = router.call("system", "slow prompt", 10)
+    elapsed = time.perf_counter() - start
+    results.append(check(
+        "hedged request returns the faster provider",
+        answer == "fallback ok" and elapsed < 0.5 and router.hedges_won == 1,
+        f"{elapsed:.2f}s"
+    ))
+
+    # Same through the async path (timed inside the loop - asyncio.run also waits for the loser's thread)
+    async def hedged_async():
+        start = time.perf_counter()
+        answer = await router.acall("system", "slow async prompt", 10)
+        return answer, time.perf_counter() - start
+
+    answer, elapsed = asyncio.run(hedged_async())
+    results.append(check(
+        "async hedge returns the faster provider",
+        answer == "fallback ok" and elapsed < 0.5,
+        f"{elapsed:.2f}s"
+    ))
+
+    # Failing primary opens its circuit; calls stop reaching it
+    primary.latency = 0.01
+    primary.fail = True
+    router = ProviderRouter([provider_for(primary), provider_for(fallback)], hedge=False)
+    for i in range(6):
+        router.call("system", f"failover {i}", 10)
+    hits_when_open = primary.hits
+    router.call("system", "while open", 10)
+    results.append(check(
+        "circuit opens after repeated failures",
+        router.stats["primary"].state == "open" and primary.hits == hits_when_open
+    ))
+
+    # After the cooldown a probe goes through and closes the circuit again
+    primary.fail = False
+    time.sleep(0.6)
+    answer = router.call("system", "probe", 10)
+    results.append(check(
+        "half-open probe closes the circuit",
+        router.stats["primary"].state == "closed" and answer in ("primary ok", "fallback ok"),
+        f"served by {answer.split()[0]}"
+    ))
+
+    # Everything down -> one clear error
+    primary.fail = fallback.fail = True
+    router = ProviderRouter([provider_for(primary), provider_for(fallback)], hedge=False)
+    try:
+        router.call("system", "all down", 10)
+        results.append(check("all providers failing raises", False))
+    except AllProvidersFailed as e:
+        results.append(check("all providers failing raises", set(e.errors) == {"primary", "fallback"}))
+
+    primary.shutdown()
+    fallback.shutdown()
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checks() else 1)
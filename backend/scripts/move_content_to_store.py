@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+from backend.database import SessionLocal
+from backend.models import Intelligence, CompetitorIntel
+from backend.services import content_store
+
+BATCH_SIZE = 100
+
+def move_content(model, count_records: bool = False):
+    """Move inline content of one table into the compressed content store"""
+    db = SessionLocal()
+    moved = 0
+    saved_bytes = 0
+    
+    try:
+        while True:
+            # Rows leave the filter once moved, so always take the first batch
+            rows = db.query(model).filter(
+                model.content_ref.is_(None)
+            ).order_by(model.id).limit(BATCH_SIZE).all()
+            
+            if not rows:
+                break
+            
+            for row in rows:
+                text = row.content or ""
+                
+                if count_records and row.record_count is None:
+                    try:
+                        data = json.loads(text)
+                        row.record_count = len(data) if isinstance(data, list) else 1
+                    except ValueError:
+                        row.record_count = 1
+                
+                stored = content_store.store_content(row, text)
+                saved_bytes += max(0, stored.length - len(row.content.encode("utf-8")))
+                moved += 1
+            
+            db.commit()
+            print(f"[{model.__tablename__}] Moved {moved} rows...")
+        
+        print(f"✅ {model.__tablename__}: moved {moved} rows, ~{round(saved_bytes / (1024 * 1024), 2)} MB out of the table")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ {model.__tablename__} failed: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    if not content_store.is_persistent():
+        print(f"❌ {os.path.realpath(content_store.CONTENT_STORE_DIR)} is not on a persistent disk - "
+              f"moving content there would lose it on the next deploy. Set UPLOAD_DIR or CONTENT_STORE_DIR.")
+        sys.exit(1)
+    
+    move_content(Intelligence)
+    move_content(CompetitorIntel, count_records=True)
+    print("Run VACUUM FULL intelligence, competitor_intel; to return the space to the OS.")
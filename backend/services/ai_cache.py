@@ -0,0 +1,207 @@
+# backend/services/ai_cache.py
+"""
+Persistent cache for AIProcessor responses.
+
+Entries are keyed by sha256(prompt template version + model + prompt), so
+re-uploading the same file (or refreshing a competitor export with identical
+content) is answered from Postgres instead of the LLM. Entries expire after
+``AI_CACHE_TTL_HOURS`` and the table is trimmed to ``AI_CACHE_MAX_ENTRIES``
+by least-recent access.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from backend.database import SessionLocal
+from backend.models import AICacheEntry
+
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+AI_CACHE_TTL_HOURS = int(os.getenv("AI_CACHE_TTL_HOURS", str(24 * 30)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+
+# Run eviction every N stores rather than on every write
+_EVICT_EVERY = 50
+
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "errors": 0,
+}
+_stores_since_evict = 0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _is_expired(entry: AICacheEntry) -> bool:
+    expires_at = entry.expires_at
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:  # SQLite drops the timezone
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= _now()
+
+
+def _count(name: str, amount: int = 1):
+    with _lock:
+        _stats[name] += amount
+
+
+def make_key(prompt_version: str, model: str, *parts: Any) -> str:
+    """Hash the prompt version, model and prompt parts into a cache key."""
+    h = hashlib.sha256()
+    for part in (prompt_version, model, *parts):
+        h.update(str(part).encode("utf-8", errors="replace"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    """Return the cached response for ``key`` or None on miss/expiry/error."""
+    if not AI_CACHE_ENABLED:
+        return None
+
+    db = SessionLocal()
+    try:
+        entry = db.query(AICacheEntry).filter(AICacheEntry.cache_key == key).first()
+
+        if entry is None or _is_expired(entry):
+            _count("misses")
+            return None
+
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed_at = _now()
+        response = entry.response
+        db.commit()
+
+        _count("hits")
+        return response
+
+    except Exception as e:
+        db.rollback()
+        _count("errors")
+        print(f"[AICache] ⚠️ Lookup failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def put(key: str, prompt_version: str, model: str, response: str):
+    """Store (or refresh) a response. Failures are logged, never raised."""
+    global _stores_since_evict
+
+    if not AI_CACHE_ENABLED or response is None:
+        return
+
+    db = SessionLocal()
+    try:
+        expires_at = _now() + timedelta(hours=AI_CACHE_TTL_HOURS)
+        entry = db.query(AICacheEntry).filter(AICacheEntry.cache_key == key).first()
+
+        if entry:
+            entry.response = response
+            entry.expires_at = expires_at
+            entry.last_accessed_at = _now()
+        else:
+            db.add(AICacheEntry(
+                cache_key=key,
+                prompt_version=prompt_version,
+                model=model,
+                response=response,
+                hit_count=0,
+                expires_at=expires_at,
+            ))
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same key first - theirs is just as good
+            db.rollback()
+
+        _count("stores")
+
+        with _lock:
+            _stores_since_evict += 1
+            should_evict = _stores_since_evict >= _EVICT_EVERY
+            if should_evict:
+                _stores_since_evict = 0
+
+        if should_evict:
+            evict()
+
+    except Exception as e:
+        db.rollback()
+        _count("errors")
+        print(f"[AICache] ⚠️ Store failed: {e}")
+    finally:
+        db.close()
+
+
+def evict() -> int:
+    """Delete expired entries, then trim the table to AI_CACHE_MAX_ENTRIES."""
+    db = SessionLocal()
+    try:
+        removed = db.query(AICacheEntry).filter(
+            AICacheEntry.expires_at <= _now()
+        ).delete(synchronize_session=False)
+
+        total = db.query(AICacheEntry.id).count()
+        overflow = total - AI_CACHE_MAX_ENTRIES
+
+        if overflow > 0:
+            stale_ids = [
+                row.id for row in db.query(AICacheEntry.id)
+                .order_by(AICacheEntry.last_accessed_at.asc())
+                .limit(overflow)
+                .all()
+            ]
+            removed += db.query(AICacheEntry).filter(
+                AICacheEntry.id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+
+        db.commit()
+
+        if removed:
+            _count("evictions", removed)
+            print(f"[AICache] Evicted {removed} entries")
+        return removed
+
+    except Exception as e:
+        db.rollback()
+        _count("errors")
+        print(f"[AICache] ⚠️ Eviction failed: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def stats() -> Dict[str, Any]:
+    """Hit/miss counters for this process plus the current table size."""
+    with _lock:
+        snapshot: Dict[str, Any] = dict(_stats)
+
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+    snapshot["enabled"] = AI_CACHE_ENABLED
+    snapshot["ttl_hours"] = AI_CACHE_TTL_HOURS
+    snapshot["max_entries"] = AI_CACHE_MAX_ENTRIES
+
+    db = SessionLocal()
+    try:
+        snapshot["entries"] = db.query(AICacheEntry.id).count()
+    except Exception:
+        snapshot["entries"] = None
+    finally:
+        db.close()
+
+    return snapshot
@@ -0,0 +1,306 @@
+# backend/services/ai_jobs.py
+"""
+Background AI job queue.
+
+Jobs are persisted in the ``ai_jobs`` table and executed by a small, bounded
+thread pool, so upload endpoints can commit their row and return immediately
+while the (blocking) LLM calls happen off the event loop.
+
+Workers drain the table: when every slot is busy a new job simply stays
+``queued`` and is claimed by the next worker that frees up. A failed attempt
+is re-queued with exponential backoff (``not_before``), so a provider outage
+is not retried within milliseconds. Jobs that were ``running`` when the
+process died are re-queued on startup.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, or_, text, update
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models import AIJob
+from backend.services import ai_telemetry
+
+AI_JOB_WORKERS = max(1, int(os.getenv("AI_JOB_WORKERS", "2")))
+AI_JOB_MAX_ATTEMPTS = max(1, int(os.getenv("AI_JOB_MAX_ATTEMPTS", "2")))
+AI_JOB_RETRY_DELAY_SECONDS = max(0.0, float(os.getenv("AI_JOB_RETRY_DELAY_SECONDS", "30")))
+AI_JOB_RETRY_MAX_DELAY_SECONDS = float(os.getenv("AI_JOB_RETRY_MAX_DELAY_SECONDS", "900"))
+
+JobHandler = Callable[[Session, AIJob], Optional[Dict[str, Any]]]
+FailureHandler = Callable[[Session, AIJob, Exception], None]
+
+_HANDLERS: Dict[str, Tuple[JobHandler, Optional[FailureHandler]]] = {}
+AFTER_COMMIT_KEY = "ai_jobs_after_commit"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(AI_JOB_WORKERS)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt: base delay doubled per failed attempt, capped"""
+    return min(AI_JOB_RETRY_DELAY_SECONDS * 2 ** max(0, attempts - 1), AI_JOB_RETRY_MAX_DELAY_SECONDS)
+
+
+def _due():
+    """Queued jobs whose backoff has elapsed"""
+    return (AIJob.status == "queued") & or_(AIJob.not_before.is_(None), AIJob.not_before <= _now())
+
+
+# -----------------------------------------------------------------------------
+# Registration / enqueue
+# -----------------------------------------------------------------------------
+def job_handler(job_type: str, on_failure: Optional[FailureHandler] = None):
+    """
+    Register ``fn(db, job) -> dict | None`` as the handler for ``job_type``.
+    The handler must not commit; the runner commits its changes together with
+    the job status. ``on_failure`` runs once the job has exhausted its attempts.
+    """
+    def decorator(fn: JobHandler) -> JobHandler:
+        _HANDLERS[job_type] = (fn, on_failure)
+        return fn
+    return decorator
+
+
+def enqueue(
+    db: Session,
+    job_type: str,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> AIJob:
+    """Add a queued job to the session. Call ``dispatch()`` after committing."""
+    job = AIJob(
+        job_type=job_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        payload=payload or {},
+        status="queued",
+        attempts=0,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def after_commit(db: Session, callback: Callable[[], None]):
+    """
+    Run ``callback`` once the runner has committed the handler's changes -
+    for side effects outside the database (deleting files) that must not
+    happen if the job rolls back. Dropped when the job fails.
+    """
+    db.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+def _run_after_commit(db: Session, job: AIJob):
+    for callback in db.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[AIJobs] ⚠️ Post-commit step for job {job.id} failed: {e}")
+
+
+def dispatch() -> bool:
+    """Start a worker if a slot is free. Returns False when all workers are busy."""
+    if not _slots.acquire(blocking=False):
+        return False
+    try:
+        _get_executor().submit(_worker_loop)
+    except Exception:
+        _slots.release()
+        raise
+    return True
+
+
+def ensure_schema():
+    """Add columns introduced after ``ai_jobs`` was first created (PostgreSQL; create_all covers new tables)"""
+    with SessionLocal() as db:
+        if db.get_bind().dialect.name != "postgresql":
+            return
+        db.execute(text("ALTER TABLE ai_jobs ADD COLUMN IF NOT EXISTS not_before TIMESTAMP WITH TIME ZONE"))
+        db.commit()
+
+
+def dispatch_later(delay: float):
+    """``dispatch()`` once ``delay`` seconds have passed (wakes the queue for a backed-off retry)"""
+    timer = threading.Timer(delay, dispatch)
+    timer.daemon = True
+    timer.start()
+
+
+def resume_pending_jobs() -> int:
+    """
+    Re-queue jobs interrupted by a restart and start workers for the backlog.
+    Assumes a single web process owns the queue (Render starter instance).
+    """
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(AIJob)
+            .where(AIJob.status == "running")
+            .values(status="queued")
+        )
+        db.commit()
+        pending = db.query(AIJob.id).filter(AIJob.status == "queued").count()
+        # Retries still backing off when the process stopped
+        next_retry = db.query(func.min(AIJob.not_before)).filter(
+            AIJob.status == "queued", AIJob.not_before > _now()
+        ).scalar()
+    finally:
+        db.close()
+
+    for _ in range(min(pending, AI_JOB_WORKERS)):
+        dispatch()
+    if next_retry is not None:
+        if next_retry.tzinfo is None:
+            next_retry = next_retry.replace(tzinfo=timezone.utc)
+        dispatch_later(max(0.0, (next_retry - _now()).total_seconds()))
+
+    if pending:
+        print(f"[AIJobs] Resumed {pending} pending job(s)")
+    return pending
+
+
+def job_to_dict(job: AIJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "entity_type": job.entity_type,
+        "entity_id": job.entity_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "not_before": job.not_before.isoformat() if job.not_before else None,
+        "result": job.result,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Workers
+# -----------------------------------------------------------------------------
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=AI_JOB_WORKERS,
+                thread_name_prefix="ai-job",
+            )
+        return _executor
+
+
+def _worker_loop():
+    try:
+        while True:
+            job_id = _claim_next()
+            if job_id is None:
+                break
+            _run(job_id)
+    except Exception as e:
+        print(f"[AIJobs] ❌ Worker crashed: {e}")
+        traceback.print_exc()
+    finally:
+        _slots.release()
+
+    # A job enqueued while this worker was exiting found no free slot; pick it up.
+    try:
+        if _has_queued():
+            dispatch()
+    except Exception as e:
+        print(f"[AIJobs] ⚠️ Queue check failed: {e}")
+
+
+def _has_queued() -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(AIJob.id).filter(_due()).first() is not None
+    finally:
+        db.close()
+
+
+def _claim_next() -> Optional[int]:
+    """Atomically move the oldest due queued job to ``running`` and return its id."""
+    db = SessionLocal()
+    try:
+        while True:
+            job_id = db.query(AIJob.id).filter(_due()).order_by(AIJob.id).limit(1).scalar()
+
+            if job_id is None:
+                return None
+
+            claimed = db.execute(
+                update(AIJob)
+                .where(AIJob.id == job_id, AIJob.status == "queued")
+                .values(status="running", started_at=_now(), not_before=None, attempts=AIJob.attempts + 1)
+            ).rowcount
+            db.commit()
+
+            if claimed:
+                return job_id
+    finally:
+        db.close()
+
+
+def _run(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.query(AIJob).filter(AIJob.id == job_id).first()
+        if not job:
+            return
+
+        handler, on_failure = _HANDLERS.get(job.job_type, (None, None))
+
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job.job_type}'")
+
+            with ai_telemetry.caller(f"job:{job.job_type}"):
+                result = handler(db, job)
+
+            job.status = "completed"
+            job.result = result
+            job.error = None
+            job.finished_at = _now()
+            db.commit()
+            print(f"[AIJobs] ✅ Job {job.id} ({job.job_type}) completed")
+            _run_after_commit(db, job)
+
+        except Exception as e:
+            db.info.pop(AFTER_COMMIT_KEY, None)
+            db.rollback()
+            job = db.query(AIJob).filter(AIJob.id == job_id).first()
+            exhausted = (job.attempts or 0) >= AI_JOB_MAX_ATTEMPTS
+
+            job.status = "failed" if exhausted else "queued"
+            job.error = str(e)
+            job.finished_at = _now() if exhausted else None
+            delay = None if exhausted else _retry_delay(job.attempts or 1)
+            job.not_before = _now() + timedelta(seconds=delay) if delay else None
+
+            if exhausted and on_failure:
+                try:
+                    on_failure(db, job, e)
+                except Exception as hook_error:
+                    print(f"[AIJobs] ⚠️ Failure hook for job {job.id} failed: {hook_error}")
+
+            db.commit()
+            print(f"[AIJobs] ❌ Job {job.id} ({job.job_type}) failed (attempt {job.attempts}): {e}"
+                  + (f" - retrying in {delay:.0f}s" if delay else ""))
+            if delay:
+                dispatch_later(delay)
+    finally:
+        db.close()
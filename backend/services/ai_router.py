@@ -0,0 +1,361 @@
+# backend/services/ai_router.py
+"""
+Latency-aware routing across LLM providers.
+
+``ProviderRouter`` keeps per provider/model statistics - EWMA latency, EWMA
+error rate and a window of recent latencies - and uses them to:
+
+* skip providers whose circuit breaker is open (``AI_CIRCUIT_FAILURES``
+  consecutive failures; one probe call is let through after
+  ``AI_CIRCUIT_COOLDOWN_SECONDS``),
+* demote a provider whose error rate is above ``AI_ROUTER_DEMOTE_ERROR_RATE``
+  behind healthier ones, otherwise keeping the configured priority,
+* hedge: when the primary has not answered within its observed p90 latency,
+  fire the next provider too and take whichever answer arrives first.
+
+Providers are plain callables ``(system_prompt, user_prompt, max_tokens) -> str``
+(plus an async twin), so the router can be exercised against fakes.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+EWMA_ALPHA = float(os.getenv("AI_ROUTER_EWMA_ALPHA", "0.2"))
+LATENCY_WINDOW = int(os.getenv("AI_ROUTER_LATENCY_WINDOW", "100"))
+DEMOTE_ERROR_RATE = float(os.getenv("AI_ROUTER_DEMOTE_ERROR_RATE", "0.5"))
+# Error rate also decays with time, so a demoted provider that gets no traffic recovers
+ERROR_RATE_HALF_LIFE_SECONDS = float(os.getenv("AI_ROUTER_ERROR_HALF_LIFE_SECONDS", "120"))
+
+CIRCUIT_FAILURES = max(1, int(os.getenv("AI_CIRCUIT_FAILURES", "5")))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("AI_CIRCUIT_COOLDOWN_SECONDS", "30"))
+
+HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))  # No hedging until p90 is meaningful
+HEDGE_MIN_SECONDS = float(os.getenv("AI_HEDGE_MIN_SECONDS", "1"))
+HEDGE_MAX_SECONDS = float(os.getenv("AI_HEDGE_MAX_SECONDS", "30"))
+
+AI_ROUTER_WORKERS = max(2, int(os.getenv("AI_ROUTER_WORKERS", "16")))
+
+SyncCall = Callable[..., str]  # (system_prompt, user_prompt, max_tokens, **options)
+AsyncCall = Callable[..., Awaitable[str]]
+
+
+class AllProvidersFailed(Exception):
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        detail = "; ".join(f"{name}: {error}" for name, error in errors.items()) or "no providers available"
+        super().__init__(f"All AI providers failed - {detail}")
+
+
+@dataclass
+class Provider:
+    name: str  # provider/model, e.g. "anthropic/claude-sonnet-4-20250514"
+    call: Optional[SyncCall] = None
+    acall: Optional[AsyncCall] = None
+    has_capacity: Optional[Callable[[], bool]] = None  # Hedges never queue behind a saturated provider
+
+
+# -----------------------------------------------------------------------------
+# Per-provider statistics / circuit breaker
+# -----------------------------------------------------------------------------
+class ProviderStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.ewma_latency: Optional[float] = None
+        self._error_rate = 0.0
+        self._error_rate_at = time.monotonic()
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.calls += 1
+            self.ewma_latency = latency if self.ewma_latency is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+            )
+            self._set_error_rate(self.error_rate * (1 - EWMA_ALPHA))
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self._set_error_rate(EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate)
+            self.consecutive_failures += 1
+            self.probe_started_at = None
+            if self.consecutive_failures >= CIRCUIT_FAILURES:
+                self.opened_at = time.monotonic()
+
+    @property
+    def error_rate(self) -> float:
+        age = time.monotonic() - self._error_rate_at
+        return self._error_rate * 0.5 ** (age / ERROR_RATE_HALF_LIFE_SECONDS)
+
+    def _set_error_rate(self, value: float):
+        self._error_rate = value
+        self._error_rate_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < CIRCUIT_COOLDOWN_SECONDS:
+            return "open"
+        return "half_open"
+
+    def is_available(self) -> bool:
+        return self.state != "open"
+
+    def try_acquire(self) -> bool:
+        """Permission to call now; a half-open circuit admits one probe at a time."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "open":
+                return False
+            now = time.monotonic()
+            # A probe that never reported back (e.g. a cancelled hedge) expires after a cooldown
+            if self.probe_started_at is not None and now - self.probe_started_at < CIRCUIT_COOLDOWN_SECONDS:
+                return False
+            self.probe_started_at = now
+            return True
+
+    def p90(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[int(0.9 * (len(samples) - 1))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging this provider (None until enough samples)."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return min(max(self.p90(), HEDGE_MIN_SECONDS), HEDGE_MAX_SECONDS)
+
+    def snapshot(self) -> Dict:
+        p90 = self.p90()
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 4),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "p90_latency_ms": round(p90 * 1000, 1) if p90 is not None else None,
+        }
+
+
+# -----------------------------------------------------------------------------
+# Router
+# -----------------------------------------------------------------------------
+class ProviderRouter:
+    def __init__(self, providers: List[Provider], hedge: bool = HEDGE_ENABLED):
+        self.providers = list(providers)
+        self.stats = {p.name: ProviderStats(p.name) for p in self.providers}
+        self.hedge = hedge
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+    def plan(self) -> List[Provider]:
+        """Providers in call order: configured priority, high error rates demoted, open circuits skipped."""
+        ranked = sorted(
+            enumerate(self.providers),
+            key=lambda item: (self.stats[item[1].name].error_rate > DEMOTE_ERROR_RATE, item[0])
+        )
+        return [p for _, p in ranked if self.stats[p.name].is_available()]
+
+    def snapshot(self) -> Dict:
+        return {
+            "providers": {name: stats.snapshot() for name, stats in self.stats.items()},
+            "order": [p.name for p in self.plan()],
+            "hedging_enabled": self.hedge,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+        }
+
+    def _hedge_delay(self, primary: Provider, queue: List[Provider]) -> Optional[float]:
+        if not self.hedge or not queue:
+            return None
+        fallback = queue[0]
+        if fallback.has_capacity and not fallback.has_capacity():
+            return None
+        return self.stats[primary.name].hedge_delay()
+
+    def _count_hedge(self, won: bool = False):
+        with self._counter_lock:
+            if won:
+                self.hedges_won += 1
+            else:
+                self.hedges_fired += 1
+
+    # -- sync ---------------------------------------------------------------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=AI_ROUTER_WORKERS, thread_name_prefix="ai-route")
+            return self._executor
+
+    def _timed(self, provider: Provider, system_prompt: str, user_prompt: str, max_tokens: int, options: Dict) -> str:
+        stats = self.stats[provider.name]
+        start = time.perf_counter()
+        try:
+            result = provider.call(system_prompt, user_prompt, max_tokens, **options)
+        except Exception:
+            stats.record_failure()
+            raise
+        stats.record_success(time.perf_counter() - start)
+        return result
+
+    def call(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000, **options) -> str:
+        """Call the best available provider; ``options`` are passed through to its call"""
+        queue = [p for p in self.plan() if p.call]
+        errors: Dict[str, str] = {}
+        pending: Dict = {}  # future -> provider
+        hedged: Optional[Provider] = None
+
+        def next_provider() -> Optional[Provider]:
+            while queue:
+                provider = queue.pop(0)
+                if self.stats[provider.name].try_acquire():
+                    return provider
+                errors[provider.name] = "circuit open"
+            return None
+
+        while True:
+            if not pending:
+                provider = next_provider()
+                if provider is None:
+                    raise AllProvidersFailed(errors)
+
+                delay = self._hedge_delay(provider, queue)
+                if delay is None:
+                    # Nothing to hedge with - call inline, fall through to the next provider on failure
+                    try:
+                        result = self._timed(provider, system_prompt, user_prompt, max_tokens, options)
+                        print(f"[AIRouter] ✅ Used {provider.name}")
+                        return result
+                    except Exception as e:
+                        print(f"[AIRouter] ⚠️ {provider.name} failed: {e}")
+                        errors[provider.name] = str(e)
+                        continue
+
+                pending[self._get_executor().submit(
+                    contextvars.copy_context().run, self._timed, provider, system_prompt, user_prompt, max_tokens, options
+                )] = provider
+            else:
+                delay = None
+
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+
+            if not done:
+                primary = next(iter(pending.values()))
+                hedged = next_provider()
+                if hedged is not None:
+                    self._count_hedge()
+                    print(f"[AIRouter] ⏱️ {primary.name} slower than p90 ({delay:.1f}s) - hedging with {hedged.name}")
+                    pending[self._get_executor().submit(
+                        contextvars.copy_context().run, self._timed, hedged, system_prompt, user_prompt, max_tokens, options
+                    )] = hedged
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[AIRouter] ⚠️ {provider.name} failed: {e}")
+                    errors[provider.name] = str(e)
+                    continue
+                if provider is hedged:
+                    self._count_hedge(won=True)
+                print(f"[AIRouter] ✅ Used {provider.name}")
+                return result  # A slower loser finishes in the background and still updates its stats
+
+    # -- async --------------------------------------------------------------
+    async def _atimed(self, provider: Provider, system_prompt: str, user_prompt: str, max_tokens: int, options: Dict) -> str:
+        stats = self.stats[provider.name]
+        start = time.perf_counter()
+        try:
+            result = await provider.acall(system_prompt, user_prompt, max_tokens, **options)
+        except Exception:
+            stats.record_failure()
+            raise
+        stats.record_success(time.perf_counter() - start)
+        return result
+
+    async def acall(self, system_prompt: str, user_prompt: str, max_tokens: int = 1000, **options) -> str:
+        queue = [p for p in self.plan() if p.acall]
+        errors: Dict[str, str] = {}
+        pending: Dict = {}  # task -> provider
+        hedged: Optional[Provider] = None
+
+        def next_provider() -> Optional[Provider]:
+            while queue:
+                provider = queue.pop(0)
+                if self.stats[provider.name].try_acquire():
+                    return provider
+                errors[provider.name] = "circuit open"
+            return None
+
+        def launch(provider: Provider):
+            task = asyncio.ensure_future(self._atimed(provider, system_prompt, user_prompt, max_tokens, options))
+            pending[task] = provider
+
+        try:
+            while True:
+                delay = None
+                if not pending:
+                    provider = next_provider()
+                    if provider is None:
+                        raise AllProvidersFailed(errors)
+                    launch(provider)
+                    delay = self._hedge_delay(provider, queue)
+
+                done, _ = await asyncio.wait(list(pending), timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    primary = next(iter(pending.values()))
+                    hedged = next_provider()
+                    if hedged is not None:
+                        self._count_hedge()
+                        print(f"[AIRouter] ⏱️ {primary.name} slower than p90 ({delay:.1f}s) - hedging with {hedged.name}")
+                        launch(hedged)
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"[AIRouter] ⚠️ {provider.name} failed: {e}")
+                        errors[provider.name] = str(e)
+                        continue
+                    if provider is hedged:
+                        self._count_hedge(won=True)
+                    print(f"[AIRouter] ✅ Used {provider.name}")
+                    return result
+        finally:
+            # The loser of a hedge is cancelled rather than left running
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,426 @@
+# backend/services/ai_telemetry.py
+"""
+Per-call telemetry for LLM traffic.
+
+Two levels are recorded:
+
+- provider calls (one per SDK request, including hedged and failed
+  attempts): provider, model, caller, operation, wall time, input/output
+  tokens from the SDK ``usage`` fields and estimated cost;
+- AI requests (one per ``AIProcessor`` cached call): end-to-end time, how it
+  was served (cache / coalesced / provider / error) and the provider route
+  it took, e.g. ``anthropic>openai`` for a fallback or hedge.
+
+The caller is a context variable: HTTP requests are tagged with their route
+template by the ``tag_caller`` router dependency, job workers with
+``job:<type>``. Everything lands in an in-memory registry exported as
+Prometheus text (``GET /metrics``). When ``AI_TELEMETRY_ROLLUP_SECONDS`` is
+set, provider-call totals are also written to ``ai_call_rollups``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+
+AI_TELEMETRY_ROLLUP_SECONDS = int(os.getenv("AI_TELEMETRY_ROLLUP_SECONDS", "0"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+# USD per million tokens (input, output); longest matching model prefix wins
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "claude-opus-4": (15.00, 75.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+# e.g. AI_MODEL_PRICES='{"gpt-4o-mini": [0.15, 0.6]}'
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("AI_MODEL_PRICES", "{}")).items()})
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for unknown models)"""
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    if not matches:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[max(matches, key=len)]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_label_text(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, match: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """Bucket-interpolated quantile over the series matching ``match``"""
+        counts = [0] * len(self.buckets)
+        total = 0
+        for labels, (bucket_counts, _, count) in self.series.items():
+            if match and any(labels[self.labels.index(k)] != v for k, v in match.items()):
+                continue
+            counts = [a + b for a, b in zip(counts, bucket_counts)]
+            total += count
+        if not total:
+            return None
+
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]  # Above the last bucket
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (bucket_counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {count}")
+        return lines
+
+
+_lock = threading.Lock()
+
+PROVIDER_LABELS = ("provider", "model", "caller", "operation")
+
+provider_call_seconds = Histogram(
+    "ai_provider_call_seconds", "Wall time of one LLM SDK call",
+    PROVIDER_LABELS + ("outcome",)
+)
+provider_tokens = Counter(
+    "ai_provider_tokens_total", "Tokens reported by the provider SDK usage fields",
+    PROVIDER_LABELS + ("direction",)
+)
+provider_cost = Counter(
+    "ai_provider_cost_usd_total", "Estimated LLM spend in USD",
+    PROVIDER_LABELS
+)
+request_seconds = Histogram(
+    "ai_request_seconds", "End-to-end time of an AI request including cache and queueing",
+    ("caller", "operation", "source")
+)
+requests_total = Counter(
+    "ai_requests_total", "AI requests by how they were served and the provider route taken",
+    ("caller", "operation", "source", "route")
+)
+
+structured_output_total = Counter(
+    "ai_structured_output_total", "Structured responses by schema and outcome (valid, repaired, retried, failed)",
+    ("schema", "result")
+)
+
+METRICS = (provider_call_seconds, provider_tokens, provider_cost, request_seconds, requests_total, structured_output_total)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------------------------------------
+# Context
+# -----------------------------------------------------------------------------
+current_caller: ContextVar[str] = ContextVar("ai_caller", default="unattributed")
+
+
+@dataclass
+class RequestTrace:
+    operation: str
+    source: Optional[str] = None  # cache, coalesced, provider, error
+    attempts: List[str] = field(default_factory=list)  # Providers called, in start order
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("ai_trace", default=None)
+
+
+@contextmanager
+def caller(name: str):
+    """Attribute AI calls made inside the block to ``name``"""
+    token = current_caller.set(name)
+    try:
+        yield
+    finally:
+        current_caller.reset(token)
+
+
+async def tag_caller(request: Request):
+    """Router dependency: attribute AI calls to the matched route template"""
+    route = request.scope.get("route")
+    current_caller.set(f"{request.method} {getattr(route, 'path', request.url.path)}")
+
+
+def operation_name(prompt_version: str) -> str:
+    """'analysis-v1' -> 'analysis'"""
+    return re.sub(r"-v\d+$", "", prompt_version)
+
+
+# -----------------------------------------------------------------------------
+# Recording
+# -----------------------------------------------------------------------------
+@dataclass
+class ProviderCall:
+    provider: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def usage(self, input_tokens: Optional[int], output_tokens: Optional[int]):
+        self.input_tokens = input_tokens or 0
+        self.output_tokens = output_tokens or 0
+
+
+@contextmanager
+def provider_call(provider: str, model: str):
+    """Time one SDK call; report token usage through ``call.usage(...)``"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attempts.append(provider)
+
+    call = ProviderCall(provider, model)
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield call
+    except BaseException as e:
+        # Hedge losers are cancelled; abandoned streams are closed with GeneratorExit
+        outcome = "cancelled" if isinstance(e, GeneratorExit) or type(e).__name__ == "CancelledError" else "error"
+        raise
+    finally:
+        _record_provider_call(call, trace, outcome, time.perf_counter() - start)
+
+
+def _record_provider_call(call: ProviderCall, trace: Optional[RequestTrace], outcome: str, seconds: float):
+    labels = (call.provider, call.model, current_caller.get(), trace.operation if trace else "direct")
+    cost = estimate_cost(call.model, call.input_tokens, call.output_tokens)
+
+    with _lock:
+        provider_call_seconds.observe(labels + (outcome,), seconds)
+        if call.input_tokens:
+            provider_tokens.inc(labels + ("input",), call.input_tokens)
+        if call.output_tokens:
+            provider_tokens.inc(labels + ("output",), call.output_tokens)
+        if cost:
+            provider_cost.inc(labels, cost)
+
+        if AI_TELEMETRY_ROLLUP_SECONDS > 0:
+            totals = _rollup.setdefault(labels, [0, 0, 0, 0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += outcome != "ok"
+            totals[2] += call.input_tokens
+            totals[3] += call.output_tokens
+            totals[4] += cost
+            totals[5] += seconds
+
+
+@contextmanager
+def request(prompt_version: str):
+    """Trace one AI request; the caller sets ``trace.source`` when it knows how it was served"""
+    trace = RequestTrace(operation_name(prompt_version))
+    token = _current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    except BaseException:
+        trace.source = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        source = trace.source or "coalesced"
+        labels = (current_caller.get(), trace.operation)
+        with _lock:
+            request_seconds.observe(labels + (source,), time.perf_counter() - start)
+            requests_total.inc(labels + (source, ">".join(trace.attempts) or "-"))
+
+
+def record_structured_output(schema: str, result: str):
+    with _lock:
+        structured_output_total.inc((schema, result))
+
+
+def structured_output_counts() -> Dict[Tuple[str, ...], float]:
+    with _lock:
+        return dict(structured_output_total.values)
+
+
+# -----------------------------------------------------------------------------
+# Summary
+# -----------------------------------------------------------------------------
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def summary() -> Dict:
+    """Per-caller latency quantiles, token totals and spend"""
+    with _lock:
+        callers: Dict[str, Dict] = {}
+        for (caller_name, operation, source), (_, total, count) in request_seconds.series.items():
+            entry = callers.setdefault(caller_name, {"requests": 0, "by_source": {}})
+            entry["requests"] += count
+            entry["by_source"][source] = entry["by_source"].get(source, 0) + count
+
+        for labels, value in provider_tokens.values.items():
+            entry = callers.setdefault(labels[2], {"requests": 0, "by_source": {}})
+            key = f"{labels[4]}_tokens"
+            entry[key] = entry.get(key, 0) + int(value)
+
+        for labels, value in provider_cost.values.items():
+            entry = callers.setdefault(labels[2], {"requests": 0, "by_source": {}})
+            entry["cost_usd"] = entry.get("cost_usd", 0.0) + value
+
+        for caller_name, entry in callers.items():
+            entry["p50_seconds"] = _round(request_seconds.quantile(0.5, {"caller": caller_name}))
+            entry["p99_seconds"] = _round(request_seconds.quantile(0.99, {"caller": caller_name}))
+            entry["cost_usd"] = round(entry.get("cost_usd", 0.0), 4)
+
+        providers = {}
+        for labels in provider_call_seconds.series:
+            provider = labels[0]
+            if provider not in providers:
+                providers[provider] = {
+                    "p50_seconds": _round(provider_call_seconds.quantile(0.5, {"provider": provider})),
+                    "p99_seconds": _round(provider_call_seconds.quantile(0.99, {"provider": provider})),
+                }
+
+    return {
+        "callers": dict(sorted(callers.items(), key=lambda item: -(item[1]["p99_seconds"] or 0))),
+        "providers": providers,
+        "total_cost_usd": round(sum(provider_cost.values.values()), 4),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Rollup table
+# -----------------------------------------------------------------------------
+_rollup: Dict[Tuple[str, ...], List] = {}  # provider labels -> [calls, errors, in, out, cost, seconds]
+_rollup_thread: Optional[threading.Thread] = None
+
+
+def flush_rollup(period_start: Optional[datetime] = None) -> int:
+    """Write accumulated provider-call totals to ai_call_rollups"""
+    from backend.database import SessionLocal
+    from backend.models import AICallRollup
+
+    with _lock:
+        pending = dict(_rollup)
+        _rollup.clear()
+    if not pending:
+        return 0
+
+    period_start = period_start or datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(AICallRollup, [
+            {
+                "period_start": period_start,
+                "period_seconds": AI_TELEMETRY_ROLLUP_SECONDS,
+                "provider": provider,
+                "model": model,
+                "caller": caller_name,
+                "operation": operation,
+                "calls": calls,
+                "errors": errors,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cost_usd": cost,
+                "total_seconds": seconds,
+            }
+            for (provider, model, caller_name, operation), (calls, errors, input_tokens, output_tokens, cost, seconds)
+            in pending.items()
+        ])
+        db.commit()
+        return len(pending)
+    except Exception as e:
+        db.rollback()
+        print(f"[AITelemetry] ⚠️ Rollup write failed: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def _rollup_loop():
+    while True:
+        period_start = datetime.now(timezone.utc)
+        time.sleep(AI_TELEMETRY_ROLLUP_SECONDS)
+        flush_rollup(period_start)
+
+
+def start_rollup_writer():
+    """Start the periodic rollup writer (no-op unless AI_TELEMETRY_ROLLUP_SECONDS > 0)"""
+    global _rollup_thread
+    if AI_TELEMETRY_ROLLUP_SECONDS <= 0 or _rollup_thread is not None:
+        return
+    _rollup_thread = threading.Thread(target=_rollup_loop, name="ai-telemetry-rollup", daemon=True)
+    _rollup_thread.start()
+    print(f"[AITelemetry] ✅ Writing rollups every {AI_TELEMETRY_ROLLUP_SECONDS}s")
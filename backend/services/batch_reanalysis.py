@@ -0,0 +1,476 @@
+# backend/services/batch_reanalysis.py
+"""
+Offline re-analysis of stored intelligence through provider batch APIs.
+
+When the analysis prompts change, every Intelligence / CompetitorIntel row
+whose ``ai_prompt_version`` differs from ``ANALYSIS_PROMPT_VERSION`` needs
+re-analysis. Instead of one synchronous call per row, rows are collected in
+batches, submitted to the Anthropic Message Batches or OpenAI Batch API
+(about half price, no web worker involved), polled until they finish and
+written back with bulk updates.
+
+Progress is checkpointed to a JSON file after every submit and write, so an
+interrupted run resumes by polling the batches it already submitted.
+``FakeBatchProvider`` answers locally for tests and dry runs.
+
+Run it with ``python backend/scripts/batch_reanalyze.py``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from backend.ai_processor import (
+    AIProcessor,
+    ANALYSIS_PROMPT_VERSION,
+    CLAUDE_MODEL,
+    OPENAI_MODEL,
+)
+from backend.models import Intelligence, CompetitorIntel
+from backend.services import content_store, structured_output
+from backend.services.structured_output import AnalysisOutput
+
+BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "500"))
+BATCH_ANALYSIS_CHARS = int(os.getenv("AI_BATCH_ANALYSIS_CHARS", "12000"))
+BATCH_MAX_TOKENS = 600
+DEFAULT_CHECKPOINT = os.path.join(
+    os.path.dirname(__file__), "..", "uploads", "batch_reanalysis", "checkpoint.json"
+)
+
+# custom_id prefix -> model
+TABLES = {
+    "intelligence": Intelligence,
+    "competitor": CompetitorIntel,
+}
+
+
+@dataclass
+class BatchRequest:
+    custom_id: str  # "<table>-<row id>"
+    system_prompt: str
+    user_prompt: str
+    max_tokens: int = BATCH_MAX_TOKENS
+
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+
+# -----------------------------------------------------------------------------
+# Providers
+# -----------------------------------------------------------------------------
+class BatchProvider(ABC):
+    """Submit / poll / fetch interface over a provider's batch API."""
+    name = "base"
+
+    @abstractmethod
+    def submit(self, requests: List[BatchRequest]) -> str:
+        ...
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """One of: in_progress, ended, failed."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        ...
+
+
+class AnthropicBatchProvider(BatchProvider):
+    name = "anthropic"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = CLAUDE_MODEL):
+        from anthropic import Anthropic
+
+        self.client = Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+        self.model = model
+        # Message Batches moved out of beta in later SDK releases
+        self.batches = getattr(self.client.messages, "batches", None) or self.client.beta.messages.batches
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch = self.batches.create(requests=[
+            {
+                "custom_id": r.custom_id,
+                "params": {
+                    "model": self.model,
+                    "max_tokens": r.max_tokens,
+                    "system": r.system_prompt,
+                    "messages": [{"role": "user", "content": r.user_prompt}],
+                    **AIProcessor._claude_schema_options(AnalysisOutput),
+                },
+            }
+            for r in requests
+        ])
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.batches.retrieve(batch_id)
+        return "ended" if batch.processing_status == "ended" else "in_progress"
+
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        for entry in self.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield BatchResult(
+                    entry.custom_id, text=structured_output.anthropic_message_text(entry.result.message)
+                )
+            else:
+                yield BatchResult(entry.custom_id, error=entry.result.type)
+
+
+class OpenAIBatchProvider(BatchProvider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = OPENAI_MODEL):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.model = model
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for r in requests:
+                    f.write(json.dumps({
+                        "custom_id": r.custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "max_tokens": r.max_tokens,
+                            "temperature": 0.7,
+                            "messages": [
+                                {"role": "system", "content": r.system_prompt},
+                                {"role": "user", "content": r.user_prompt},
+                            ],
+                            **AIProcessor._openai_schema_options(AnalysisOutput),
+                        },
+                    }) + "\n")
+            with open(path, "rb") as f:
+                upload = self.client.files.create(file=f, purpose="batch")
+        finally:
+            os.remove(path)
+
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return "ended"
+        if batch.status in ("failed", "expired", "cancelled"):
+            return "failed"
+        return "in_progress"
+
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id, is_error_file in ((batch.output_file_id, False), (batch.error_file_id, True)):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if is_error_file or item.get("error") or response.get("status_code") != 200:
+                    yield BatchResult(item["custom_id"], error=json.dumps(item.get("error") or response.get("body")))
+                    continue
+                content = response["body"]["choices"][0]["message"]["content"]
+                yield BatchResult(item["custom_id"], text=content)
+
+
+def _fake_analysis(request: BatchRequest) -> str:
+    return json.dumps({
+        "summary": f"Batch re-analysis of {request.custom_id}.",
+        "insights": ["Fake batch insight 1", "Fake batch insight 2", "Fake batch insight 3"],
+        "sentiment": "neutral",
+        "priority": "medium",
+    })
+
+
+class FakeBatchProvider(BatchProvider):
+    """Local stand-in: batches finish after ``polls_to_finish`` status checks."""
+    name = "fake"
+
+    def __init__(self, respond: Callable[[BatchRequest], str] = _fake_analysis, polls_to_finish: int = 1):
+        self.respond = respond
+        self.polls_to_finish = polls_to_finish
+        self._batches: Dict[str, Dict] = {}
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch_id = f"fake_{uuid.uuid4().hex[:12]}"
+        self._batches[batch_id] = {"requests": list(requests), "polls": 0}
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return "failed"  # Fake batches do not survive a restart
+        batch["polls"] += 1
+        return "ended" if batch["polls"] >= self.polls_to_finish else "in_progress"
+
+    def results(self, batch_id: str) -> Iterable[BatchResult]:
+        for request in self._batches[batch_id]["requests"]:
+            try:
+                yield BatchResult(request.custom_id, text=self.respond(request))
+            except Exception as e:
+                yield BatchResult(request.custom_id, error=str(e))
+
+
+PROVIDERS = {
+    "anthropic": AnthropicBatchProvider,
+    "openai": OpenAIBatchProvider,
+    "fake": FakeBatchProvider,
+}
+
+
+# -----------------------------------------------------------------------------
+# Checkpoint
+# -----------------------------------------------------------------------------
+@dataclass
+class Checkpoint:
+    path: str
+    provider: str = ""
+    prompt_version: str = ""
+    batches: List[Dict] = field(default_factory=list)  # {batch_id, custom_ids, status, submitted_at}
+    written: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)  # custom_id -> last error (report only)
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        if not os.path.exists(path):
+            return cls(path=path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(path=path, **data)
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {
+            "provider": self.provider,
+            "prompt_version": self.prompt_version,
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+        }
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def pending(self) -> List[Dict]:
+        return [b for b in self.batches if b["status"] == "submitted"]
+
+    def pending_ids(self) -> set:
+        return {cid for b in self.pending() for cid in b["custom_ids"]}
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+def _parse_custom_id(custom_id: str) -> Tuple[str, int]:
+    table, row_id = custom_id.rsplit("-", 1)
+    return table, int(row_id)
+
+
+def _needs_analysis(model):
+    return or_(model.ai_prompt_version.is_(None), model.ai_prompt_version != ANALYSIS_PROMPT_VERSION)
+
+
+def collect_requests(
+    db: Session,
+    tables: Iterable[str],
+    limit: int,
+    exclude: set,
+) -> List[BatchRequest]:
+    """Build analysis requests for up to ``limit`` rows that need (re-)analysis."""
+    requests: List[BatchRequest] = []
+
+    for table in tables:
+        model = TABLES[table]
+        last_id = 0
+        while len(requests) < limit:
+            rows = db.query(model).filter(
+                _needs_analysis(model), model.id > last_id
+            ).order_by(model.id).limit(200).all()
+            if not rows:
+                break
+
+            for row in rows:
+                last_id = row.id
+                custom_id = f"{table}-{row.id}"
+                if custom_id in exclude:
+                    continue
+                content = content_store.load_content(row)
+                if not content.strip():
+                    continue
+                system_prompt, user_prompt = AIProcessor._analysis_prompts(content, BATCH_ANALYSIS_CHARS)
+                requests.append(BatchRequest(custom_id, system_prompt, user_prompt))
+                if len(requests) >= limit:
+                    break
+
+            db.expunge_all()  # Keep memory flat over large tables
+
+    return requests
+
+
+def write_results(db: Session, results: Iterable[BatchResult], checkpoint: Checkpoint) -> int:
+    """Parse batch results and bulk-update the analyzed rows."""
+    updates: Dict[str, List[Dict]] = {table: [] for table in TABLES}
+    now = datetime.now(timezone.utc)
+
+    for result in results:
+        if result.error is not None:
+            checkpoint.failed[result.custom_id] = result.error
+            continue
+        try:
+            model, repaired = structured_output.validate(result.text, AnalysisOutput)
+        except (ValueError, TypeError, AttributeError) as e:
+            # No repair retry here - the row stays stale and the next run resubmits it
+            structured_output.record(AnalysisOutput, "failed")
+            checkpoint.failed[result.custom_id] = f"Unparseable response: {e}"
+            continue
+        structured_output.record(AnalysisOutput, "repaired" if repaired else "valid")
+        analysis = AIProcessor._normalize_analysis(model.model_dump())
+
+        table, row_id = _parse_custom_id(result.custom_id)
+        if table == "intelligence":
+            updates[table].append({
+                "id": row_id,
+                "ai_summary": analysis["summary"],
+                "ai_insights": analysis["insights"],
+                "sentiment": analysis["sentiment"],
+                "priority": analysis["priority"],
+                "ai_prompt_version": ANALYSIS_PROMPT_VERSION,
+                "updated_at": now,
+            })
+        else:
+            updates[table].append({
+                "id": row_id,
+                "ai_analysis": analysis["summary"],
+                "tags": analysis["insights"],
+                "priority": analysis["priority"],
+                "ai_prompt_version": ANALYSIS_PROMPT_VERSION,
+                "updated_at": now,
+            })
+        checkpoint.failed.pop(result.custom_id, None)
+
+    written = 0
+    for table, mappings in updates.items():
+        if not mappings:
+            continue
+        # Rows deleted since submission are skipped
+        existing = {
+            row_id for (row_id,) in db.query(TABLES[table].id).filter(
+                TABLES[table].id.in_([m["id"] for m in mappings])
+            )
+        }
+        mappings = [m for m in mappings if m["id"] in existing]
+
+        if table == "competitor":
+            # Keep the "N posts analyzed." prefix the upload endpoint writes
+            counts = dict(db.query(CompetitorIntel.id, CompetitorIntel.record_count).filter(
+                CompetitorIntel.id.in_([m["id"] for m in mappings])
+            ))
+            for m in mappings:
+                if counts.get(m["id"]):
+                    m["ai_analysis"] = f"{counts[m['id']]} posts analyzed. {m['ai_analysis']}"
+
+        db.bulk_update_mappings(TABLES[table], mappings)
+        written += len(mappings)
+
+    db.commit()
+    return written
+
+
+def run(
+    db: Session,
+    provider: BatchProvider,
+    checkpoint: Checkpoint,
+    tables: Iterable[str] = tuple(TABLES),
+    limit: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    poll_interval: float = 60,
+    wait: bool = True,
+    log: Callable[[str], None] = print,
+) -> Dict:
+    """
+    Submit every row needing analysis (up to ``limit``), then poll and write
+    results back. With ``wait=False`` it submits, checkpoints and returns; a
+    later run picks the submitted batches up again.
+    """
+    if checkpoint.pending() and checkpoint.provider and checkpoint.provider != provider.name:
+        raise ValueError(
+            f"Checkpoint has batches pending on '{checkpoint.provider}' - resume with that provider"
+        )
+    checkpoint.provider = provider.name
+    checkpoint.prompt_version = ANALYSIS_PROMPT_VERSION
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        # Rows that failed before are retried; ``failed`` only reports the latest error
+        requests = collect_requests(db, tables, size, exclude=checkpoint.pending_ids())
+        if not requests:
+            break
+        for request in requests:
+            checkpoint.failed.pop(request.custom_id, None)
+
+        batch_id = provider.submit(requests)
+        checkpoint.batches.append({
+            "batch_id": batch_id,
+            "custom_ids": [r.custom_id for r in requests],
+            "status": "submitted",
+            "submitted_at": datetime.now(timezone.utc).isoformat(),
+        })
+        checkpoint.save()
+        log(f"[BatchReanalysis] ✅ Submitted batch {batch_id} ({len(requests)} rows)")
+
+        if remaining is not None:
+            remaining -= len(requests)
+        if len(requests) < size:
+            break
+
+    while wait and checkpoint.pending():
+        for batch in checkpoint.pending():
+            state = provider.status(batch["batch_id"])
+            if state == "in_progress":
+                continue
+            if state == "failed":
+                batch["status"] = "failed"
+                log(f"[BatchReanalysis] ❌ Batch {batch['batch_id']} failed - its rows stay queued for the next run")
+            else:
+                written = write_results(db, provider.results(batch["batch_id"]), checkpoint)
+                checkpoint.written += written
+                batch["status"] = "written"
+                log(f"[BatchReanalysis] ✅ Batch {batch['batch_id']} written ({written} rows)")
+            checkpoint.save()
+
+        if checkpoint.pending():
+            time.sleep(poll_interval)
+
+    return {
+        "provider": provider.name,
+        "prompt_version": ANALYSIS_PROMPT_VERSION,
+        "batches": len(checkpoint.batches),
+        "pending_batches": len(checkpoint.pending()),
+        "written": checkpoint.written,
+        "failed": len(checkpoint.failed),
+    }
@@ -0,0 +1,207 @@
+# backend/services/bulk_upsert.py
+"""
+Set-based upserts for CSV imports.
+
+``upsert`` writes pre-aggregated rows with one
+``INSERT ... ON CONFLICT (key) DO UPDATE`` statement executed over batches of
+parameter sets (executemany - SQLAlchemy packs them into multi-row VALUES
+where the driver allows), instead of a SELECT plus INSERT/UPDATE per CSV row.
+The statement is compiled once per call, not once per batch. PostgreSQL
+(production) and SQLite (local dev) are supported through their SQLAlchemy
+dialect ``insert`` constructs.
+
+``copy_upsert`` is the fast path for very large imports on PostgreSQL with
+psycopg 3: rows are streamed with the COPY protocol into a temp staging
+table and merged with a single ``INSERT ... SELECT DISTINCT ON (key) ...
+ON CONFLICT DO UPDATE``, so the import is bounded by disk throughput rather
+than round trips. Other databases/drivers fall back to ``upsert``.
+
+Rows within one ``upsert`` call must be unique on the conflict key
+(PostgreSQL rejects a statement that updates the same row twice), so
+importers aggregate first. ``copy_upsert`` de-duplicates itself (last row wins).
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import column, func, select, table as table_clause
+from sqlalchemy.orm import Session
+
+UPSERT_BATCH_SIZE = 1000
+COPY_PROGRESS_ROWS = 50000
+
+# Keys per existing-row lookup (SQLite builds before 3.32 allow 999 bind parameters)
+MAX_LOOKUP_KEYS = {"postgresql": 10000, "sqlite": 999}
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+    method: str = "executemany"
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+
+def _dialect_insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Bulk upsert is not supported on {dialect}")
+    return insert
+
+
+def _on_conflict_update(stmt, table, key: str, update_columns: List[str], coalesce_columns: Sequence[str]):
+    """``stmt`` with ON CONFLICT (key) DO UPDATE of ``update_columns``.
+
+    ``coalesce_columns`` keep their stored value when the incoming one is NULL.
+    """
+    set_ = {
+        name: func.coalesce(stmt.excluded[name], table.c[name]) if name in coalesce_columns else stmt.excluded[name]
+        for name in update_columns
+    }
+    if "updated_at" in table.c and "updated_at" not in set_:
+        set_["updated_at"] = datetime.now(timezone.utc)
+    return stmt.on_conflict_do_update(index_elements=[key], set_=set_)
+
+
+def upsert(
+    db: Session,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    key: str,
+    update_columns: Optional[List[str]] = None,
+    batch_size: int = UPSERT_BATCH_SIZE,
+    coalesce_columns: Sequence[str] = (),
+) -> UpsertResult:
+    """Insert ``rows`` or update existing rows matching on the unique ``key`` column.
+
+    ``update_columns`` defaults to every supplied column except the key.
+    ``updated_at`` is refreshed on conflict when the model has it; other
+    columns (``created_at``, ids) keep their stored values. The caller commits.
+    """
+    result = UpsertResult()
+    if not rows:
+        return result
+
+    start = time.perf_counter()
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    insert = _dialect_insert(dialect)
+
+    if update_columns is None:
+        update_columns = [c for c in rows[0] if c != key]
+    key_column = table.c[key]
+
+    stmt = _on_conflict_update(insert(table), table, key, update_columns, coalesce_columns)
+
+    batch_size = max(1, min(batch_size, MAX_LOOKUP_KEYS[dialect]))
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+
+        # Existing keys tell inserts from updates for the import summary
+        keys = [row[key] for row in batch]
+        existing = set(db.execute(select(key_column).where(key_column.in_(keys))).scalars())
+
+        db.execute(stmt, list(batch))
+
+        result.updated += len(existing)
+        result.inserted += len(batch) - len(existing)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# -----------------------------------------------------------------------------
+# COPY into staging + set-based merge (PostgreSQL / psycopg 3)
+# -----------------------------------------------------------------------------
+def _copy_connection(db: Session):
+    """Raw psycopg 3 connection of the session's transaction, or None when COPY is unavailable"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    raw = db.connection().connection.dbapi_connection
+    # psycopg 3 cursors have copy(); psycopg2 uses copy_expert and takes the portable path
+    with raw.cursor() as cursor:
+        return raw if hasattr(cursor, "copy") else None
+
+
+def copy_upsert(
+    db: Session,
+    model,
+    rows: Iterable[Dict[str, Any]],
+    key: str,
+    columns: List[str],
+    update_columns: Optional[List[str]] = None,
+    coalesce_columns: Sequence[str] = (),
+) -> UpsertResult:
+    """Stream ``rows`` into a staging table with COPY and merge them in one statement.
+
+    ``rows`` may be a generator - it is consumed once, without being held in
+    memory on the COPY path. Duplicate keys resolve to the last row. Same
+    conflict semantics as ``upsert``; the caller commits.
+    """
+    raw = _copy_connection(db)
+    if raw is None:
+        # Portable path: de-duplicate in memory, then executemany
+        deduped: Dict[Any, Dict[str, Any]] = {}
+        for row in rows:
+            deduped[row[key]] = row
+        return upsert(
+            db, model, list(deduped.values()), key,
+            update_columns=update_columns, coalesce_columns=coalesce_columns
+        )
+
+    from sqlalchemy.dialects.postgresql import insert
+
+    start = time.perf_counter()
+    table = model.__table__
+    staging_name = f"_staging_{table.name}"
+    column_list = ", ".join(columns)
+    if update_columns is None:
+        update_columns = [c for c in columns if c != key]
+
+    copied = 0
+    with raw.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging_name} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {staging_name} ADD COLUMN _seq BIGSERIAL")
+        with cursor.copy(f"COPY {staging_name} ({column_list}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([row.get(name) for name in columns])
+                copied += 1
+                if copied % COPY_PROGRESS_ROWS == 0:
+                    print(f"[BulkUpsert] Copied {copied} rows into {staging_name}...")
+
+    staging = table_clause(staging_name, *[column(name) for name in columns], column("_seq"))
+    distinct_keys = db.execute(select(func.count(staging.c[key].distinct()))).scalar() or 0
+    existing = db.execute(
+        select(func.count(staging.c[key].distinct())).where(staging.c[key].in_(select(table.c[key])))
+    ).scalar() or 0
+
+    latest = (
+        select(*[staging.c[name] for name in columns])
+        .distinct(staging.c[key])
+        .order_by(staging.c[key], staging.c._seq.desc())
+    )
+    merge = _on_conflict_update(
+        insert(table).from_select(columns, latest), table, key, update_columns, coalesce_columns
+    )
+    db.execute(merge)
+
+    print(f"[BulkUpsert] Merged {copied} staged rows ({distinct_keys} distinct) into {table.name}")
+    return UpsertResult(
+        inserted=distinct_keys - existing,
+        updated=existing,
+        seconds=time.perf_counter() - start,
+        method="copy",
+    )
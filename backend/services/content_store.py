@@ -0,0 +1,275 @@
+# backend/services/content_store.py
+"""
+Content-addressed, compressed storage for large upload content.
+
+Intelligence and CompetitorIntel rows used to keep entire raw uploads in
+their TEXT ``content`` column. Blobs now live under ``UPLOAD_DIR`` (the
+persistent disk on Render, see render.yaml) as ``<sha256>.zst`` (when
+``zstandard`` is installed) or ``<sha256>.gz``; the row keeps the hash in
+``content_ref``, a preview snippet in ``content`` and the byte length in
+``content_length``. Identical uploads share one blob.
+
+In production the store must be on a mounted disk: when it is not (or
+``CONTENT_STORE_PERSISTENT=0``), ``store_content`` keeps the full text in
+the row instead of stripping it to a preview, so a redeploy cannot lose it.
+
+Uploads already spooled to disk go through ``store_file``, which compresses
+straight from the file in chunks rather than from a ``str`` of the whole upload.
+
+Use ``load_content(row)`` to get the full text back - it decompresses on
+demand and falls back to ``row.content`` for rows stored before this module.
+"""
+from __future__ import annotations
+
+import codecs
+import gzip
+import hashlib
+import os
+import tempfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+# Render mounts its persistent disk at <repo>/uploads and exports it as UPLOAD_DIR
+UPLOAD_ROOT = os.getenv(
+    "UPLOAD_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "uploads")
+)
+CONTENT_STORE_DIR = os.getenv("CONTENT_STORE_DIR", os.path.join(UPLOAD_ROOT, "content_store"))
+CONTENT_PREVIEW_CHARS = int(os.getenv("CONTENT_PREVIEW_CHARS", "2000"))
+CONTENT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+_EXTENSIONS = (".zst", ".gz")
+
+
+@dataclass
+class StoredContent:
+    ref: str  # sha256 of the UTF-8 bytes
+    length: int  # uncompressed bytes
+    compressed_length: int
+    preview: str
+
+
+def _on_mounted_disk(path: str) -> bool:
+    """Whether ``path`` lives on a mount other than the root filesystem"""
+    path = os.path.realpath(path)
+    while path != os.path.dirname(path):
+        if os.path.ismount(path):
+            return True
+        path = os.path.dirname(path)
+    return False
+
+
+_persistent: Optional[bool] = None
+
+
+def is_persistent() -> bool:
+    """Whether blobs survive a redeploy (``CONTENT_STORE_PERSISTENT`` overrides the check)"""
+    global _persistent
+    if _persistent is None:
+        override = os.getenv("CONTENT_STORE_PERSISTENT")
+        if override is not None:
+            _persistent = override.strip().lower() in ("1", "true", "yes")
+        elif os.getenv("ENVIRONMENT") != "production":
+            _persistent = True  # Local disks survive restarts
+        else:
+            _persistent = _on_mounted_disk(CONTENT_STORE_DIR)
+    return _persistent
+
+
+def check_persistence():
+    """Startup check: warn loudly when uploads would keep their full content in the database"""
+    if is_persistent():
+        print(f"[ContentStore] ✅ Blobs stored in {os.path.realpath(CONTENT_STORE_DIR)}")
+    else:
+        print(f"[ContentStore] ⚠️ {os.path.realpath(CONTENT_STORE_DIR)} is not on a persistent disk - "
+              f"keeping full content in the database (set UPLOAD_DIR / CONTENT_STORE_DIR to the mounted disk)")
+
+
+def _blob_path(ref: str, ext: str) -> str:
+    return os.path.join(CONTENT_STORE_DIR, ref[:2], ref + ext)
+
+
+def _existing_blob(ref: str) -> Optional[str]:
+    for ext in _EXTENSIONS:
+        path = _blob_path(ref, ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _compress(data: bytes) -> bytes:
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _compressobj(size: int):
+    """Incremental compressor matching ``_compress`` (the zstd frame records ``size`` for ``_decompress``)"""
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=6).compressobj(size=size)
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+
+def _decompress(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required to read " + path)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def put(text: str) -> StoredContent:
+    """Store ``text`` (deduplicated by hash) and return its reference."""
+    data = (text or "").encode("utf-8")
+    ref = hashlib.sha256(data).hexdigest()
+    preview = (text or "")[:CONTENT_PREVIEW_CHARS]
+
+    existing = _existing_blob(ref)
+    if existing:
+        return StoredContent(ref, len(data), os.path.getsize(existing), preview)
+
+    path = _blob_path(ref, ".zst" if ZSTD_AVAILABLE else ".gz")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compressed = _compress(data)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredContent(ref, len(data), len(compressed), preview)
+
+
+def put_file(path: str, preview: str = "", sha256: Optional[str] = None) -> StoredContent:
+    """
+    Store the UTF-8 file at ``path`` like ``put``, reading it in chunks so only
+    one chunk is in memory. ``sha256`` (already known from spooling) skips the
+    read entirely when the blob exists. Raises UnicodeDecodeError for non-UTF-8.
+    """
+    size = os.path.getsize(path)
+    preview = (preview or "")[:CONTENT_PREVIEW_CHARS]
+
+    existing = _existing_blob(sha256) if sha256 else None
+    if existing:
+        return StoredContent(sha256, size, os.path.getsize(existing), preview)
+
+    os.makedirs(CONTENT_STORE_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    compressor = _compressobj(size)
+
+    fd, tmp_path = tempfile.mkstemp(dir=CONTENT_STORE_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out, open(path, "rb") as f:
+            while True:
+                chunk = f.read(CONTENT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                decoder.decode(chunk)  # Validate only; the blob keeps the original bytes
+                digest.update(chunk)
+                out.write(compressor.compress(chunk))
+            decoder.decode(b"", final=True)
+            out.write(compressor.flush())
+
+        ref = digest.hexdigest()
+        existing = _existing_blob(ref)
+        if existing:
+            os.remove(tmp_path)
+            return StoredContent(ref, size, os.path.getsize(existing), preview)
+
+        blob = _blob_path(ref, ".zst" if ZSTD_AVAILABLE else ".gz")
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        compressed_length = os.path.getsize(tmp_path)
+        os.replace(tmp_path, blob)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredContent(ref, size, compressed_length, preview)
+
+
+def get(ref: str) -> Optional[str]:
+    """Decompress and return the content for ``ref`` (None if the blob is missing)."""
+    path = _existing_blob(ref)
+    if not path:
+        return None
+    return _decompress(path).decode("utf-8")
+
+
+def delete_if_unreferenced(db, ref: Optional[str]):
+    """Remove a blob once no Intelligence or CompetitorIntel row points at it."""
+    if not ref:
+        return
+
+    from backend.models import Intelligence, CompetitorIntel
+
+    still_used = (
+        db.query(Intelligence.id).filter(Intelligence.content_ref == ref).first()
+        or db.query(CompetitorIntel.id).filter(CompetitorIntel.content_ref == ref).first()
+    )
+    if still_used:
+        return
+
+    path = _existing_blob(ref)
+    if path:
+        os.remove(path)
+
+
+def store_content(row: Any, text: str) -> StoredContent:
+    """Move ``text`` out of row: blob on disk, reference + preview + length on the row.
+
+    Without a persistent store the full text stays in ``row.content`` (no blob).
+    """
+    if not is_persistent():
+        text = text or ""
+        row.content = text
+        row.content_ref = None
+        row.content_length = len(text.encode("utf-8"))
+        return StoredContent("", row.content_length, row.content_length, text[:CONTENT_PREVIEW_CHARS])
+    return _apply(row, put(text))
+
+
+def store_file(row: Any, path: str, preview: str = "", sha256: Optional[str] = None) -> StoredContent:
+    """``store_content`` for an upload on disk, compressed from ``path`` in chunks.
+
+    ``preview`` is the already-read start of the file. The non-persistent
+    fallback has to read the whole file into ``row.content``.
+    """
+    if not is_persistent():
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return store_content(row, f.read())
+    return _apply(row, put_file(path, preview, sha256))
+
+
+def _apply(row: Any, stored: StoredContent) -> StoredContent:
+    row.content = stored.preview
+    row.content_ref = stored.ref
+    row.content_length = stored.length
+    return stored
+
+
+def load_content(row: Any) -> str:
+    """Full content for a row, decompressing the blob when the row has one."""
+    ref = getattr(row, "content_ref", None)
+    if ref:
+        text = get(ref)
+        if text is not None:
+            return text
+        print(f"[ContentStore] ⚠️ Missing blob {ref} - using stored preview")
+    return row.content or ""
@@ -0,0 +1,153 @@
+# backend/services/csv_import.py
+"""
+Incremental CSV reading for uploaded exports.
+
+Starlette has already spooled the multipart upload (in memory up to 1 MB,
+then on disk). ``open_upload`` sniffs the encoding from the first 64 KB and
+wraps that file in an incremental ``TextIOWrapper``, so ``csv.DictReader``
+decodes and parses one row at a time - memory stays O(row) instead of
+holding the bytes, the decoded string and a ``StringIO`` copy of the file.
+
+Encoding detection: a BOM wins (UTF-8, UTF-16); otherwise UTF-8 if the
+sample decodes cleanly, else Windows-1252 (Excel's default on Windows),
+else Latin-1. Bytes later in the file that are invalid in the sniffed
+encoding (e.g. a cp1252 "é" in an otherwise UTF-8 export) are decoded as
+Windows-1252 rather than failing a large import midway or becoming U+FFFD;
+``CSVUpload.decode_fallbacks`` counts them so imports can report it.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import os
+import threading
+from typing import IO, TYPE_CHECKING, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SNIFF_BYTES = 64 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+FALLBACK_ERRORS = "csv_import_cp1252"
+
+class _FallbackCount(threading.local):
+    """Fallbacks decoded on this thread; CSVUpload reads the delta around each decode"""
+    count = 0
+
+
+_fallbacks = _FallbackCount()
+
+
+def _decode_cp1252(error: UnicodeDecodeError):
+    """Codec error handler: undecodable bytes as Windows-1252 (Latin-1 for its five undefined bytes)"""
+    bad = error.object[error.start:error.end]
+    _fallbacks.count += 1
+    text = "".join(bytes([b]).decode("cp1252", errors="ignore") or chr(b) for b in bad)
+    return text, error.end
+
+
+codecs.register_error(FALLBACK_ERRORS, _decode_cp1252)
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Best encoding for a file starting with ``head``"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            # Incremental decode tolerates a multi-byte character cut at the sample boundary
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+class _CountingLines:
+    """Text lines of a TextIOWrapper, adding the fallbacks decoded for each line to the upload"""
+
+    def __init__(self, upload: "CSVUpload", text: io.TextIOWrapper):
+        self._upload = upload
+        self._next_line = text.__next__
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        before = _fallbacks.count
+        line = self._next_line()
+        if _fallbacks.count != before:
+            self._upload.decode_fallbacks += _fallbacks.count - before
+        return line
+
+
+class CSVUpload:
+    """DictReader over an uploaded file, decoded lazily"""
+
+    def __init__(self, binary: IO[bytes], filename: Optional[str] = None):
+        self.filename = filename
+        self._binary = binary
+        self.decode_fallbacks = 0  # Byte sequences invalid in ``encoding``, decoded as Windows-1252
+
+        binary.seek(0, os.SEEK_END)
+        self.size = binary.tell()
+        binary.seek(0)
+        self.encoding = sniff_encoding(binary.read(SNIFF_BYTES))
+        binary.seek(0)
+
+        self._reader: Optional[csv.DictReader] = None
+
+    @property
+    def reader(self) -> csv.DictReader:
+        if self._reader is None:
+            text = io.TextIOWrapper(self._binary, encoding=self.encoding, errors=FALLBACK_ERRORS, newline="")
+            self._reader = csv.DictReader(_CountingLines(self, text))
+        return self._reader
+
+    def read_frame(self) -> "pd.DataFrame":
+        """The whole file as a DataFrame of strings, for columnar imports.
+
+        Uses the multithreaded pyarrow CSV engine when pyarrow is installed,
+        else pandas' C engine. Empty cells are kept as "" rather than NaN.
+        """
+        import pandas as pd
+
+        options = dict(dtype=str, keep_default_na=False, encoding=self.encoding)
+        try:
+            import pyarrow  # noqa: F401
+            self._binary.seek(0)
+            return pd.read_csv(self._binary, engine="pyarrow", **options)
+        except (ImportError, ValueError, UnicodeDecodeError):
+            # pyarrow has no error handlers - invalid bytes take this path too
+            before = _fallbacks.count
+            self._binary.seek(0)
+            try:
+                return pd.read_csv(self._binary, engine="c", encoding_errors=FALLBACK_ERRORS, **options)
+            finally:
+                self.decode_fallbacks += _fallbacks.count - before
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return self.reader.fieldnames or []
+
+    @property
+    def bytes_read(self) -> int:
+        """Bytes consumed from the upload so far (the whole size once the reader is exhausted)"""
+        if self._binary.closed:
+            return self.size
+        return min(self._binary.tell(), self.size)
+
+
+def open_upload(file) -> CSVUpload:
+    """``CSVUpload`` for a FastAPI ``UploadFile`` (already spooled by the framework)"""
+    return CSVUpload(file.file, file.filename)
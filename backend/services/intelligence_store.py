@@ -9,6 +9,8 @@ import datetime as dt
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .date_parsing import DateColumnParser, ISO_FORMAT, infer_columns
+
 # --------------------------------------------------------------------------------------
 # Paths / DB
 # --------------------------------------------------------------------------------------
@@ -119,19 +121,7 @@ def insert_benchmarks(rows: Iterable[Dict[str,Any]]) -> int:
 def _norm(s: Optional[str]) -> str:
     return (s or "").strip().lower()
 
-def _parse_date_maybe(s: Optional[str]) -> Optional[str]:
-    if not s:
-        return None
-    s = s.strip()
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%d-%b-%Y"):
-        try:
-            return dt.datetime.strptime(s, fmt).date().isoformat()
-        except Exception:
-            pass
-    try:
-        return dt.date.fromisoformat(s).isoformat()
-    except Exception:
-        return None
+GENERIC_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%d-%b-%Y", ISO_FORMAT)
 
 def _import_generic(csv_path: Path) -> Dict[str,Any]:
     brands, competitors, bms = {}, {}, []
@@ -146,7 +136,15 @@ def _import_generic(csv_path: Path) -> Dict[str,Any]:
                         return (row[k] or "").strip()
             return ""
 
-        for row in rdr:
+        # Same header pick() resolves for AsOf, so the format is inferred from that column's head
+        asof_header = next(
+            (k for n in ("AsOf", "Date", "as_of", "date") for k in (rdr.fieldnames or []) if _norm(k) == _norm(n)),
+            None
+        )
+        parse_asof = DateColumnParser(GENERIC_DATE_FORMATS)
+        rows = infer_columns(rdr, {asof_header: parse_asof}) if asof_header else rdr
+
+        for row in rows:
             b      = pick(row, "Brand")
             c      = pick(row, "Competitor")
             metric = pick(row, "Metric")
@@ -161,7 +159,7 @@ def _import_generic(csv_path: Path) -> Dict[str,Any]:
                 competitors.setdefault(c, {"name": c, "notes": notes})
 
             if metric and (b or c) and value:
-                when = _parse_date_maybe(asof) or dt.date.today().isoformat()
+                when = parse_asof.iso_date(asof) or dt.date.today().isoformat()
                 bms.append({"metric": metric, "subject": b or c, "value": value, "as_of": when})
 
     with _cx() as cx:
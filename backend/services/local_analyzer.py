@@ -0,0 +1,307 @@
+# backend/services/local_analyzer.py
+"""
+Deterministic, CPU-only content analysis - no network, no API keys.
+
+Produces the same shape as ``AIProcessor.analyze`` (summary, insights,
+sentiment, priority) in a few milliseconds:
+
+- summary: extractive TextRank - sentences ranked by PageRank over their
+  TF-IDF cosine-similarity graph, top sentences kept in document order;
+- insights: top keywords, hashtags, price points and attention terms;
+- sentiment: lexicon scoring with a 3-token negation window;
+- priority: urgency terms weighed against the sentiment.
+
+Uploads get this as an instant first pass while the LLM job runs, and it is
+the fallback when no provider is configured or every provider fails.
+Results carry ``prompt_version = LOCAL_ANALYSIS_VERSION`` so batch
+re-analysis replaces them with an LLM analysis later.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+LOCAL_ANALYSIS_VERSION = "local-v1"
+LOCAL_ANALYSIS_MAX_CHARS = int(os.getenv("LOCAL_ANALYSIS_MAX_CHARS", "50000"))
+MAX_SENTENCES = 400
+SUMMARY_SENTENCES = 3
+SUMMARY_SENTENCE_CHARS = 300
+DAMPING = 0.85
+
+WORD_RE = re.compile(r"[a-z][a-z'\-]+")
+HASHTAG_RE = re.compile(r"#[A-Za-z0-9_]{2,}")
+PRICE_RE = re.compile(r"\$\s?(\d{1,5}(?:,\d{3})*(?:\.\d{2})?)")
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+# String values of text-bearing keys in JSON exports (captions, titles, ...)
+JSON_TEXT_RE = re.compile(r'"(?:caption|text|title|description|body|content|review|comment)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just let me more most my myself no nor not now of
+off on once only or other our ours ourselves out over own same she should so some such than that the their theirs
+them themselves then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves get got one two new via per like
+us it's i'm we're don't can't won't via amp http https www com
+""".split())
+
+POSITIVE = frozenset("""
+amazing awesome best better boost clean cool crushing dope excellent excited exciting fire fresh gain gained gains
+glad good great grew growing growth happy hit hot hype hyped impressive improve improved improving increase
+increased innovative iconic legendary love loved loving nice opportunity outperform outperformed popular positive
+premium profit profitable quality rising record recommend sold-out solid strong stronger success successful
+superb top trending up upside viral win winning wins wow
+""".split())
+
+NEGATIVE = frozenset("""
+angry awful bad broken cheap complaint complaints concern concerns damaged decline declined declining decrease
+decreased delay delayed delays disappointed disappointing down dropped dropping expensive fail failed failing
+failure fake flop hate issue issues lag lagging lose losing loss losses negative overpriced poor problem problems
+refund refunds return returns risk risky scam slow slowing slump terrible threat threats ugly unhappy weak weaker
+worse worst wrong
+""".split())
+
+NEGATIONS = frozenset("""
+not no never none nobody nothing neither nor without hardly barely isn't aren't wasn't weren't don't doesn't
+didn't won't can't couldn't shouldn't
+""".split())
+
+URGENT = frozenset("""
+urgent urgently immediately asap critical decline declining dropped lawsuit recall threat threats churn
+outage counterfeit counterfeits lose losing loss losses undercut undercutting deadline
+""".split())
+
+
+# -----------------------------------------------------------------------------
+# Text preparation
+# -----------------------------------------------------------------------------
+def _readable_text(content: str) -> Tuple[str, Optional[Dict]]:
+    """Prose to analyze, plus table facts when the content is CSV-like."""
+    content = content[:LOCAL_ANALYSIS_MAX_CHARS]
+    stripped = content.lstrip()
+
+    if stripped[:1] in ("[", "{"):
+        values = []
+        for raw in JSON_TEXT_RE.findall(stripped):
+            try:
+                values.append(json.loads(f'"{raw}"'))
+            except ValueError:
+                values.append(raw)
+        if values:
+            return "\n".join(values), None
+
+    lines = stripped.splitlines()
+    if len(lines) >= 3:
+        columns = lines[0].count(",")
+        if columns >= 2 and all(line.count(",") >= columns for line in lines[1:3]):
+            header = [h.strip().strip('"') for h in lines[0].split(",")]
+            table = {"rows": len(lines) - 1, "columns": header}
+            # Prose-like cells (reviews, descriptions) still carry signal
+            cells = [
+                cell.strip().strip('"') for line in lines[1:] for cell in line.split(",")
+                if cell.count(" ") >= 3
+            ]
+            return "\n".join(cells), table
+
+    return content, None
+
+
+def _tokens(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def _sentences(text: str) -> List[str]:
+    sentences = []
+    seen = set()
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        sentence = " ".join(sentence.split())
+        if 4 <= sentence.count(" ") + 1 <= 80 and sentence not in seen:
+            seen.add(sentence)
+            if sentence[-1] not in ".!?":
+                sentence += "."
+            sentences.append(sentence)
+            if len(sentences) >= MAX_SENTENCES:
+                break
+    return sentences
+
+
+# -----------------------------------------------------------------------------
+# Summary (TextRank)
+# -----------------------------------------------------------------------------
+def textrank(sentences: List[str], top_n: int = SUMMARY_SENTENCES) -> List[str]:
+    """Top ``top_n`` sentences by TextRank, in document order"""
+    if len(sentences) <= top_n:
+        return sentences
+
+    import numpy as np
+
+    token_lists = [[t for t in _tokens(s) if t not in STOPWORDS] for s in sentences]
+    vocabulary: Dict[str, int] = {}
+    for tokens in token_lists:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    if not vocabulary:
+        return sentences[:top_n]
+
+    n = len(sentences)
+    tf = np.zeros((n, len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(token_lists):
+        for token, count in Counter(tokens).items():
+            tf[row, vocabulary[token]] = 1 + math.log(count)
+
+    document_frequency = (tf > 0).sum(axis=0)
+    weights = tf * np.log((1 + n) / (1 + document_frequency)).astype(np.float32)
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights /= np.where(norms == 0, 1, norms)
+
+    similarity = weights @ weights.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1 / n), where=out_weight > 0)
+
+    scores = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(50):
+        updated = (1 - DAMPING) / n + DAMPING * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+
+    # Stable tie-break on position so results are deterministic
+    top = sorted(np.lexsort((np.arange(n), -scores))[:top_n])
+    return [sentences[i] for i in top]
+
+
+# -----------------------------------------------------------------------------
+# Sentiment, keywords, priority
+# -----------------------------------------------------------------------------
+def sentiment_scores(tokens: List[str]) -> Tuple[int, int]:
+    """(positive, negative) term counts, flipping terms within 3 tokens after a negation"""
+    if not tokens:
+        return 0, 0
+
+    import numpy as np
+
+    words = np.array(tokens)
+    positive = np.isin(words, list(POSITIVE))
+    negative = np.isin(words, list(NEGATIVE))
+    negation = np.isin(words, list(NEGATIONS)).astype(np.int8)
+    negated = np.convolve(negation, [0, 1, 1, 1])[:len(tokens)] > 0
+
+    pos = int((positive & ~negated).sum() + (negative & negated).sum())
+    neg = int((negative & ~negated).sum() + (positive & negated).sum())
+    return pos, neg
+
+
+def sentiment_label(pos: int, neg: int) -> str:
+    total = pos + neg
+    if total == 0:
+        return "neutral"
+    balance = (pos - neg) / total
+    if pos >= 2 and neg >= 2 and abs(balance) < 0.3:
+        return "mixed"
+    if balance > 0.2:
+        return "positive"
+    if balance < -0.2:
+        return "negative"
+    return "neutral"
+
+
+def keywords(token_lists: List[List[str]], top_n: int = 5) -> List[str]:
+    """Most frequent content words and in-sentence two-word phrases (phrases need 2+ occurrences)"""
+    counts = Counter(t for tokens in token_lists for t in tokens if t not in STOPWORDS and len(t) > 2)
+
+    phrases = Counter(
+        f"{a} {b}" for tokens in token_lists for a, b in zip(tokens, tokens[1:])
+        if a not in STOPWORDS and b not in STOPWORDS and len(a) > 2 and len(b) > 2
+    )
+    for phrase, count in phrases.items():
+        if count >= 2:
+            counts[phrase] = count * 2  # Phrases are more specific than their words
+
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    selected: List[str] = []
+    for term, _ in ranked:
+        # Skip words already covered by a selected phrase
+        if any(term in chosen.split() for chosen in selected):
+            continue
+        selected.append(term)
+        if len(selected) >= top_n:
+            break
+    return selected
+
+
+def _priority(sentiment: str, urgent_terms: List[str], length: int) -> str:
+    if len(urgent_terms) >= 2 or (urgent_terms and sentiment == "negative"):
+        return "high"
+    if not urgent_terms and sentiment in ("neutral", "positive") and length < 300:
+        return "low"
+    return "medium"
+
+
+# -----------------------------------------------------------------------------
+# Entry point
+# -----------------------------------------------------------------------------
+def analyze(content: str) -> Dict:
+    """Summary, insights, sentiment and priority without any network call"""
+    if not content or not content.strip():
+        return {
+            "summary": "No content to summarize",
+            "insights": ["No content to analyze"],
+            "sentiment": None,
+            "priority": "medium"
+        }
+
+    text, table = _readable_text(content)
+    tokens = _tokens(text)
+    sentences = _sentences(text)
+
+    summary_sentences = [
+        s if len(s) <= SUMMARY_SENTENCE_CHARS else s[:SUMMARY_SENTENCE_CHARS].rsplit(" ", 1)[0] + "..."
+        for s in textrank(sentences)
+    ]
+    summary = " ".join(summary_sentences)
+    if table:
+        columns = ", ".join(table["columns"][:8]) + (", ..." if len(table["columns"]) > 8 else "")
+        summary = f"Table with {table['rows']} rows and {len(table['columns'])} columns ({columns}). {summary}".strip()
+    if not summary:
+        summary = " ".join(text.split())[:SUMMARY_SENTENCE_CHARS] or "No readable text found"
+
+    pos, neg = sentiment_scores(tokens)
+    sentiment = sentiment_label(pos, neg)
+    urgent_terms = sorted({t for t in tokens if t in URGENT})
+
+    insights = []
+    themes = keywords([_tokens(s) for s in sentences] or [tokens])
+    if themes:
+        insights.append(f"Key themes: {', '.join(themes)}")
+
+    hashtags = Counter(tag.lower() for tag in HASHTAG_RE.findall(text)).most_common(5)
+    if hashtags:
+        insights.append("Top hashtags: " + ", ".join(f"{tag} ({count})" for tag, count in hashtags))
+
+    prices = sorted({float(p.replace(",", "")) for p in PRICE_RE.findall(text)})
+    if prices:
+        insights.append(
+            f"Price point mentioned: ${prices[0]:,.2f}" if len(prices) == 1
+            else f"Price points mentioned: ${prices[0]:,.2f} - ${prices[-1]:,.2f} ({len(prices)} distinct)"
+        )
+
+    if urgent_terms:
+        insights.append(f"Needs attention: mentions {', '.join(urgent_terms[:4])}")
+
+    if pos or neg:
+        insights.append(f"Tone is {sentiment}: {pos} positive vs {neg} negative terms")
+
+    return {
+        "summary": summary,
+        "insights": insights[:5] or ["No distinctive terms found"],
+        "sentiment": sentiment,
+        "priority": _priority(sentiment, urgent_terms, len(text)),
+        "prompt_version": LOCAL_ANALYSIS_VERSION,
+        "engine": "local"
+    }
@@ -0,0 +1,155 @@
+# backend/services/near_duplicates.py
+"""
+Near-duplicate detection for intelligence uploads (MinHash + LSH).
+
+Each document gets a MinHash signature over word 5-gram shingles. The
+signature is split into ``LSH_BANDS`` bands of ``LSH_ROWS`` values; every band
+is hashed into a bucket and stored in ``intelligence_lsh``. Documents sharing
+any (band, bucket) pair are candidates, and the fraction of equal signature
+values estimates their Jaccard similarity - so finding near-duplicates is an
+indexed lookup instead of a scan over the content column.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from backend.models import Intelligence, IntelligenceLSHBand
+
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_WORDS = 5
+
+# Only the first N characters are shingled - plenty to identify a document
+MAX_SIGNATURE_CHARS = int(os.getenv("MINHASH_MAX_CHARS", "200000"))
+DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_BLOCK = 4096  # Shingles hashed per vectorized block (bounds memory)
+_WORD_RE = re.compile(r"\w+")
+
+_permutations = None
+
+
+def _get_permutations():
+    """Fixed (seeded) hash coefficients so signatures are stable across restarts."""
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+
+        rng = np.random.RandomState(1)
+        a = rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+        b = rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+        _permutations = (a, b)
+    return _permutations
+
+
+def minhash_signature(text: str) -> List[int]:
+    """MinHash signature of ``text`` (empty list when there is nothing to shingle)."""
+    import numpy as np
+
+    words = _WORD_RE.findall((text or "")[:MAX_SIGNATURE_CHARS].lower())
+    if not words:
+        return []
+
+    k = min(SHINGLE_WORDS, len(words))
+    shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+    a, b = _get_permutations()
+    signature = np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+
+    for start in range(0, len(hashes), _BLOCK):
+        block = hashes[start:start + _BLOCK]
+        values = (a[:, None] * block[None, :] + b[:, None]) % _MERSENNE_PRIME
+        np.minimum(signature, values.min(axis=1), out=signature)
+
+    return [int(v) for v in signature]
+
+
+def band_buckets(signature: List[int]) -> List[Tuple[int, str]]:
+    """(band, bucket) pairs for a signature."""
+    pairs = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode("ascii"), digest_size=8)
+        pairs.append((band, digest.hexdigest()))
+    return pairs
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or not sig_b or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def index_document(db: Session, intelligence_id: int, signature: List[int]):
+    """Store an entry's signature bands (replacing any previous ones)."""
+    remove_document(db, intelligence_id)
+    if not signature:
+        return
+    db.add_all([
+        IntelligenceLSHBand(intelligence_id=intelligence_id, band=band, bucket=bucket)
+        for band, bucket in band_buckets(signature)
+    ])
+
+
+def remove_document(db: Session, intelligence_id: int):
+    db.query(IntelligenceLSHBand).filter(
+        IntelligenceLSHBand.intelligence_id == intelligence_id
+    ).delete(synchronize_session=False)
+
+
+def find_similar(
+    db: Session,
+    signature: List[int],
+    threshold: float = 0.5,
+    limit: int = 10,
+    exclude_id: Optional[int] = None,
+    analyzed_only: bool = False,
+) -> List[Tuple[int, float]]:
+    """
+    Entries whose estimated similarity to ``signature`` is at least
+    ``threshold``, most similar first, as (intelligence_id, similarity).
+    """
+    if not signature:
+        return []
+
+    candidates = db.query(IntelligenceLSHBand.intelligence_id).filter(
+        tuple_(IntelligenceLSHBand.band, IntelligenceLSHBand.bucket).in_(band_buckets(signature))
+    ).distinct()
+
+    if exclude_id is not None:
+        candidates = candidates.filter(IntelligenceLSHBand.intelligence_id != exclude_id)
+
+    candidate_ids = [row.intelligence_id for row in candidates.all()]
+    if not candidate_ids:
+        return []
+
+    query = db.query(Intelligence.id, Intelligence.minhash).filter(Intelligence.id.in_(candidate_ids))
+    if analyzed_only:
+        query = query.filter(
+            Intelligence.ai_summary.isnot(None),
+            Intelligence.status.notin_(["analyzing", "analysis_failed"])
+        )
+
+    scored = [
+        (row.id, estimate_similarity(signature, row.minhash or []))
+        for row in query.all()
+    ]
+    scored = [(entry_id, score) for entry_id, score in scored if score >= threshold]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:limit]
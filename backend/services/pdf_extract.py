@@ -0,0 +1,107 @@
+# backend/services/pdf_extract.py
+"""
+PDF text extraction for intelligence uploads.
+
+``extract_pdf_text`` has two modes:
+
+* early stop (``max_chars`` set) - read pages in order until enough text for
+  AI analysis is gathered. This is what runs inside the upload request.
+* full - split the page range across a process pool and join the page texts
+  once at the end. This runs from the background job queue.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+PDF_EXTRACT_WORKERS = max(1, int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))))
+PDF_PREVIEW_CHARS = int(os.getenv("PDF_PREVIEW_CHARS", "5000"))
+
+# Pages handed to one worker at a time; small PDFs are not worth a pool round trip
+PAGES_PER_TASK = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class PdfText:
+    text: str
+    pages_read: int
+    page_count: int
+
+    @property
+    def complete(self) -> bool:
+        return self.pages_read >= self.page_count
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+        return _pool
+
+
+def _page_text(page) -> str:
+    try:
+        return page.extract_text() or ""
+    except Exception as e:
+        print(f"[PDF] ⚠️ Could not extract page text: {e}")
+        return ""
+
+
+def _extract_range(path: str, start: int, end: int) -> List[str]:
+    """Worker entry point: extract pages [start, end) of the PDF at ``path``."""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    return [_page_text(reader.pages[i]) for i in range(start, end)]
+
+
+def extract_pdf_text(path: str, max_chars: Optional[int] = None, workers: Optional[int] = None) -> PdfText:
+    """
+    Extract text from the PDF at ``path``.
+
+    With ``max_chars`` pages are read sequentially and extraction stops as soon
+    as that many characters are available (``complete`` is then False).
+    Without it every page is extracted, in parallel when the document is large
+    enough to benefit (``workers=1`` forces in-process extraction).
+    """
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    page_count = len(reader.pages)
+
+    if max_chars is not None:
+        parts: List[str] = []
+        gathered = 0
+        pages_read = 0
+        for page in reader.pages:
+            text = _page_text(page)
+            parts.append(text)
+            pages_read += 1
+            gathered += len(text)
+            if gathered >= max_chars:
+                break
+        return PdfText(text="\n".join(parts), pages_read=pages_read, page_count=page_count)
+
+    workers = workers or PDF_EXTRACT_WORKERS
+    if workers <= 1 or page_count <= PAGES_PER_TASK:
+        parts = [_page_text(page) for page in reader.pages]
+        return PdfText(text="\n".join(parts), pages_read=page_count, page_count=page_count)
+
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_range, path, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+
+    parts = []
+    for future in futures:
+        parts.extend(future.result())
+
+    return PdfText(text="\n".join(parts), pages_read=page_count, page_count=page_count)
@@ -2,17 +2,22 @@
 Mock scraper service for Crooks & Castles Command Center V2
 This provides placeholder functionality for social media data loading.
 """
+from __future__ import annotations
 
-import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, TYPE_CHECKING
 import json
 from pathlib import Path
 
+if TYPE_CHECKING:
+    import pandas as pd  # Imported on first use - keeps it off the startup path
+
 def load_all_uploaded_frames() -> pd.DataFrame:
     """
     Load all uploaded social media data frames.
     Returns a DataFrame with competitive intelligence data.
     """
+    import pandas as pd
+    
     try:
         # Check for processed data files
         data_dir = Path("data")
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
 from . import intelligence_store as store
+from .date_parsing import DateColumnParser
 
 # ---------- utilities ----------
 
@@ -26,20 +27,8 @@ def _strip_num(s: str | None) -> Optional[str]:
             out.append(ch)
     return "".join(out) if out else None
 
-def _parse_date_maybe(s: str | None) -> Optional[str]:
-    if not s:
-        return None
-    s = s.strip()
-    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%d-%b-%Y"):
-        try:
-            return dt.datetime.strptime(s, fmt).date().isoformat()
-        except Exception:
-            pass
-    # Shopify often uses "Aug 27, 2025"
-    try:
-        return dt.datetime.strptime(s, "%b %d, %Y").date().isoformat()
-    except Exception:
-        return None
+# Shopify often uses "Aug 27, 2025"
+SHOPIFY_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%d-%b-%Y", "%b %d, %Y")
 
 def _header_map(headers: List[str]) -> Dict[str, str]:
     """
@@ -77,8 +66,10 @@ def _import_orders_over_time(csv_path: Path, brand: str) -> Dict[str, Any]:
                 col_orders = v; break
 
     bms = []
+    parse_when = DateColumnParser(SHOPIFY_DATE_FORMATS)
+    parse_when.infer(r.get(col_date) for r in rows)
     for r in rows:
-        when = _parse_date_maybe(r.get(col_date))
+        when = parse_when.iso_date(r.get(col_date))
         if not when:
             continue
         orders = _strip_num(r.get(col_orders)) if col_orders else None
@@ -108,8 +99,10 @@ def _import_total_sales_over_time(csv_path: Path, brand: str) -> Dict[str, Any]:
     col_discts = pick("discounts", "discount amount", "total discounts")
 
     bms = []
+    parse_when = DateColumnParser(SHOPIFY_DATE_FORMATS)
+    parse_when.infer(r.get(col_date) for r in rows)
     for r in rows:
-        when = _parse_date_maybe(r.get(col_date))
+        when = parse_when.iso_date(r.get(col_date))
         if not when:
             continue
         if col_gross:
@@ -151,8 +144,10 @@ def _import_conversion_rate_over_time(csv_path: Path, brand: str) -> Dict[str, A
                 col_conv = v; break
 
     bms = []
+    parse_when = DateColumnParser(SHOPIFY_DATE_FORMATS)
+    parse_when.infer(r.get(col_date) for r in rows)
     for r in rows:
-        when = _parse_date_maybe(r.get(col_date))
+        when = parse_when.iso_date(r.get(col_date))
         if not when:
             continue
         if col_sessions:
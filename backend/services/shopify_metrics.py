@@ -0,0 +1,209 @@
+# backend/services/shopify_metrics.py
+"""
+Columnar import of Shopify analytics exports (sales, conversion, orders
+over time) into ``ShopifyMetric`` daily rows.
+
+The file is read once with pandas (pyarrow engine when installed), currency,
+percentage and count columns are cleaned with vectorized string ops, and
+the derived metrics (AOV, conversion) are computed as NumPy array
+operations. Existing rows in the export's date range are fetched with one
+query and the result is written with one ``bulk_update_mappings`` plus one
+``bulk_insert_mappings`` - there is no unique key on ``period_start`` to
+upsert against.
+
+Merge rules match the old row-by-row importer: each export type overwrites
+only its own columns, a sales export sets revenue and orders, a conversion
+export sets sessions, an orders export fills revenue from orders x AOV when
+none is known, and AOV / conversion are then recomputed from the totals.
+When a date appears more than once in a file the last row wins.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List
+
+from sqlalchemy.orm import Session
+
+from backend.models import ShopifyMetric
+from backend.services.date_parsing import DateColumnParser
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+METRIC_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%b %d, %Y', '%B %d, %Y']
+
+NUMBER_JUNK = r"[$,%\s]"
+METRIC_FIELDS = ("total_orders", "total_revenue", "avg_order_value", "total_sessions", "conversion_rate")
+
+
+@dataclass
+class MetricsImport:
+    rows: int = 0
+    days: int = 0
+    created: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+    exports: Dict[str, bool] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def detect_exports(headers: List[str]) -> Dict[str, bool]:
+    return {
+        "sales": 'Net sales' in headers or 'Total sales' in headers,
+        "conversion": 'Conversion rate' in headers and 'Sessions' in headers,
+        "orders": 'Average order value' in headers and 'Orders' in headers,
+    }
+
+
+def _numbers(frame: "pd.DataFrame", column: str, row_numbers: "np.ndarray", errors: List[str]) -> "pd.Series":
+    """Column as floats ("$1,234.50", "2.5%", "" -> 0); unparseable cells become NaN and are reported"""
+    import pandas as pd
+
+    if column not in frame:
+        return pd.Series(0.0, index=frame.index)
+    raw = frame[column]
+    cleaned = raw.str.replace(NUMBER_JUNK, "", regex=True)
+    numbers = pd.to_numeric(cleaned.mask(cleaned == "", "0"), errors="coerce")
+    for position in (numbers.isna()).to_numpy().nonzero()[0]:
+        errors.append(f"Row {row_numbers[position]}: could not convert {column} '{raw.iloc[position]}' to a number")
+    return numbers
+
+
+def _naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def import_frame(db: Session, frame: "pd.DataFrame") -> MetricsImport:
+    """Merge an analytics export (all cells as strings) into ShopifyMetric; the caller commits"""
+    import numpy as np
+    import pandas as pd
+
+    start = time.perf_counter()
+    result = MetricsImport(rows=len(frame), exports=detect_exports(list(frame.columns)))
+    if frame.empty:
+        return result
+
+    row_numbers = np.arange(len(frame)) + 2  # Spreadsheet row numbers (header is row 1)
+
+    # Date column: "Day", falling back to "Date" per row; skip blanks and comparison-period rows
+    empty = pd.Series("", index=frame.index)
+    day = frame["Day"] if "Day" in frame else empty
+    date = frame["Date"] if "Date" in frame else empty
+    raw_dates = day.where(day.str.strip() != "", date)
+    keep = (raw_dates.str.strip() != "") & ~raw_dates.str.lower().str.contains("previous_period", regex=False)
+
+    # Few distinct dates per file - parse each once
+    unique_dates = raw_dates[keep].unique()
+    parse_day = DateColumnParser(METRIC_DATE_FORMATS)
+    parse_day.infer(unique_dates)
+    parsed = {value: parse_day(value) for value in unique_dates}
+    period_start = raw_dates.map(parsed)
+    unparsed = keep & period_start.isna()
+    for position in unparsed.to_numpy().nonzero()[0]:
+        result.errors.append(f"Row {row_numbers[position]}: Could not parse date '{raw_dates.iloc[position]}'")
+
+    exports = result.exports
+    columns = {}
+    if exports["sales"] or exports["orders"]:
+        columns["orders"] = _numbers(frame, "Orders", row_numbers, result.errors)
+    if exports["sales"]:
+        columns["net_sales"] = _numbers(frame, "Net sales", row_numbers, result.errors)
+    if exports["conversion"]:
+        columns["sessions"] = _numbers(frame, "Sessions", row_numbers, result.errors)
+        columns["conversion"] = _numbers(frame, "Conversion rate", row_numbers, result.errors)
+    if exports["orders"]:
+        columns["aov"] = _numbers(frame, "Average order value", row_numbers, result.errors)
+
+    valid = keep & ~unparsed
+    for values in columns.values():
+        valid &= values.notna()
+
+    # Last row per date wins (plain datetimes - pandas would coerce them to datetime64)
+    positions: Dict[datetime, int] = {}
+    for position, value in enumerate(raw_dates[valid]):
+        positions[_naive(parsed[value])] = position
+    keys: List[datetime] = list(positions)
+    last = np.fromiter(positions.values(), dtype=np.int64, count=len(positions))
+    incoming = {name: values[valid].to_numpy(dtype=float)[last] for name, values in columns.items()}
+    result.days = len(keys)
+    if not keys:
+        result.seconds = time.perf_counter() - start
+        return result
+
+    # Current values for dates already stored (one query over the export's range)
+    existing: Dict[datetime, Dict] = {}
+    rows = db.query(ShopifyMetric.id, ShopifyMetric.period_start, *[getattr(ShopifyMetric, f) for f in METRIC_FIELDS]) \
+        .filter(ShopifyMetric.period_start.between(min(keys), max(keys))) \
+        .order_by(ShopifyMetric.id) \
+        .all()
+    for row in rows:
+        existing.setdefault(_naive(row.period_start), row._asdict())
+
+    def current(name: str) -> "np.ndarray":
+        return np.array([float((existing.get(k) or {}).get(name) or 0) for k in keys])
+
+    orders = current("total_orders")
+    revenue = current("total_revenue")
+    aov = current("avg_order_value")
+    sessions = current("total_sessions")
+    conversion = current("conversion_rate")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if exports["sales"]:
+            orders = np.trunc(incoming["orders"])
+            revenue = incoming["net_sales"]
+            aov = np.where(orders > 0, revenue / orders, 0.0)
+        if exports["conversion"]:
+            sessions = np.trunc(incoming["sessions"])
+            conversion = incoming["conversion"]
+        if exports["orders"]:
+            orders = np.trunc(incoming["orders"])
+            aov = incoming["aov"]
+            revenue = np.where(revenue == 0, orders * aov, revenue)
+
+        aov = np.where((orders > 0) & (revenue > 0), revenue / orders, aov)
+        conversion = np.where((orders > 0) & (sessions > 0), orders / sessions * 100, conversion)
+
+    values = zip(
+        keys,
+        orders.astype(int).tolist(),
+        revenue.tolist(),
+        aov.tolist(),
+        sessions.astype(int).tolist(),
+        conversion.tolist(),
+    )
+    updates, inserts = [], []
+    for key, total_orders, total_revenue, avg_order_value, total_sessions, conversion_rate in values:
+        metrics = {
+            "total_orders": total_orders,
+            "total_revenue": total_revenue,
+            "avg_order_value": avg_order_value,
+            "total_sessions": total_sessions,
+            "conversion_rate": conversion_rate,
+        }
+        if key in existing:
+            updates.append({"id": existing[key]["id"], **metrics})
+        else:
+            inserts.append({
+                "period_type": "daily",
+                "period_start": key,
+                "period_end": key + timedelta(days=1),
+                **metrics,
+            })
+
+    if updates:
+        db.bulk_update_mappings(ShopifyMetric, updates)
+    if inserts:
+        db.bulk_insert_mappings(ShopifyMetric, inserts)
+
+    result.created = len(inserts)
+    result.updated = len(updates)
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,98 @@
+# backend/services/single_flight.py
+"""
+Request coalescing for identical in-flight LLM prompts.
+
+While a call for a key is running, later callers with the same key wait for
+that call's result instead of starting their own. The shared slot is a
+``concurrent.futures.Future``, so thread callers (job workers) and
+async callers (endpoints) coalesce with each other: threads block on
+``result()``, coroutines await ``asyncio.wrap_future``.
+
+Only in-flight calls are shared - a key is forgotten as soon as its call
+completes; persisting results is the response cache's job.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0, "errors": 0}
+
+    def _join_or_lead(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["executed"] += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            if error is not None:
+                self._stats["errors"] += 1
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run ``fn()`` once per key among concurrent callers and share its result."""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async ``do``: ``fn`` returns an awaitable."""
+        future, leader = self._join_or_lead(key)
+        if leader:
+            # Runs as its own task so a cancelled leader does not fail the followers
+            task = asyncio.ensure_future(fn())
+
+            def settle(done: asyncio.Task):
+                if done.cancelled():
+                    self._finish(key, future, error=asyncio.CancelledError())
+                elif done.exception() is not None:
+                    self._finish(key, future, error=done.exception())
+                else:
+                    self._finish(key, future, result=done.result())
+
+            task.add_done_callback(settle)
+            return await asyncio.shield(task)
+
+        # Shielded: a cancelled follower must not cancel the shared future
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalesce_rate"] = round(stats["coalesced"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
+
+
+# Shared by every LLM call path in the process
+llm_calls = SingleFlight("llm")
@@ -0,0 +1,229 @@
+# backend/services/social_prompt.py
+"""
+Statistics-first prompt data for social media analysis.
+
+Instead of pretty-printing the first few raw scrape records, the prompt gets:
+
+1. aggregate statistics computed (vectorized, with pandas) over every record -
+   engagement distributions, top hashtags, posting cadence and top posts;
+2. a stratified sample of compact, field-projected records - drawn evenly
+   across engagement quartiles and sized to a token budget.
+
+Apify Instagram/TikTok field names are mapped onto one small schema, so the
+model never pays for scraper metadata it does not need.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+SOCIAL_PROMPT_TOKENS = int(os.getenv("SOCIAL_PROMPT_TOKENS", "3000"))
+SAMPLE_TEXT_CHARS = 280
+TOP_HASHTAGS = 15
+TOP_POSTS = 5
+
+# Canonical field -> source fields, first non-empty wins
+FIELD_ALIASES = {
+    "text": ("caption", "text", "title", "description"),
+    "likes": ("likesCount", "likeCount", "diggCount", "likes"),
+    "comments": ("commentsCount", "commentCount", "comments"),
+    "shares": ("shareCount", "sharesCount", "shares"),
+    "views": ("videoPlayCount", "playCount", "videoViewCount", "reelsPlayCount", "viewCount", "plays", "views"),
+    "posted_at": ("timestamp", "createTimeISO", "taken_at", "createTime", "date"),
+    "author": ("ownerUsername", "username", "authorMeta.name", "author"),
+    "type": ("type", "productType"),
+    "url": ("url", "webVideoUrl", "postUrl"),
+}
+NUMERIC_FIELDS = ("likes", "comments", "shares", "views")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class SocialDigest:
+    text: str  # Prompt block: statistics followed by sample records
+    total_records: int
+    sampled_records: int
+    estimated_tokens: int
+
+
+def _project(records: List[Dict[str, Any]]):
+    """DataFrame with one column per canonical field."""
+    import pandas as pd
+
+    raw = pd.json_normalize(records, max_level=1)
+    df = pd.DataFrame(index=raw.index)
+
+    for field, sources in FIELD_ALIASES.items():
+        column = None
+        for source in sources:
+            if source not in raw.columns:
+                continue
+            values = raw[source]
+
+            if field in NUMERIC_FIELDS:
+                values = pd.to_numeric(values, errors="coerce")
+            elif field == "posted_at":
+                numeric = pd.to_numeric(values, errors="coerce")
+                if numeric.notna().any():  # epoch seconds (TikTok createTime)
+                    values = pd.to_datetime(numeric, unit="s", utc=True, errors="coerce")
+                else:
+                    values = pd.to_datetime(values, utc=True, errors="coerce")
+            else:
+                values = values.where(values.notna() & (values.astype(str).str.len() > 0))
+
+            column = values if column is None else column.combine_first(values)
+
+        if column is None:
+            column = pd.Series(index=raw.index, dtype="float64" if field in NUMERIC_FIELDS else "object")
+        df[field] = column
+
+    if "hashtags" in raw.columns:
+        df["hashtags"] = raw["hashtags"]
+
+    df["engagement"] = df[["likes", "comments", "shares"]].fillna(0).sum(axis=1)
+    return df
+
+
+def _distribution(series) -> Dict[str, Any]:
+    series = series.dropna()
+    if series.empty:
+        return {}
+    return {
+        "n": int(series.size),
+        "mean": round(float(series.mean()), 1),
+        "median": round(float(series.median()), 1),
+        "p90": round(float(series.quantile(0.9)), 1),
+        "max": round(float(series.max()), 1),
+    }
+
+
+def _hashtag_counts(df) -> Dict[str, int]:
+    import pandas as pd
+
+    tags = df["text"].dropna().astype(str).str.lower().str.findall(r"#\w+").explode()
+    if "hashtags" in df.columns:
+        listed = df["hashtags"].dropna().explode().dropna()
+        listed = listed.map(lambda t: t if isinstance(t, str) else (t.get("name") if isinstance(t, dict) else None))
+        listed = listed.dropna().astype(str).str.lower()
+        listed = listed.where(listed.str.startswith("#"), "#" + listed)
+        tags = pd.concat([tags, listed])
+    tags = tags.dropna()
+    return {tag: int(count) for tag, count in tags.value_counts().head(TOP_HASHTAGS).items()}
+
+
+def _cadence(posted_at) -> Dict[str, Any]:
+    posted_at = posted_at.dropna().sort_values()
+    if posted_at.empty:
+        return {}
+
+    span_days = max((posted_at.iloc[-1] - posted_at.iloc[0]).total_seconds() / 86400, 1)
+    gaps = posted_at.diff().dropna().dt.total_seconds() / 3600
+
+    return {
+        "first_post": posted_at.iloc[0].date().isoformat(),
+        "last_post": posted_at.iloc[-1].date().isoformat(),
+        "posts_per_week": round(posted_at.size / span_days * 7, 1),
+        "median_hours_between_posts": round(float(gaps.median()), 1) if not gaps.empty else None,
+        "busiest_weekdays": posted_at.dt.day_name().value_counts().head(3).index.tolist(),
+        "busiest_hours_utc": [int(h) for h in posted_at.dt.hour.value_counts().head(3).index],
+    }
+
+
+def _compact(row) -> str:
+    record = {}
+    for field in ("author", "type", "likes", "comments", "shares", "views"):
+        value = row.get(field)
+        if value is None or value != value:  # NaN
+            continue
+        record[field] = int(value) if isinstance(value, float) and value.is_integer() else value
+    posted_at = row.get("posted_at")
+    if posted_at is not None and posted_at == posted_at:
+        record["date"] = posted_at.date().isoformat()
+    text = row.get("text")
+    if isinstance(text, str) and text:
+        record["text"] = " ".join(text.split())[:SAMPLE_TEXT_CHARS]
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _stratified_order(df) -> List[int]:
+    """Row positions interleaved across engagement quartiles (highest first)."""
+    import pandas as pd
+
+    try:
+        strata = pd.qcut(df["engagement"].rank(method="first"), q=min(4, len(df)), labels=False)
+    except ValueError:
+        return list(range(len(df)))
+
+    buckets = [
+        df.index[strata == s].tolist()[::-1] for s in sorted(strata.dropna().unique(), reverse=True)
+    ]
+    order = []
+    while any(buckets):
+        for bucket in buckets:
+            if bucket:
+                order.append(bucket.pop())
+    return order
+
+
+def build_social_digest(data: List[Any], token_budget: int = SOCIAL_PROMPT_TOKENS) -> SocialDigest:
+    """Aggregate statistics over all records plus a budgeted stratified sample."""
+    records = [r for r in data if isinstance(r, dict)]
+    if not records:
+        return SocialDigest(text="No records.", total_records=0, sampled_records=0, estimated_tokens=3)
+
+    df = _project(records)
+
+    stats = {
+        "records": len(df),
+        "engagement": {
+            name: dist for name, dist in (
+                ("likes", _distribution(df["likes"])),
+                ("comments", _distribution(df["comments"])),
+                ("shares", _distribution(df["shares"])),
+                ("views", _distribution(df["views"])),
+                ("likes+comments+shares", _distribution(df["engagement"])),
+            ) if dist
+        },
+        "top_hashtags": _hashtag_counts(df),
+        "posting_cadence": _cadence(df["posted_at"]),
+        "content_types": {str(k): int(v) for k, v in df["type"].value_counts().head(5).items()},
+        "accounts": {str(k): int(v) for k, v in df["author"].value_counts().head(5).items()},
+    }
+
+    top = df.nlargest(TOP_POSTS, "engagement")
+    lines = [
+        "AGGREGATE STATISTICS (all records):",
+        json.dumps(stats, separators=(",", ":"), ensure_ascii=False, default=str),
+        "",
+        f"TOP {len(top)} POSTS BY ENGAGEMENT:",
+        *(_compact(row) for _, row in top.iterrows()),
+        "",
+        "REPRESENTATIVE SAMPLE (stratified by engagement):",
+    ]
+    used = estimate_tokens("\n".join(lines))
+
+    sampled = 0
+    top_index = set(top.index)
+    for position in _stratified_order(df):
+        if position in top_index:
+            continue
+        line = _compact(df.loc[position])
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+        sampled += 1
+
+    return SocialDigest(
+        text="\n".join(lines),
+        total_records=len(df),
+        sampled_records=sampled + len(top),
+        estimated_tokens=used,
+    )
@@ -0,0 +1,45 @@
+# backend/services/startup_timing.py
+"""
+Boot-time import timing.
+
+``main.py`` wraps each router import in ``timed(...)`` and calls ``report()``
+from the startup event, so every cold start (deploy or autoscale) logs where
+the time before the first request went and confirms that heavy optional
+dependencies were not pulled in at import.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+_started = time.perf_counter()
+import_times: Dict[str, float] = {}
+
+# Should only load on first use - listed in the report when already imported at boot
+HEAVY_MODULES = ("pandas", "numpy", "PyPDF2", "anthropic", "openai")
+
+
+@contextmanager
+def timed(label: str):
+    """Record how long the block (usually one import) takes"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        import_times[label] = time.perf_counter() - start
+
+
+def report():
+    """Log per-module import times, slowest first"""
+    total = time.perf_counter() - _started
+    print(f"[Startup] ✅ App ready {total * 1000:.0f} ms after main.py started importing")
+    for label, seconds in sorted(import_times.items(), key=lambda item: -item[1]):
+        print(f"[Startup]    {label:<28} {seconds * 1000:8.1f} ms")
+
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    if loaded:
+        print(f"[Startup] ⚠️ Loaded at boot: {', '.join(loaded)}")
+    else:
+        print(f"[Startup] ✅ Deferred until first use: {', '.join(HEAVY_MODULES)}")
@@ -0,0 +1,264 @@
+# backend/services/structured_output.py
+"""
+Schema-validated structured output for LLM calls.
+
+Each JSON-returning prompt has a Pydantic schema. ``AIProcessor`` asks the
+provider for structured output - OpenAI ``response_format`` JSON mode,
+Anthropic forced tool use with the schema as the tool's input schema - and
+validates the response here:
+
+1. markdown fences and surrounding prose are stripped;
+2. JSON cut off by ``max_tokens`` is repaired by closing open strings and
+   brackets, falling back to the last complete element;
+3. if it still fails validation, ``repair_prompt`` builds one targeted
+   retry that quotes the validation error.
+
+Outcomes are counted per schema (valid / repaired / retried / failed) and
+exported through ai_telemetry.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, ValidationError
+
+from backend.services import ai_telemetry
+
+REPAIR_QUOTE_CHARS = 2000
+MAX_REPAIR_CUTS = 50
+
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class StructuredOutputError(ValueError):
+    """Response could not be parsed or validated against its schema"""
+
+
+# -----------------------------------------------------------------------------
+# Schemas
+# -----------------------------------------------------------------------------
+def _text_list(value: Any) -> Any:
+    """Accept a single string or mixed items where a list of strings is expected"""
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [
+            item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+            for item in value if item not in (None, "")
+        ]
+    return value
+
+
+def _text(value: Any) -> Any:
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return value
+
+
+TextList = Annotated[List[str], BeforeValidator(_text_list)]
+Text = Annotated[str, BeforeValidator(_text)]
+
+
+class _Output(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+
+class AnalysisOutput(_Output):
+    """Summary, insights, sentiment and priority of one document"""
+    summary: Text
+    insights: TextList = Field(min_length=1)
+    sentiment: Optional[str] = None
+    priority: Optional[str] = "medium"
+
+
+class InsightsOutput(_Output):
+    """Key insights extracted from content"""
+    insights: TextList = Field(min_length=1)
+
+
+class CompetitiveOutput(_Output):
+    """Competitive intelligence analysis of one competitor"""
+    summary: Text
+    insights: TextList = Field(default_factory=list)
+    strengths: TextList = Field(default_factory=list)
+    opportunities: TextList = Field(default_factory=list)
+
+
+class SocialOutput(_Output):
+    """Findings and recommendations from social media data"""
+    insights: TextList = Field(min_length=1)
+    trending_topics: TextList = Field(default_factory=list)
+    recommendations: TextList = Field(default_factory=list)
+    hashtag_strategy: Text = ""
+    posting_recommendations: Text = ""
+
+
+def tool_spec(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Anthropic tool definition whose input is the schema"""
+    return {
+        "name": schema.__name__,
+        "description": schema.__doc__ or f"Return the {schema.__name__}",
+        "input_schema": schema.model_json_schema(),
+    }
+
+
+def anthropic_message_text(message: Any) -> str:
+    """Response text of a Claude message - the tool input as JSON when it used a tool"""
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use":
+            return json.dumps(block.input, ensure_ascii=False)
+    return message.content[0].text
+
+
+# -----------------------------------------------------------------------------
+# JSON repair
+# -----------------------------------------------------------------------------
+def _closers(stack: List[str]) -> str:
+    return "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def close_truncated_json(text: str) -> Any:
+    """Parse JSON that may have been cut off mid-value.
+
+    Tries closing the open string and brackets as-is, then cuts back to each
+    earlier element boundary (most recent first) until something parses.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []  # (position, open brackets there)
+    in_string = False
+    escape = False
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                # Balanced, so not truncated - just malformed (e.g. a trailing comma)
+                try:
+                    return json.loads(text[:i + 1])
+                except json.JSONDecodeError as e:
+                    raise StructuredOutputError(f"Invalid JSON: {e}") from e
+            cuts.append((i + 1, list(stack)))
+        elif ch == ",":
+            cuts.append((i, list(stack)))
+
+    tail = text + ('"' if in_string else "")
+    tail = tail.rstrip().rstrip(",")
+    if tail.endswith(":"):
+        tail += " null"
+    attempts = [tail + _closers(stack)]
+    attempts += [
+        text[:position].rstrip().rstrip(",") + _closers(open_brackets)
+        for position, open_brackets in reversed(cuts[-MAX_REPAIR_CUTS:])
+    ]
+
+    for attempt in attempts:
+        try:
+            return json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+    raise StructuredOutputError("Truncated JSON could not be repaired")
+
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """(parsed value, whether truncation repair was needed)"""
+    text = FENCE_RE.sub("", (text or "").strip())
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise StructuredOutputError("No JSON object in response")
+    text = text[min(starts):]
+
+    try:
+        # raw_decode tolerates trailing prose after the JSON
+        value, _ = json.JSONDecoder().raw_decode(text)
+        return value, False
+    except json.JSONDecodeError:
+        pass
+    try:
+        return close_truncated_json(text), True
+    except (json.JSONDecodeError, RecursionError) as e:
+        raise StructuredOutputError(f"Invalid JSON: {e}") from e
+
+
+# -----------------------------------------------------------------------------
+# Validation
+# -----------------------------------------------------------------------------
+def _coerce(value: Any, schema: Type[BaseModel]) -> Any:
+    # A bare list where the schema wraps a single list field, e.g. ["a", "b"] -> {"insights": [...]}
+    if isinstance(value, list) and "insights" in schema.model_fields:
+        return {"insights": value}
+    return value
+
+
+def validate(text: str, schema: Type[BaseModel]) -> Tuple[BaseModel, bool]:
+    """(validated model, whether truncation repair was needed); raises StructuredOutputError"""
+    value, repaired = extract_json(text)
+    try:
+        return schema.model_validate(_coerce(value, schema)), repaired
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(p) for p in error['loc']) or 'response'}: {error['msg']}"
+            for error in e.errors()[:5]
+        )
+        raise StructuredOutputError(problems) from e
+
+
+def parse(text: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Validated dict for an already-accepted (e.g. cached) response"""
+    model, _ = validate(text, schema)
+    return model.model_dump()
+
+
+def repair_prompt(user_prompt: str, previous: str, error: Exception) -> str:
+    """User prompt for the single repair retry"""
+    return f"""{user_prompt}
+
+Your previous response could not be used: {error}
+Previous response (may be cut off):
+{(previous or '')[:REPAIR_QUOTE_CHARS]}
+
+Return ONLY the corrected JSON object with every required field. Keep each field concise so the whole object fits."""
+
+
+# -----------------------------------------------------------------------------
+# Stats
+# -----------------------------------------------------------------------------
+RESULTS = ("valid", "repaired", "retried", "failed")
+
+
+def record(schema: Type[BaseModel], result: str):
+    ai_telemetry.record_structured_output(schema.__name__, result)
+
+
+def stats() -> Dict[str, Any]:
+    """Per-schema outcome counts and parse-failure rates"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for (schema_name, result), value in ai_telemetry.structured_output_counts().items():
+        counts.setdefault(schema_name, dict.fromkeys(RESULTS, 0))[result] = int(value)
+
+    report = {}
+    for schema_name, by_result in sorted(counts.items()):
+        total = sum(by_result.values())
+        report[schema_name] = {
+            **by_result,
+            "total": total,
+            # First response unusable (needed the retry or failed outright)
+            "first_try_failure_rate": round((by_result["retried"] + by_result["failed"]) / total, 4) if total else 0.0,
+            "failure_rate": round(by_result["failed"] / total, 4) if total else 0.0,
+        }
+    return report
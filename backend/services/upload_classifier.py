@@ -0,0 +1,205 @@
+# backend/services/upload_classifier.py
+"""
+Single-pass classification of uploaded content.
+
+One Aho-Corasick automaton matches every routing keyword in a single scan of
+a bounded prefix of the upload, and the competitor name comes from parsing
+only the first record - instead of lowercasing the whole upload, running a
+dozen substring scans and ``json.loads``-ing all of it again.
+"""
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+CLASSIFY_PREFIX_CHARS = int(os.getenv("CLASSIFY_PREFIX_CHARS", str(64 * 1024)))
+
+# Checked in order - the first group with any keyword present wins
+CONTENT_RULES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("instagram", "social_media", ("instagram", "followers", "engagement_rate", "post_content")),
+    ("product_data", "product", ("product", "price", "sku", "inventory")),
+    ("marketing", "marketing", ("campaign", "ad_spend", "cpc", "ctr")),
+]
+
+# Record keys -> file_parser source type, in precedence order
+KEY_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("instagram", ("instagram",)),
+    ("tiktok", ("tiktok",)),
+    ("hashtag", ("hashtag", "tag")),
+]
+
+NAME_FIELDS = ("competitor", "brand", "account_name", "username", "company")
+RECORD_NAME_FIELDS = ("competitor", "brand", "account_name", "username")
+FILENAME_PREFIXES = ("instagram", "scrape", "data", "competitor", "intel")
+
+_decoder = json.JSONDecoder()
+
+
+# -----------------------------------------------------------------------------
+# Aho-Corasick automaton
+# -----------------------------------------------------------------------------
+class KeywordMatcher:
+    """Multi-pattern substring matcher (Aho-Corasick) over lowercase text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+
+        for pattern in patterns:
+            self._add(pattern.lower())
+        self._build_failure_links()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].add(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, text: str, stop_on: Optional[Set[str]] = None) -> Set[str]:
+        """
+        Patterns occurring in ``text`` (already lowercased). Scanning stops early
+        once any pattern in ``stop_on`` is seen.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[str] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+                if stop_on and not stop_on.isdisjoint(out[state]):
+                    break
+        return found
+
+
+_content_matcher = KeywordMatcher(kw for _, _, keywords in CONTENT_RULES for kw in keywords)
+_key_matcher = KeywordMatcher(kw for _, keywords in KEY_RULES for kw in keywords)
+_first_rule_keywords = set(CONTENT_RULES[0][2])
+
+
+# -----------------------------------------------------------------------------
+# Classification
+# -----------------------------------------------------------------------------
+@dataclass
+class UploadClassification:
+    source: Optional[str] = None  # instagram, product_data, marketing
+    category: Optional[str] = None  # social_media, product, marketing
+    competitor_name: Optional[str] = None
+
+    @property
+    def is_competitor_data(self) -> bool:
+        return self.source is not None
+
+
+def classify_upload(content: str, filename: str) -> UploadClassification:
+    """Route an upload: competitor data source/category and competitor name."""
+    prefix = (content or "")[:CLASSIFY_PREFIX_CHARS].lower()
+    found = _content_matcher.find(prefix, stop_on=_first_rule_keywords)
+
+    for source, category, keywords in CONTENT_RULES:
+        if found.intersection(keywords):
+            return UploadClassification(
+                source=source,
+                category=category,
+                competitor_name=competitor_name(content, filename),
+            )
+
+    return UploadClassification()
+
+
+def source_type_from_keys(keys: Iterable[str]) -> str:
+    """file_parser source type from the keys of a parsed record."""
+    keys = [str(k).lower() for k in keys]
+    found = _key_matcher.find("\n".join(keys))
+
+    for source_type, keywords in KEY_RULES:
+        if found.intersection(keywords):
+            return source_type
+    return "social_media"
+
+
+# -----------------------------------------------------------------------------
+# Competitor name
+# -----------------------------------------------------------------------------
+def _first_record(content: str):
+    """
+    Parse just the first JSON record: a whole JSON object, the first element
+    of a JSON array, or the first line of JSONL. Returns None for non-JSON.
+    """
+    text = (content or "").lstrip()
+    if not text or text[0] not in "[{":
+        return None
+
+    if text[0] == "[":
+        try:
+            item, _ = _decoder.raw_decode(text[1:CLASSIFY_PREFIX_CHARS].lstrip())
+            return [item]
+        except ValueError:
+            return None
+
+    # A complete first object in the prefix covers JSONL and small documents;
+    # only a single object larger than the prefix needs the full parse
+    try:
+        record, _ = _decoder.raw_decode(text[:CLASSIFY_PREFIX_CHARS])
+        return record
+    except ValueError:
+        pass
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def competitor_name(content: str, filename: str) -> str:
+    """Competitor name from the first record's fields, falling back to the filename."""
+    record = _first_record(content)
+
+    if isinstance(record, dict):
+        for field in NAME_FIELDS:
+            if record.get(field):
+                return str(record[field])
+        profile = record.get("profile")
+        if isinstance(profile, dict) and "username" in profile:
+            return profile["username"]
+
+    if isinstance(record, list) and record and isinstance(record[0], dict):
+        for field in RECORD_NAME_FIELDS:
+            if record[0].get(field):
+                return str(record[0][field])
+
+    return name_from_filename(filename)
+
+
+def name_from_filename(filename: str) -> str:
+    name = filename.replace(".jsonl", "").replace(".json", "").replace(".txt", "")
+    name = name.replace("_", " ").replace("-", " ")
+
+    for prefix in FILENAME_PREFIXES:
+        name = name.replace(prefix, "").strip()
+
+    return name.title() if name else "Unknown Competitor"
@@ -0,0 +1,231 @@
+# backend/services/uploads.py
+"""
+Streaming upload helper shared by the intelligence, competitive and media
+routers.
+
+``spool_upload`` copies the request body to its destination in fixed-size
+chunks, hashing and counting bytes on the way, so an upload never has to be
+held in memory. The returned ``SpooledUpload`` is backed by the file on disk
+and lets parsers read it lazily - ``iter_records`` walks JSON / JSONL / CSV
+records one at a time, so counting a 250 MB export keeps memory flat.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Any, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "250")) * 1024 * 1024)
+RECORD_EXTENSIONS = (".json", ".jsonl", ".csv")
+# Text handed to the classifier, MinHash and analyzers - covers MINHASH_MAX_CHARS,
+# CLASSIFY_PREFIX_CHARS and LOCAL_ANALYSIS_MAX_CHARS
+ANALYSIS_PREFIX_CHARS = int(os.getenv("UPLOAD_ANALYSIS_CHARS", "200000"))
+
+
+@dataclass
+class SpooledUpload:
+    """An upload that has been streamed to disk."""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+    content_type: Optional[str] = None
+
+    @property
+    def size_mb(self) -> float:
+        return round(self.size / (1024 * 1024), 2)
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename)[1].lower()
+
+    def open(self) -> IO[bytes]:
+        return open(self.path, "rb")
+
+    def open_text(self, encoding: str = "utf-8", errors: str = "strict") -> IO[str]:
+        return io.open(self.path, "r", encoding=encoding, errors=errors, newline="")
+
+    def read_text(self, encoding: str = "utf-8", errors: str = "strict", limit: Optional[int] = None) -> str:
+        """Decode the file (or its first ``limit`` characters)."""
+        with self.open_text(encoding=encoding, errors=errors) as f:
+            return f.read() if limit is None else f.read(limit)
+
+    def read_prefix(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        """The first ``ANALYSIS_PREFIX_CHARS`` characters - all that analysis needs."""
+        return self.read_text(encoding=encoding, errors=errors, limit=ANALYSIS_PREFIX_CHARS)
+
+    def iter_lines(self, encoding: str = "utf-8", errors: str = "strict") -> Iterator[str]:
+        with self.open_text(encoding=encoding, errors=errors) as f:
+            for line in f:
+                yield line
+
+    def iter_records(self, encoding: str = "utf-8", errors: str = "strict") -> Iterator[Any]:
+        """
+        Records of a JSON (array elements, or the single top-level value),
+        JSONL (unparseable lines skipped) or CSV (dict per row) upload.
+        Raises ``json.JSONDecodeError`` for malformed JSON.
+        """
+        with self.open_text(encoding=encoding, errors=errors) as f:
+            if self.extension == ".jsonl":
+                for line in f:
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            elif self.extension == ".json":
+                yield from iter_json_records(f)
+            elif self.extension == ".csv":
+                yield from csv.DictReader(f)
+
+    def sample_records(self, n: int) -> Tuple[List[Any], int]:
+        """The first ``n`` records and the total record count, in one streaming pass."""
+        records = self.iter_records()
+        head = list(islice(records, n))
+        return head, len(head) + sum(1 for _ in records)
+
+    def count_records(self) -> Optional[int]:
+        """Number of records, or None when the upload is not valid JSON / JSONL / CSV."""
+        if self.extension not in RECORD_EXTENSIONS:
+            return None
+        try:
+            return self.sample_records(0)[1]
+        except (ValueError, csv.Error):  # JSONDecodeError / UnicodeDecodeError are ValueErrors
+            return None
+
+
+def iter_json_records(f: IO[str], chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time, reading ``f``
+    in chunks; any other top-level value is yielded whole. Only one element
+    (plus a chunk) is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        more = f.read(chunk_size)
+        eof = not more
+        buf, pos = buf[pos:] + more, 0
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = _skip_ws(buf, pos)
+            if pos < len(buf) or eof:
+                return buf[pos:pos + 1]
+            fill()
+
+    if next_char() != "[":
+        yield json.loads(buf[pos:] + f.read())
+        return
+    pos += 1
+
+    first = True
+    while True:
+        char = next_char()
+        if char == "]" and first:
+            break
+        if not first:
+            if char == "]":
+                break
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            pos += 1
+            next_char()
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A value ending at the buffer edge may be cut short (e.g. a number)
+            if end >= len(buf) and not eof:
+                fill()
+                continue
+            break
+
+        yield value
+        pos = end
+        first = False
+
+    # Only whitespace may follow the array
+    pos += 1
+    if next_char():
+        raise json.JSONDecodeError("Extra data", buf, pos)
+
+
+def _skip_ws(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+async def spool_upload(
+    file: UploadFile,
+    dest_dir: str,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Stream ``file`` into ``dest_dir`` and return a path-backed handle.
+
+    The body is written to a temporary ``.part`` file and renamed into place
+    once complete, so a rejected or interrupted upload never replaces an
+    existing file. Raises HTTP 413 when the body exceeds ``max_bytes``.
+    """
+    if not file.filename and not filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    name = os.path.basename(filename or file.filename)
+    final_path = os.path.join(dest_dir, name)
+
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large - maximum upload size is {round(max_bytes / (1024 * 1024))} MB"
+                    )
+
+                digest.update(chunk)
+                out.write(chunk)
+
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return SpooledUpload(
+        path=final_path,
+        filename=name,
+        size=size,
+        sha256=digest.hexdigest(),
+        content_type=file.content_type,
+    )